@@ -0,0 +1,176 @@
+"""
+Asenkron Veritabanı İstemcisi
+database.py fonksiyonlarının asyncio karşılıkları. Tüm eşzamanlı işler tek
+bir arka plan olay döngüsü thread'inde çalışır; engelleyici HTTP çağrıları
+database.py'deki havuzlu oturumu kullanan sınırlı bir executor'da yürür.
+
+Tk tarafı coroutine'i tk_gonder() ile gönderir, sonuç widget.after()
+üzerinden ana thread'de geri çağrılır.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import database
+import flags
+
+DONGU_ISCI_SAYISI = database.HTTP_HAVUZ_BOYUTU   # Havuzdaki bağlantı kadar eşzamanlı istek
+
+_dongu = None
+_dongu_kilidi = threading.Lock()
+
+
+# ==================== OLAY DÖNGÜSÜ ====================
+
+def _dongu_getir():
+    """Paylaşılan olay döngüsünü döndürür (ilk çağrıda thread'i başlatır)"""
+    global _dongu
+    with _dongu_kilidi:
+        if _dongu is None:
+            dongu = asyncio.new_event_loop()
+            dongu.set_default_executor(
+                ThreadPoolExecutor(max_workers=DONGU_ISCI_SAYISI, thread_name_prefix="antkoli-io")
+            )
+            threading.Thread(target=dongu.run_forever, name="antkoli-async", daemon=True).start()
+            _dongu = dongu
+        return _dongu
+
+
+def gonder(coro, zaman_asimi=None):
+    """
+    Coroutine'i döngüye gönderir, concurrent.futures.Future döndürür.
+    Future.cancel() görevi iptal eder; zaman aşımında TimeoutError yükselir.
+    """
+    if zaman_asimi is not None:
+        coro = asyncio.wait_for(coro, zaman_asimi)
+    return asyncio.run_coroutine_threadsafe(coro, _dongu_getir())
+
+
+def tk_gonder(widget, coro, basarili=None, hata=None, zaman_asimi=None):
+    """
+    Coroutine'i döngüye gönderir; sonucu widget.after() ile ana thread'de
+    basarili(sonuc) / hata(istisna) olarak iletir. İptal edilen görevler
+    ve kapanmış pencereler için geri çağrı yapılmaz.
+    """
+    future = gonder(coro, zaman_asimi)
+
+    def tamamlandi(f):
+        if f.cancelled():
+            return
+        istisna = f.exception()
+        if istisna is None:
+            geri_cagri, arguman = basarili, f.result()
+        else:
+            geri_cagri, arguman = hata, istisna
+            if hata is None:
+                print(f"[HATA] Asenkron islem hatasi: {istisna}")
+        if geri_cagri is None:
+            return
+        try:
+            widget.after(0, lambda: widget.winfo_exists() and geri_cagri(arguman))
+        except Exception:
+            pass    # Pencere kapanmış
+
+    future.add_done_callback(tamamlandi)
+    return future
+
+
+async def _calistir(fonk, *args, **kwargs):
+    """Engelleyici fonksiyonu sınırlı executor'da çalıştırır"""
+    dongu = asyncio.get_running_loop()
+    return await dongu.run_in_executor(None, functools.partial(fonk, *args, **kwargs))
+
+
+def _asenkron(fonk):
+    """database.py fonksiyonunun asyncio karşılığını üretir"""
+    @functools.wraps(fonk)
+    async def sarmalayici(*args, **kwargs):
+        return await _calistir(fonk, *args, **kwargs)
+    return sarmalayici
+
+
+async def topla(*coros, zaman_asimi=None):
+    """
+    Coroutine'leri aynı anda çalıştırır, sonuçları sırayla döndürür.
+    Hatalı olanların yerine istisna nesnesi döner; zaman aşımında
+    tamamlanmamış olanlar iptal edilir.
+    """
+    gorevler = [asyncio.ensure_future(c) for c in coros]
+    try:
+        return await asyncio.wait_for(asyncio.gather(*gorevler, return_exceptions=True), zaman_asimi)
+    finally:
+        for gorev in gorevler:
+            gorev.cancel()
+
+
+# ==================== VERİTABANI KARŞILIKLARI ====================
+
+baglantiyi_isit = _asenkron(database.baglantiyi_isit)
+firebase_get = _asenkron(database.firebase_get)
+firebase_set = _asenkron(database.firebase_set)
+firebase_push = _asenkron(database.firebase_push)
+firebase_update = _asenkron(database.firebase_update)
+firebase_delete = _asenkron(database.firebase_delete)
+test_connection = _asenkron(database.test_connection)
+init_db = _asenkron(database.init_db)
+
+get_aylik_giderler = _asenkron(database.get_aylik_giderler)
+get_aylik_kira = _asenkron(database.get_aylik_kira)
+get_toplam_aylik_gider = _asenkron(database.get_toplam_aylik_gider)
+set_aylik_giderler = _asenkron(database.set_aylik_giderler)
+set_aylik_kira = _asenkron(database.set_aylik_kira)
+ayarlari_tazele = _asenkron(database.ayarlari_tazele)
+
+satislari_senkronize = _asenkron(database.satislari_senkronize)
+satis_ekle = _asenkron(database.satis_ekle)
+satis_sil = _asenkron(database.satis_sil)
+tum_satislari_getir = _asenkron(database.tum_satislari_getir)
+satislar_aralik = _asenkron(database.satislar_aralik)
+satis_sayfasi = _asenkron(database.satis_sayfasi)
+istatistikleri_getir = _asenkron(database.istatistikleri_getir)
+sunucu_ozetini_getir = _asenkron(database.sunucu_ozetini_getir)
+ozet_katla = _asenkron(database.ozet_katla)
+ozet_yeniden_olustur = _asenkron(database.ozet_yeniden_olustur)
+
+tum_firmalari_getir = _asenkron(database.tum_firmalari_getir)
+firma_ara = _asenkron(database.firma_ara)
+firma_istatistikleri_getir = _asenkron(database.firma_istatistikleri_getir)
+ulke_firma_sayisi_getir = _asenkron(database.ulke_firma_sayisi_getir)
+tum_verileri_yedekle = _asenkron(database.tum_verileri_yedekle)
+verileri_geri_yukle = _asenkron(database.verileri_geri_yukle)
+
+
+# ==================== YELPAZE (FAN-OUT) SORGULARI ====================
+
+async def yilin_aylari(yil, firma=None, ulke=None):
+    """Yılın 12 ayını aynı anda sorgular; ay (1-12) -> satış listesi döndürür"""
+    sorgular = []
+    for ay in range(1, 13):
+        baslangic = datetime(yil, ay, 1)
+        sonraki = datetime(yil + 1, 1, 1) if ay == 12 else datetime(yil, ay + 1, 1)
+        bitis = sonraki - timedelta(milliseconds=1)
+        sorgular.append(satislar_aralik(baslangic, bitis, firma=firma, ulke=ulke))
+
+    sonuclar = await asyncio.gather(*sorgular)
+    return {ay: satislar for ay, satislar in zip(range(1, 13), sonuclar)}
+
+
+async def bayrak_indir(kod):
+    """Ülke bayrağının PNG verisini indirir (bulunamazsa None)"""
+    return await _calistir(flags.bayrak_verisi_indir, kod)
+
+
+async def bayraklari_indir(kodlar, zaman_asimi=None):
+    """Birden çok bayrağı aynı anda indirir; kod -> PNG verisi (veya None)"""
+    kodlar = list(dict.fromkeys(kodlar))
+    sonuclar = await topla(*(bayrak_indir(kod) for kod in kodlar), zaman_asimi=zaman_asimi)
+    return {kod: (None if isinstance(veri, BaseException) else veri) for kod, veri in zip(kodlar, sonuclar)}
+
+
+async def guncelleme_kontrol(firebase_url=None):
+    """Güncelleme kontrolünü paylaşılan döngüde yapar"""
+    import updater
+    return await _calistir(updater.auto_check_updates, firebase_url or database.FIREBASE_DATABASE_URL)
@@ -0,0 +1,653 @@
+"""
+Yedekleme
+Veritabanını akış halinde, satır satır JSON (NDJSON) olarak diske yazar.
+Kök düğümler shallow=true ile listelenir, her düğümün çocukları sayfa sayfa
+okunur; bellekte aynı anda yalnızca bir sayfa tutulur.
+
+Dosya biçimi (her satır bir JSON nesnesi):
+    {"antkoli_yedek": 1, "olusturma": "...", "dugumler": [...]}   başlık
+    {"yol": "satislar/-Nabc...", "veri": {...}}                   kayıtlar
+    {"son": true, "kayit_sayisi": N}                               bitiş
+Bitiş satırı olmayan dosya yarım kalmış demektir.
+
+Artımlı (fark) yedeklerde başlıkta "tur": "fark" ve bir önceki yedeğin
+kimliği ("onceki") bulunur; yalnızca eklenen/değişen kayıtlar ve silinen
+yollar ({"yol": ..., "sil": true}) yazılır. Son yedeğin yol -> içerik özeti
+listesi (manifest) uygulama veri dizininde tutulur. Fark yedeği geri
+yüklenirken aynı dizindeki taban yedek ve ara farklar bulunup birleştirilir.
+
+Geri yükleme dosyayı yine akış halinde okur: önce tüm kayıtlar doğrulanır,
+sonra boyut sınırlı çok yollu PATCH yığınlarıyla yazılır. Her yığından sonra
+kontrol noktası kaydedilir; yarıda kalan geri yükleme aynı dosyayla yeniden
+başlatıldığında kaldığı yerden devam eder. Eski tek parça JSON yedekler de
+okunur.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+
+import requests
+
+import database
+import local_mirror
+
+YEDEK_BICIM_SURUMU = 1
+YEDEK_SAYFA_BOYUTU = 1000
+YEDEK_ZAMAN_ASIMI = 30
+
+GERI_YUKLEME_YIGIN_BAYT = 512 * 1024    # Bir PATCH gövdesinin üst sınırı
+GERI_YUKLEME_YIGIN_KAYIT = 500          # Bir PATCH'teki en fazla kayıt
+YEDEK_UZANTILARI = (".jsonl.gz", ".jsonl")   # Fark zinciri yalnızca bu dosyalarda aranır
+KONTROL_NOKTASI_DOSYASI = "geri_yukleme_kontrol.json"
+MANIFEST_DOSYASI = "yedek_manifest.json.gz"
+
+_YASAK_KARAKTERLER = set(".$#[]")
+_SATIS_SAYISAL_ALANLAR = (
+    "malzeme_gideri", "toplam_satis_tutari", "satis_suresi_gun", "kira_gideri",
+    "uzerine_kar", "net_kar", "kar_yuzdesi", "ts"
+)
+
+
+def _dosya_ac(yol, mod, sikistir=None):
+    """
+    Yedek dosyasını açar; .gz uzantılı (veya sikistir=True) dosyalar gzip'lidir.
+    Okurken sıkıştırma içerikten anlaşılır ve UTF-8 BOM atlanır.
+    """
+    kodlama = "utf-8"
+    if mod == "r":
+        kodlama = "utf-8-sig"
+        with open(yol, "rb") as f:
+            sikistir = f.read(2) == b"\x1f\x8b"
+    elif sikistir is None:
+        sikistir = yol.endswith(".gz")
+    if sikistir:
+        return gzip.open(yol, mod + "t", encoding=kodlama)
+    return open(yol, mod, encoding=kodlama)
+
+
+def yedek_yolu_duzelt(dosya_yolu):
+    """
+    Dosya adını yedek uzantısına tamamlar ("yedek.gz" -> "yedek.jsonl.gz");
+    başka uzantılı yedekler fark zincirinde bulunamaz.
+    """
+    if dosya_yolu.endswith(YEDEK_UZANTILARI):
+        return dosya_yolu
+    kok = dosya_yolu
+    for uzanti in (".gz", ".json"):
+        if kok.endswith(uzanti):
+            kok = kok[:-len(uzanti)]
+    return kok + YEDEK_UZANTILARI[0]
+
+
+def _satir(nesne):
+    return json.dumps(nesne, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _kok_dugumleri():
+    """Kök düğümleri shallow=true ile listeler: ad -> True (nesne) / skaler değer"""
+    response = database._istek("GET", "", params={"shallow": "true"}, zaman_asimi=YEDEK_ZAMAN_ASIMI)
+    if response.status_code != 200:
+        raise requests.exceptions.HTTPError(f"HTTP {response.status_code}: /")
+    return response.json() or {}
+
+
+def yedek_kayitlari(kokler, sayfa_boyutu=YEDEK_SAYFA_BOYUTU):
+    """
+    Kök düğümlerin kayıtlarını (yol, veri) olarak sırayla döndürür.
+    Nesne düğümlerin her çocuğu ayrı kayıttır; ağ hatasında istisna fırlatır.
+    """
+    for dugum in sorted(kokler):
+        if kokler[dugum] is not True:
+            yield dugum, kokler[dugum]
+            continue
+        for sayfa in database._sayfalar(dugum, sayfa_boyutu):
+            for anahtar, veri in sayfa:
+                yield f"{dugum}/{anahtar}", veri
+
+
+def _icerik_ozeti(veri):
+    """Kaydın içerik özeti (anahtar sırasından bağımsız)"""
+    metin = json.dumps(veri, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(metin.encode("utf-8")).hexdigest()[:16]
+
+
+def _manifest_yolu():
+    return os.path.join(local_mirror.uygulama_veri_dizini(), MANIFEST_DOSYASI)
+
+
+def manifest_oku():
+    """Son yedeğin manifesti ({"kimlik", "dosya", "hashler"}); yoksa None"""
+    try:
+        with gzip.open(_manifest_yolu(), "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _manifest_yaz(manifest):
+    yol = _manifest_yolu()
+    with gzip.open(yol + ".tmp", "wt", encoding="utf-8") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(yol + ".tmp", yol)
+
+
+def yedegi_disa_aktar(dosya_yolu, ilerleme=None, iptal=None, sikistir=None,
+                      sayfa_boyutu=YEDEK_SAYFA_BOYUTU, artimli=False):
+    """
+    Tüm veritabanını NDJSON yedek dosyasına akış halinde yazar.
+
+    ilerleme(kayit_sayisi, dugum): her sayfadan sonra çağrılır (arka plan thread'inden).
+    iptal: threading.Event; set edilirse yazım durur ve yarım dosya silinir.
+    artimli=True: son yedekten beri eklenen/değişen/silinen kayıtlar yazılır
+    (önceki yedek dosyası yoksa tam yedek alınır).
+    Dosya önce .part uzantısıyla yazılır, tamamlanınca yerine taşınır.
+
+    Döndürür: {"kayit_sayisi", "dosya", "tur", "iptal_edildi"}; ağ/disk hatasında istisna.
+    """
+    iptal = iptal or threading.Event()
+    if sikistir is None:
+        sikistir = dosya_yolu.endswith(".gz")
+    gecici_yol = dosya_yolu + ".part"
+    kayit_sayisi = 0
+    tamamlandi = False
+
+    manifest = manifest_oku() if artimli else None
+    if manifest and not os.path.exists(manifest.get("dosya", "")):
+        print("[UYARI] Onceki yedek dosyasi bulunamadi, tam yedek aliniyor")
+        manifest = None
+    onceki = manifest["hashler"] if manifest else {}
+    tur = "fark" if manifest else "tam"
+
+    try:
+        kokler = _kok_dugumleri()
+        baslik = {
+            "antkoli_yedek": YEDEK_BICIM_SURUMU,
+            "tur": tur,
+            "kimlik": uuid.uuid4().hex,
+            "olusturma": datetime.now().isoformat(timespec="seconds"),
+            "dugumler": sorted(kokler)
+        }
+        if manifest:
+            baslik["onceki"] = manifest["kimlik"]
+        # Fark sunucudaki güncel veriyle hesaplanır (yerel ayna son senkron kadar eskidir)
+        kayitlar = yedek_kayitlari(kokler, sayfa_boyutu)
+        hashler = {}
+
+        with _dosya_ac(gecici_yol, "w", sikistir) as f:
+            f.write(_satir(baslik))
+
+            son_dugum = None
+            for yol, veri in kayitlar:
+                if iptal.is_set():
+                    return {"kayit_sayisi": kayit_sayisi, "dosya": None, "tur": tur, "iptal_edildi": True}
+
+                ozet = _icerik_ozeti(veri)
+                hashler[yol] = ozet
+                if onceki.get(yol) != ozet:
+                    f.write(_satir({"yol": yol, "veri": veri}))
+                    kayit_sayisi += 1
+
+                dugum = yol.split("/", 1)[0]
+                if ilerleme and (dugum != son_dugum or len(hashler) % sayfa_boyutu == 0):
+                    ilerleme(len(hashler), dugum)
+                son_dugum = dugum
+
+            for yol in onceki:
+                if yol not in hashler:
+                    f.write(_satir({"yol": yol, "sil": True}))
+                    kayit_sayisi += 1
+
+            f.write(_satir({"son": True, "kayit_sayisi": kayit_sayisi}))
+
+        os.replace(gecici_yol, dosya_yolu)
+        tamamlandi = True
+        _manifest_yaz({"kimlik": baslik["kimlik"], "dosya": os.path.abspath(dosya_yolu), "hashler": hashler})
+        if ilerleme:
+            ilerleme(len(hashler), None)
+        print(f"[OK] Yedek yazildi ({tur}): {dosya_yolu} ({kayit_sayisi} kayit)")
+        return {"kayit_sayisi": kayit_sayisi, "dosya": dosya_yolu, "tur": tur, "iptal_edildi": False}
+    finally:
+        if not tamamlandi and os.path.exists(gecici_yol):
+            os.remove(gecici_yol)
+
+
+def _yedek_basligi(dosya_yolu):
+    """Yedek dosyasının başlık satırı (NDJSON değilse None)"""
+    try:
+        with _dosya_ac(dosya_yolu, "r") as f:
+            baslik = json.loads(f.readline())
+    except (OSError, ValueError, EOFError):
+        return None
+    return baslik if isinstance(baslik, dict) and "antkoli_yedek" in baslik else None
+
+
+def yedek_zinciri(dosya_yolu):
+    """
+    Fark yedeğinin taban (tam) yedeğe kadar zincirini [taban, fark1, ..., dosya_yolu]
+    olarak döndürür. Önceki yedekler aynı dizinde aranır; eksikse ValueError.
+    """
+    dizin = os.path.dirname(os.path.abspath(dosya_yolu))
+    dosyalar = {}
+    for ad in os.listdir(dizin):
+        if ad.endswith(YEDEK_UZANTILARI):
+            baslik = _yedek_basligi(os.path.join(dizin, ad))
+            if baslik and baslik.get("kimlik"):
+                dosyalar[baslik["kimlik"]] = os.path.join(dizin, ad)
+
+    zincir = [dosya_yolu]
+    baslik = _yedek_basligi(dosya_yolu) or {}
+    while baslik.get("tur") == "fark":
+        onceki = dosyalar.get(baslik.get("onceki"))
+        if onceki is None or onceki in zincir:
+            raise ValueError(f"Zincirdeki onceki yedek bulunamadi: {baslik.get('onceki')}")
+        zincir.insert(0, onceki)
+        baslik = _yedek_basligi(onceki) or {}
+    return zincir
+
+
+def zinciri_birlestir(dosya_yolu, cikti_yolu=None):
+    """
+    Taban yedek + farklardan dosya_yolu anındaki tam yedeği üretir, yolunu döndürür.
+    Ara durum diskteki geçici bir SQLite dosyasında tutulur (sınırlı bellek).
+    cikti_yolu verilmezse uygulama veri dizinine yazılır; aynı fark için daha
+    önce üretilmiş dosya varsa yeniden kullanılır (geri yükleme devamı için).
+    """
+    baslik = _yedek_basligi(dosya_yolu)
+    if not baslik or baslik.get("tur") != "fark":
+        return dosya_yolu
+    if cikti_yolu is None:
+        cikti_yolu = os.path.join(local_mirror.uygulama_veri_dizini(), f"zincir_{baslik['kimlik']}.jsonl.gz")
+        if os.path.exists(cikti_yolu):
+            return cikti_yolu
+
+    zincir = yedek_zinciri(dosya_yolu)
+    gecici_db = cikti_yolu + ".sqlite3"
+    baglanti = sqlite3.connect(gecici_db)
+    try:
+        baglanti.execute("CREATE TABLE IF NOT EXISTS kayitlar (yol TEXT PRIMARY KEY, veri TEXT NOT NULL)")
+        baglanti.execute("DELETE FROM kayitlar")
+
+        for dosya in zincir:
+            bitti = False
+            with baglanti:
+                for satir_no, nesne in _yedek_satirlari(dosya):
+                    if nesne is None:
+                        raise ValueError(f"{dosya}: satir {satir_no} gecersiz JSON")
+                    if nesne.get("son") is True:
+                        bitti = True
+                    elif "yol" in nesne and nesne.get("sil"):
+                        baglanti.execute("DELETE FROM kayitlar WHERE yol = ?", (nesne["yol"],))
+                    elif "yol" in nesne:
+                        baglanti.execute(
+                            "INSERT OR REPLACE INTO kayitlar (yol, veri) VALUES (?, ?)",
+                            (nesne["yol"], json.dumps(nesne.get("veri"), ensure_ascii=False))
+                        )
+            if not bitti:
+                raise ValueError(f"{dosya}: yedek dosyasi yarim (bitis satiri yok)")
+
+        kayit_sayisi = 0
+        with _dosya_ac(cikti_yolu + ".part", "w", True) as f:
+            f.write(_satir({
+                "antkoli_yedek": YEDEK_BICIM_SURUMU,
+                "tur": "tam",
+                "kimlik": baslik["kimlik"],
+                "olusturma": baslik.get("olusturma"),
+                "dugumler": baslik.get("dugumler", []),
+                "zincir": [os.path.basename(d) for d in zincir]
+            }))
+            for yol, veri in baglanti.execute("SELECT yol, veri FROM kayitlar ORDER BY yol"):
+                f.write('{"yol":' + json.dumps(yol, ensure_ascii=False) + ',"veri":' + veri + '}\n')
+                kayit_sayisi += 1
+            f.write(_satir({"son": True, "kayit_sayisi": kayit_sayisi}))
+        os.replace(cikti_yolu + ".part", cikti_yolu)
+    finally:
+        baglanti.close()
+        for yol in (gecici_db, cikti_yolu + ".part"):
+            if os.path.exists(yol):
+                os.remove(yol)
+
+    print(f"[OK] Yedek zinciri birlestirildi ({len(zincir)} dosya): {cikti_yolu}")
+    return cikti_yolu
+
+
+# ==================== GERİ YÜKLEME ====================
+
+def _eski_bicim_satirlari(veri):
+    """Eski tek parça JSON yedeği NDJSON satırlarına çevirir"""
+    veri = veri or {}
+    yield 1, {"antkoli_yedek": 0, "dugumler": sorted(veri)}
+    sayac = 0
+    for dugum in sorted(veri):
+        deger = veri[dugum]
+        if isinstance(deger, dict):
+            for anahtar in sorted(deger):
+                sayac += 1
+                yield sayac + 1, {"yol": f"{dugum}/{anahtar}", "veri": deger[anahtar]}
+        elif deger is not None:
+            sayac += 1
+            yield sayac + 1, {"yol": dugum, "veri": deger}
+    yield sayac + 2, {"son": True, "kayit_sayisi": sayac}
+
+
+def _yedek_satirlari(kaynak):
+    """
+    Yedekteki satırları (satır_no, nesne) olarak döndürür; bozuk satırda nesne None.
+    kaynak: yedek dosyası yolu veya eski biçimde sözlük.
+    """
+    if isinstance(kaynak, dict):
+        yield from _eski_bicim_satirlari(kaynak)
+        return
+
+    with _dosya_ac(kaynak, "r") as f:
+        ilk = f.readline()
+        try:
+            baslik = json.loads(ilk)
+        except ValueError:
+            baslik = None
+
+        if not (isinstance(baslik, dict) and "antkoli_yedek" in baslik):
+            # Eski biçim: tüm dosya tek JSON nesnesi
+            yield from _eski_bicim_satirlari(json.loads(ilk + f.read()))
+            return
+
+        yield 1, baslik
+        for satir_no, satir in enumerate(f, 2):
+            if not satir.strip():
+                continue
+            try:
+                yield satir_no, json.loads(satir)
+            except ValueError:
+                yield satir_no, None
+
+
+def _kayitlar(kaynak):
+    """Yedekteki kayıtları (yol, veri) olarak döndürür (başlık ve bitiş atlanır)"""
+    for _, nesne in _yedek_satirlari(kaynak):
+        if isinstance(nesne, dict) and "yol" in nesne:
+            yield nesne["yol"], nesne["veri"]
+
+
+def _kayit_hatasi(nesne):
+    """Kayıt geçersizse açıklamasını, geçerliyse None döndürür"""
+    if not isinstance(nesne, dict) or not isinstance(nesne.get("yol"), str) or "veri" not in nesne:
+        return "kayıt biçimi geçersiz"
+
+    yol, veri = nesne["yol"], nesne["veri"]
+    parcalar = yol.split("/")
+    if len(parcalar) > 2 or not all(parcalar) or any(_YASAK_KARAKTERLER & set(p) for p in parcalar):
+        return f"geçersiz yol: {yol}"
+    if veri is None:
+        return f"boş değer: {yol}"
+
+    if parcalar[0] == "satislar" and len(parcalar) == 2:
+        if not isinstance(veri, dict):
+            return f"satış kaydı nesne değil: {yol}"
+        if not isinstance(veri.get("firma_adi"), str) or not veri["firma_adi"].strip():
+            return f"firma adı eksik: {yol}"
+        for alan in _SATIS_SAYISAL_ALANLAR:
+            deger = veri.get(alan, 0)
+            if isinstance(deger, bool) or not isinstance(deger, (int, float)):
+                return f"{alan} sayı değil: {yol}"
+    return None
+
+
+def yedegi_dogrula(kaynak, ilerleme=None, iptal=None, en_fazla_hata=50):
+    """
+    Yedeği akış halinde doğrular.
+
+    Döndürür: {"kayit_sayisi", "dugumler", "anahtarlar", "hatalar", "iptal_edildi"}
+    anahtarlar: nesne düğümü -> yedekteki çocuk anahtarları (sonradan temizlik için).
+    hatalar: [(satır_no, açıklama)] (en fazla en_fazla_hata adet).
+    """
+    iptal = iptal or threading.Event()
+    sonuc = {"kayit_sayisi": 0, "dugumler": set(), "anahtarlar": {}, "hatalar": [], "iptal_edildi": False}
+    hatalar = sonuc["hatalar"]
+    baslik = bitis = None
+    gorulen = set()
+
+    for satir_no, nesne in _yedek_satirlari(kaynak):
+        if iptal.is_set():
+            sonuc["iptal_edildi"] = True
+            return sonuc
+        if len(hatalar) >= en_fazla_hata:
+            break
+
+        if satir_no == 1:
+            baslik = nesne
+            continue
+        if isinstance(nesne, dict) and nesne.get("son") is True:
+            bitis = nesne
+            continue
+
+        hata = _kayit_hatasi(nesne) if nesne is not None else "geçersiz JSON"
+        if hata:
+            hatalar.append((satir_no, hata))
+            continue
+        if nesne["yol"] in gorulen and "/" not in nesne["yol"]:
+            hatalar.append((satir_no, f"tekrarlanan yol: {nesne['yol']}"))
+            continue
+
+        dugum, _, anahtar = nesne["yol"].partition("/")
+        sonuc["dugumler"].add(dugum)
+        if anahtar:
+            sonuc["anahtarlar"].setdefault(dugum, set()).add(anahtar)
+        else:
+            gorulen.add(dugum)
+        sonuc["kayit_sayisi"] += 1
+
+        if ilerleme and sonuc["kayit_sayisi"] % GERI_YUKLEME_YIGIN_KAYIT == 0:
+            ilerleme("dogrulama", sonuc["kayit_sayisi"], None)
+
+    if baslik is None:
+        hatalar.append((1, "yedek başlığı bulunamadı"))
+    if len(hatalar) < en_fazla_hata:
+        if bitis is None:
+            hatalar.append((0, "yedek dosyası yarım (bitiş satırı yok)"))
+        elif bitis.get("kayit_sayisi") != sonuc["kayit_sayisi"]:
+            hatalar.append((0, f"kayıt sayısı uyuşmuyor: {sonuc['kayit_sayisi']} / {bitis.get('kayit_sayisi')}"))
+    return sonuc
+
+
+def _yiginlar(kaynak, atla=0, yigin_bayt=GERI_YUKLEME_YIGIN_BAYT, yigin_kayit=GERI_YUKLEME_YIGIN_KAYIT):
+    """
+    Kayıtları boyut sınırlı çok yollu güncellemelere böler.
+    (o ana kadar işlenen kayıt sayısı, {yol: veri}) döndürür; ilk `atla` kayıt atlanır.
+    """
+    yigin = {}
+    boyut = 0
+    islenen = 0
+
+    for yol, veri in _kayitlar(kaynak):
+        islenen += 1
+        if islenen <= atla:
+            continue
+
+        if yol.startswith("satislar/") and isinstance(veri, dict):
+            # Diğer istemcilerin aynaları geri yüklenen kayıtları düzenleme olarak çeksin
+            veri = database.degisim_damgali(veri)
+        ek_boyut = len(_satir({yol: veri}).encode("utf-8"))
+        if yigin and (boyut + ek_boyut > yigin_bayt or len(yigin) >= yigin_kayit):
+            yield islenen - 1, yigin
+            yigin, boyut = {}, 0
+        yigin[yol] = veri
+        boyut += ek_boyut
+
+    if yigin:
+        yield islenen, yigin
+
+
+def _kontrol_noktasi_yolu():
+    return os.path.join(local_mirror.uygulama_veri_dizini(), KONTROL_NOKTASI_DOSYASI)
+
+
+def _dosya_kimligi(kaynak):
+    """Kontrol noktasının aynı yedek dosyasına ait olduğunu anlamak için kimlik"""
+    bilgi = os.stat(kaynak)
+    return {"dosya": os.path.abspath(kaynak), "boyut": bilgi.st_size, "degistirilme": bilgi.st_mtime}
+
+
+def kontrol_noktasi_oku(kaynak):
+    """Bu yedek için yarıda kalmış geri yüklemede yazılmış kayıt sayısı (yoksa 0)"""
+    if isinstance(kaynak, dict):
+        return 0
+    try:
+        with open(_kontrol_noktasi_yolu(), "r", encoding="utf-8") as f:
+            kontrol = json.load(f)
+        kimlik = _dosya_kimligi(kaynak)
+        if all(kontrol.get(k) == v for k, v in kimlik.items()):
+            return int(kontrol.get("yuklenen", 0))
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def _kontrol_noktasi_yaz(kaynak, yuklenen):
+    if isinstance(kaynak, dict):
+        return
+    kontrol = dict(_dosya_kimligi(kaynak), yuklenen=yuklenen)
+    yol = _kontrol_noktasi_yolu()
+    with open(yol + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(kontrol, f)
+    os.replace(yol + ".tmp", yol)
+
+
+def _kontrol_noktasini_sil():
+    try:
+        os.remove(_kontrol_noktasi_yolu())
+    except OSError:
+        pass
+
+
+def _fazla_yollar(dogrulama):
+    """Sunucuda olup yedekte olmayan yollar (geri yükleme sonrası silinir)"""
+    fazla = []
+    for dugum, deger in _kok_dugumleri().items():
+        if dugum not in dogrulama["dugumler"]:
+            fazla.append(dugum)
+        elif deger is True and dugum in dogrulama["anahtarlar"]:
+            response = database._istek("GET", dugum, params={"shallow": "true"}, zaman_asimi=YEDEK_ZAMAN_ASIMI)
+            if response.status_code != 200:
+                raise requests.exceptions.HTTPError(f"HTTP {response.status_code}: {dugum}")
+            yedektekiler = dogrulama["anahtarlar"][dugum]
+            fazla.extend(f"{dugum}/{k}" for k in (response.json() or {}) if k not in yedektekiler)
+    return fazla
+
+
+def _patch(guncelleme):
+    response = database._istek("PATCH", "", data=guncelleme, zaman_asimi=YEDEK_ZAMAN_ASIMI)
+    if response.status_code != 200:
+        raise requests.exceptions.HTTPError(f"HTTP {response.status_code}: geri yükleme yığını")
+
+
+def yedegi_geri_yukle(kaynak, ilerleme=None, iptal=None, deneme=False,
+                      yigin_bayt=GERI_YUKLEME_YIGIN_BAYT, yigin_kayit=GERI_YUKLEME_YIGIN_KAYIT):
+    """
+    Yedeği doğrulayıp parça parça geri yükler; sonunda veritabanı yedekle aynı olur.
+
+    kaynak: NDJSON / eski JSON yedek dosyası yolu veya eski biçimde sözlük.
+    Fark yedeği verilirse önce zinciri birleştirilir (o anki tam hali yüklenir).
+    ilerleme(asama, tamamlanan, toplam): asama "dogrulama", "yukleme", "temizlik", "ozet".
+    iptal: threading.Event; yazım yığın sınırında durur, kontrol noktası korunur.
+    deneme=True: hiçbir şey yazılmaz; doğrulama, yığın ve silinecek kayıt sayıları döner.
+
+    Sırası: doğrulama -> gönderilmemiş yazma kuyruğunun atılması -> yığınlar
+    halinde yazma (kontrol noktalı) -> yedekte olmayan kayıtların silinmesi ->
+    yerel aynanın sıfırlanması ve özetin yeniden hesaplanması. Yazma önce
+    yapıldığından yarıda kalan geri yükleme veri kaybettirmez.
+
+    Döndürür: {"kayit_sayisi", "yuklenen", "devam_edilen", "yigin_sayisi",
+               "silinen", "hatalar", "iptal_edildi", "deneme"}; ağ hatasında istisna.
+    """
+    iptal = iptal or threading.Event()
+    birlesik = None
+    if not isinstance(kaynak, dict) and (_yedek_basligi(kaynak) or {}).get("tur") == "fark":
+        kaynak = birlesik = zinciri_birlestir(kaynak)
+    
+    dogrulama = yedegi_dogrula(kaynak, ilerleme, iptal)
+    sonuc = {
+        "kayit_sayisi": dogrulama["kayit_sayisi"], "yuklenen": 0, "devam_edilen": 0,
+        "yigin_sayisi": 0, "silinen": 0, "hatalar": dogrulama["hatalar"],
+        "iptal_edildi": dogrulama["iptal_edildi"], "deneme": deneme
+    }
+    if sonuc["hatalar"] or sonuc["iptal_edildi"]:
+        return sonuc
+
+    toplam = sonuc["kayit_sayisi"]
+    atla = min(kontrol_noktasi_oku(kaynak), toplam)
+    sonuc["devam_edilen"] = atla
+    if not deneme:
+        # Kuyruktaki eski yazımlar geri yüklenen verinin üstüne yeniden oynatılmasın
+        atilan = database.bekleyen_islemleri_at()
+        if atilan:
+            print(f"[UYARI] Geri yukleme oncesi {atilan} gonderilmemis islem atildi")
+
+    for islenen, guncelleme in _yiginlar(kaynak, atla, yigin_bayt, yigin_kayit):
+        if iptal.is_set():
+            sonuc["iptal_edildi"] = True
+            return sonuc
+        if not deneme:
+            _patch(guncelleme)
+            _kontrol_noktasi_yaz(kaynak, islenen)
+        sonuc["yigin_sayisi"] += 1
+        sonuc["yuklenen"] = islenen - atla
+        if ilerleme:
+            ilerleme("yukleme", islenen, toplam)
+
+    fazla = _fazla_yollar(dogrulama)
+    sonuc["silinen"] = len(fazla)
+    if deneme:
+        return sonuc
+
+    for i in range(0, len(fazla), yigin_kayit):
+        if iptal.is_set():
+            sonuc["iptal_edildi"] = True
+            return sonuc
+        _patch({yol: None for yol in fazla[i:i + yigin_kayit]})
+        if ilerleme:
+            ilerleme("temizlik", min(i + yigin_kayit, len(fazla)), len(fazla))
+
+    _kontrol_noktasini_sil()
+    if birlesik:
+        os.remove(birlesik)
+    database.yerel_aynayi_sifirla()
+    if ilerleme:
+        ilerleme("ozet", 0, None)
+    database.ozet_yeniden_olustur()
+
+    print(f"[OK] Yedek geri yuklendi: {toplam} kayit, {len(fazla)} fazla kayit silindi")
+    return sonuc
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Ant Koli yedekleme komutları")
+    komutlar = parser.add_subparsers(dest="komut", required=True)
+    yedekle = komutlar.add_parser("yedekle", help="Veritabanını NDJSON dosyasına yedekler")
+    yedekle.add_argument("dosya")
+    yedekle.add_argument("--artimli", action="store_true", help="Yalnızca son yedekten beri değişenleri yaz")
+    geri_yukle = komutlar.add_parser("geri-yukle", help="Yedeği (veya fark zincirini) geri yükler")
+    geri_yukle.add_argument("dosya")
+    geri_yukle.add_argument("--deneme", action="store_true", help="Yazmadan doğrula ve say")
+    birlestir = komutlar.add_parser("birlestir", help="Taban + fark yedeklerinden tam yedek üretir")
+    birlestir.add_argument("dosya")
+    birlestir.add_argument("cikti")
+    args = parser.parse_args()
+
+    if args.komut == "yedekle":
+        yedegi_disa_aktar(yedek_yolu_duzelt(args.dosya), artimli=args.artimli)
+    elif args.komut == "geri-yukle":
+        sonuc = yedegi_geri_yukle(args.dosya, deneme=args.deneme)
+        for satir_no, hata in sonuc["hatalar"]:
+            print(f"[HATA] Satir {satir_no}: {hata}")
+        print(json.dumps({k: v for k, v in sonuc.items() if k != "hatalar"}, ensure_ascii=False))
+        sys.exit(1 if sonuc["hatalar"] else 0)
+    elif args.komut == "birlestir":
+        zinciri_birlestir(args.dosya, args.cikti)
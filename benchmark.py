@@ -0,0 +1,445 @@
+"""
+Performans Ölçümleri
+Sentetik satış verisiyle okuma ve istatistik fonksiyonlarının süresini ve
+tepe bellek kullanımını ölçer, sonuçları sürümler arası karşılaştırma için
+JSON dosyasına yazar.
+
+İki mod vardır:
+    bellek   Veri doğrudan yerel aynaya yüklenir, fonksiyonlar ağa gitmeden
+             (senkronize=False) çağrılır; saf hesaplama maliyeti.
+    sunucu   Veri local_rtdb.py alt sürecine yüklenir, fonksiyonlar gerçek
+             HTTP yolu üzerinden çağrılır; indirme, sorgu ve senkron maliyeti.
+
+Her ölçüm ayrı bir geçici uygulama veri dizininde yapılır; kullanıcının
+aynasına ve canlı veritabanına dokunulmaz. Aynı tohumla üretilen veri her
+çalıştırmada aynıdır.
+
+Kullanım:
+    python benchmark.py --cikti sonuc.json
+    python benchmark.py --boyutlar 1000,10000,100000,1000000 --modlar bellek
+    python benchmark.py --cikti yeni.json --karsilastir eski.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+
+import database
+import local_mirror
+
+VARSAYILAN_BOYUTLAR = (1000, 10000, 100000)    # 1000000 isteğe bağlı (--boyutlar)
+VARSAYILAN_TEKRAR = 5
+VARSAYILAN_TOHUM = 42
+GERILEME_ESIGI = 1.2            # Medyan süre bu oranın üzerinde artarsa gerileme sayılır
+SUNUCU_BASLATMA_ZAMAN_ASIMI = 120
+BASLANGIC_ZAMANI = datetime(2023, 1, 1)  # Sabit: sonuçlar tarihten bağımsız olsun
+VERI_SURESI_GUN = 3 * 365
+
+# Firma adı parçaları ve ülke dağılımı (müşterilerin çoğu yurt içi)
+_AD_ONEKLERI = ["Anadolu", "Ege", "Marmara", "Karadeniz", "Akdeniz", "Yıldız", "Öz", "Kuzey",
+                "Güney", "Doğu", "Batı", "Altın", "Gümüş", "Işık", "İnci", "Çınar", "Deniz",
+                "Ufuk", "Şahin", "Kartal", "Ata", "Yeni", "Mavi", "Yeşil"]
+_AD_SEKTORLERI = ["Ambalaj", "Gıda", "Tekstil", "Lojistik", "Mobilya", "Kimya", "Kozmetik",
+                  "Elektronik", "Kağıt", "Plastik", "Tarım", "Otomotiv", "Medikal", "Yapı"]
+_AD_SONEKLERI = ["Ltd. Şti.", "A.Ş.", "San. ve Tic. Ltd. Şti.", "Dış Tic. A.Ş.", "GmbH", "B.V."]
+_ULKE_AGIRLIKLARI = {"TR": 70, "DE": 8, "NL": 4, "GB": 3, "FR": 2, "IQ": 3, "AZ": 2,
+                     "RO": 2, "BG": 2, "GR": 1, "IT": 1, "US": 1, "GE": 1}
+
+
+# ==================== SENTETİK VERİ ====================
+
+def _firma_adlari(adet, rnd):
+    """Benzersiz, gerçekçi görünen firma adları üretir"""
+    adlar = []
+    gorulen = set()
+    while len(adlar) < adet:
+        ad = f"{rnd.choice(_AD_ONEKLERI)} {rnd.choice(_AD_SEKTORLERI)} {rnd.choice(_AD_SONEKLERI)}"
+        if ad.lower() in gorulen:
+            ad = f"{rnd.choice(_AD_ONEKLERI)} {ad} {len(adlar)}"
+        gorulen.add(ad.lower())
+        adlar.append(ad)
+    return adlar
+
+
+def sentetik_satislar(adet, tohum=VARSAYILAN_TOHUM):
+    """
+    adet kadar satış kaydı üretir; push id -> kayıt sözlüğü döndürür.
+    Firma satış sayıları Zipf dağılımına uyar (az sayıda firma satışların
+    çoğunu yapar), her firmanın ağırlıklı seçilmiş sabit bir ülkesi vardır.
+    Kayıtlar son 3 yıla yayılır; id'ler ts ile aynı sırada dizilir.
+    """
+    rnd = random.Random(tohum)
+    firma_sayisi = max(50, adet // 20)
+    adlar = _firma_adlari(firma_sayisi, rnd)
+    ulkeler = rnd.choices(list(_ULKE_AGIRLIKLARI), weights=list(_ULKE_AGIRLIKLARI.values()), k=firma_sayisi)
+    agirliklar = [1 / (sira + 1) for sira in range(firma_sayisi)]
+
+    bas_ms = int(BASLANGIC_ZAMANI.timestamp() * 1000)
+    zamanlar = sorted(bas_ms + rnd.randrange(VERI_SURESI_GUN * 86400 * 1000) for _ in range(adet))
+    secilenler = rnd.choices(range(firma_sayisi), weights=agirliklar, k=adet)
+
+    gunluk_gider = sum(_ornek_ayarlar().values()) / 30
+    satislar = {}
+    for ts, firma in zip(zamanlar, secilenler):
+        malzeme = round(rnd.lognormvariate(8, 0.8), 2)
+        gun = rnd.randint(1, 30)
+        kira = round(gun * gunluk_gider, 2)
+        uzerine_kar = round((malzeme + kira) * rnd.uniform(0.05, 0.6), 2)
+        toplam = round(malzeme + kira + uzerine_kar, 2)
+        satis_id = database._push_zaman_kismi(ts) + "".join(rnd.choice(database._PUSH_KARAKTERLERI) for _ in range(12))
+        satislar[satis_id] = {
+            "firma_adi": adlar[firma],
+            "firma_key": database._firma_anahtari(adlar[firma]),
+            "malzeme_gideri": malzeme,
+            "toplam_satis_tutari": toplam,
+            "satis_suresi_gun": gun,
+            "kira_gideri": kira,
+            "uzerine_kar": uzerine_kar,
+            "net_kar": uzerine_kar,
+            "kar_yuzdesi": round(uzerine_kar / toplam * 100, 2),
+            "notlar": "",
+            "ulke": ulkeler[firma],
+            "tarih": datetime.fromtimestamp(ts / 1000).strftime("%d-%m-%Y %H:%M:%S"),
+            "ts": ts
+        }
+    return satislar
+
+
+def _ornek_ayarlar():
+    """Sunucu moduna yüklenecek aylık gider ayarları"""
+    ayarlar = {key: 2500.0 for key, _ in database.AYLIK_GIDERLER}
+    ayarlar["aylik_kira"] = 30000.0
+    return ayarlar
+
+
+def _en_yogun_firma_ve_yil(satislar):
+    """Aylık grafik ölçümü için en çok satışı olan firmayı ve en yoğun yılını bulur"""
+    sayac = {}
+    for satis in satislar.values():
+        sayac[satis["firma_adi"]] = sayac.get(satis["firma_adi"], 0) + 1
+    firma_adi = max(sayac, key=sayac.get)
+    yillar = {}
+    for satis in satislar.values():
+        if satis["firma_adi"] == firma_adi:
+            yil = datetime.fromtimestamp(satis["ts"] / 1000).year
+            yillar[yil] = yillar.get(yil, 0) + 1
+    return firma_adi, max(yillar, key=yillar.get)
+
+
+# ==================== ÖLÇÜM ====================
+
+def _olc(fonk, hazirlik=None, tekrar=VARSAYILAN_TEKRAR):
+    """
+    fonk'u tekrar kez çalıştırıp süreleri (ms) döndürür; ardından ayrı bir
+    çalıştırmada tracemalloc ile tepe belleği (KB) ölçer. hazirlik her
+    çalıştırmadan önce (ölçüm dışında) çağrılır.
+    """
+    sureler = []
+    for _ in range(tekrar):
+        if hazirlik:
+            hazirlik()
+        bas = time.perf_counter()
+        fonk()
+        sureler.append((time.perf_counter() - bas) * 1000)
+
+    if hazirlik:
+        hazirlik()
+    tracemalloc.start()
+    try:
+        fonk()
+        _, tepe = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return sureler, tepe / 1024
+
+
+def _sonuc(mod, boyut, islem, sureler, tepe_kb):
+    sonuc = {
+        "mod": mod,
+        "boyut": boyut,
+        "islem": islem,
+        "sureler_ms": [round(s, 3) for s in sureler],
+        "en_iyi_ms": round(min(sureler), 3),
+        "medyan_ms": round(statistics.median(sureler), 3),
+        "tepe_bellek_kb": round(tepe_kb, 1)
+    }
+    print(f"[OK] {mod:7} {boyut:>8} {islem:45} medyan {sonuc['medyan_ms']:>10.2f} ms"
+          f"  tepe {sonuc['tepe_bellek_kb']:>10.0f} KB")
+    return sonuc
+
+
+def _bellek_durumunu_bosalt():
+    """database modülünün bellekteki önbelleklerini atar (uygulamanın yeni açılışı gibi)"""
+    with database._veri_kilidi:
+        database._satislar = None
+        database._hazir_kayitlar.clear()
+        database._sirali_onbellek = (None, [])
+        database._ozet_onbellek = (None, None)
+        database._ts_indeksi = (None, [], [])
+        database._son_senkron = 0
+        database._firma_indeksi = database.search_index.FirmaIndeksi()
+
+
+def _veri_dizini_ac():
+    """Ölçüm için boş bir uygulama veri dizini açar ve aynayı ona yönlendirir"""
+    local_mirror.kapat()
+    dizin = tempfile.mkdtemp(prefix="antkoli_olcum_")
+    os.environ["ANTKOLI_VERI_DIZINI"] = dizin
+    _bellek_durumunu_bosalt()
+    database._bekleyen_idler = None
+    return dizin
+
+
+def _veri_dizini_kapat(dizin):
+    local_mirror.kapat()
+    os.environ.pop("ANTKOLI_VERI_DIZINI", None)
+    shutil.rmtree(dizin, ignore_errors=True)
+
+
+def _aylik_veriler_olcumu(satislar):
+    """FirmaDetayWindow.hesapla_aylik_veriler için (pencere açmadan) ölçüm fonksiyonu döndürür"""
+    try:
+        from main import FirmaDetayWindow
+    except ImportError as e:
+        print(f"[HATA] hesapla_aylik_veriler atlandi (arayuz kutuphaneleri yok: {e})")
+        return None
+
+    firma_adi, yil = _en_yogun_firma_ve_yil(satislar)
+    firma_key = database._firma_anahtari(firma_adi)
+    pencere = SimpleNamespace(selected_year=yil, AY_ISIMLERI=FirmaDetayWindow.AY_ISIMLERI)
+    firma_satislari = [
+        database._satis_hazirla(k, v) for k, v in satislar.items() if v["firma_key"] == firma_key
+    ]
+    return lambda: FirmaDetayWindow.hesapla_aylik_veriler(pencere, firma_satislari)
+
+
+# ==================== BELLEK MODU ====================
+
+def bellek_olc(boyut, satislar, tekrar):
+    """
+    Fonksiyonları yalnızca yerel aynadan çalıştırır. Her fonksiyon üç
+    durumda ölçülür: soğuk (uygulama yeni açılmış, ayna diskten okunur),
+    değişiklik (tek satış eklenmiş, önbellekler geçersiz) ve sıcak.
+    """
+    sonuclar = []
+    dizin = _veri_dizini_ac()
+    try:
+        database.yerel_aynayi_sifirla()
+        database._yerel_uygula(satislar)
+        local_mirror.meta_yaz("tam_senkron", 1)
+
+        firma_adi, _ = _en_yogun_firma_ve_yil(satislar)
+        ornek_id = next(iter(satislar))
+        sayac = [0]
+
+        def tek_degisiklik():
+            # Aynı id'ye her seferinde yeni bir kayıt: sürüm artar, hazırlanmış kayıt önbelleği kaçar
+            sayac[0] += 1
+            database._yerel_uygula({ornek_id: dict(satislar[ornek_id], notlar=str(sayac[0]))})
+
+        islemler = [
+            ("tum_satislari_getir", lambda: database.tum_satislari_getir(senkronize=False)),
+            ("istatistikleri_getir", lambda: database.istatistikleri_getir(senkronize=False)),
+            ("tum_firmalari_getir", lambda: database.tum_firmalari_getir(senkronize=False)),
+            ("firma_istatistikleri_getir", lambda: database.firma_istatistikleri_getir(firma_adi, senkronize=False)),
+            ("ulke_firma_sayisi_getir", lambda: database.ulke_firma_sayisi_getir(senkronize=False)),
+        ]
+        for ad, fonk in islemler:
+            for durum, hazirlik in (("soguk", _bellek_durumunu_bosalt), ("degisiklik", tek_degisiklik),
+                                    ("sicak", None)):
+                fonk()  # Sıcak ölçüm için önbellekleri doldur
+                sureler, tepe = _olc(fonk, hazirlik, tekrar)
+                sonuclar.append(_sonuc("bellek", boyut, f"{ad}/{durum}", sureler, tepe))
+
+        aylik = _aylik_veriler_olcumu(satislar)
+        if aylik is not None:
+            sureler, tepe = _olc(aylik, tekrar=tekrar)
+            sonuclar.append(_sonuc("bellek", boyut, "hesapla_aylik_veriler", sureler, tepe))
+    finally:
+        _veri_dizini_kapat(dizin)
+    return sonuclar
+
+
+# ==================== SUNUCU MODU ====================
+
+def _bos_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _sunucu_verisi(satislar):
+    """local_rtdb'ye yüklenecek kök ağaç: satışlar, ayarlar ve sunucu özeti"""
+    hazir = [database._satis_hazirla(k, v) for k, v in satislar.items()]
+    ozet = database._sunucu_ozeti_olustur(database.ozet_hesapla(hazir))
+    ozet["surum"] = 1
+    return {"satislar": satislar, "ayarlar": _ornek_ayarlar(), "ozet": ozet}
+
+
+def _sunucuyu_baslat(veri_dosyasi, gecikme):
+    """local_rtdb.py'yi alt süreçte başlatır; (süreç, url) döndürür"""
+    port = _bos_port()
+    surec = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "local_rtdb.py"),
+         "--port", str(port), "--veri", veri_dosyasi, "--gecikme", str(gecikme)],
+        stdout=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    son = time.monotonic() + SUNUCU_BASLATMA_ZAMAN_ASIMI
+    while time.monotonic() < son:
+        if surec.poll() is not None:
+            raise RuntimeError("Yerel RTDB sunucusu baslatilamadi")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return surec, url
+        except OSError:
+            time.sleep(0.2)
+    surec.kill()
+    raise RuntimeError("Yerel RTDB sunucusu zamaninda acilmadi")
+
+
+def sunucu_olc(boyut, satislar, tekrar, gecikme):
+    """
+    Fonksiyonları yerel RTDB sunucusu üzerinden çalıştırır. Ayna boşken
+    (ilk açılış) yapılan sunucu sorguları, tam indirme ve ayna hazırken
+    yapılan artımlı senkron ayrı ayrı ölçülür.
+    """
+    sonuclar = []
+    dizin = _veri_dizini_ac()
+    veri_dosyasi = os.path.join(dizin, "sunucu_verisi.json")
+    with open(veri_dosyasi, "w", encoding="utf-8") as f:
+        json.dump(_sunucu_verisi(satislar), f, ensure_ascii=False)
+
+    eski_url = database.FIREBASE_DATABASE_URL
+    surec, database.FIREBASE_DATABASE_URL = _sunucuyu_baslat(veri_dosyasi, gecikme)
+    try:
+        firma_adi, _ = _en_yogun_firma_ve_yil(satislar)
+
+        def bos_ayna():
+            database.yerel_aynayi_sifirla()
+            _bellek_durumunu_bosalt()
+
+        def senkron_zorla():
+            # MIN_SENKRON_ARALIGI beklenmeden ağa gidilsin
+            database._son_senkron = 0
+
+        islemler = [
+            ("firma_istatistikleri_getir/bos_ayna", bos_ayna,
+             lambda: database.firma_istatistikleri_getir(firma_adi)),
+            ("istatistikleri_getir/sunucu_ozeti", None, database.istatistikleri_getir),
+            ("tum_satislari_getir/tam_indirme", bos_ayna, database.tum_satislari_getir),
+            ("tum_satislari_getir/artimli", senkron_zorla, database.tum_satislari_getir),
+            ("tum_firmalari_getir/artimli", senkron_zorla, database.tum_firmalari_getir),
+            ("firma_istatistikleri_getir/artimli", senkron_zorla,
+             lambda: database.firma_istatistikleri_getir(firma_adi)),
+            ("ulke_firma_sayisi_getir/artimli", senkron_zorla, database.ulke_firma_sayisi_getir),
+        ]
+        for ad, hazirlik, fonk in islemler:
+            sureler, tepe = _olc(fonk, hazirlik, tekrar)
+            sonuclar.append(_sonuc("sunucu", boyut, ad, sureler, tepe))
+    finally:
+        surec.terminate()
+        surec.wait()
+        database.FIREBASE_DATABASE_URL = eski_url
+        _veri_dizini_kapat(dizin)
+    return sonuclar
+
+
+# ==================== KARŞILAŞTIRMA ====================
+
+def karsilastir(onceki, simdiki, esik=GERILEME_ESIGI):
+    """
+    İki sonuç dosyasındaki ortak ölçümlerin medyan sürelerini karşılaştırır;
+    [(anahtar, önceki ms, şimdiki ms, oran)] döndürür ve gerilemeleri yazdırır.
+    """
+    eski = {(s["mod"], s["boyut"], s["islem"]): s for s in onceki["sonuclar"]}
+    satirlar = []
+    for s in simdiki["sonuclar"]:
+        anahtar = (s["mod"], s["boyut"], s["islem"])
+        if anahtar not in eski:
+            continue
+        once = eski[anahtar]["medyan_ms"]
+        oran = s["medyan_ms"] / once if once else float("inf")
+        satirlar.append((anahtar, once, s["medyan_ms"], oran))
+        etiket = "[HATA] Gerileme" if oran > esik else "[OK]"
+        print(f"{etiket} {anahtar[0]:7} {anahtar[1]:>8} {anahtar[2]:45}"
+              f" {once:>10.2f} -> {s['medyan_ms']:>10.2f} ms  (x{oran:.2f})")
+    return satirlar
+
+
+def _surum_bilgisi():
+    bilgi = {}
+    try:
+        from updater import CURRENT_VERSION
+        bilgi["uygulama"] = CURRENT_VERSION
+    except ImportError:
+        pass
+    try:
+        bilgi["commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return bilgi
+
+
+def calistir(boyutlar=VARSAYILAN_BOYUTLAR, modlar=("bellek", "sunucu"), tekrar=VARSAYILAN_TEKRAR,
+             gecikme=0.0, tohum=VARSAYILAN_TOHUM):
+    """Tüm ölçümleri yapar, JSON'a yazılacak sonuç sözlüğünü döndürür"""
+    sonuc = {
+        "olusturma": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "surum": _surum_bilgisi(),
+        "ayarlar": {"tekrar": tekrar, "gecikme": gecikme, "tohum": tohum},
+        "sonuclar": []
+    }
+    for boyut in boyutlar:
+        bas = time.perf_counter()
+        satislar = sentetik_satislar(boyut, tohum)
+        print(f"[OK] {boyut} sentetik satis uretildi ({time.perf_counter() - bas:.1f} sn)")
+        if "bellek" in modlar:
+            sonuc["sonuclar"] += bellek_olc(boyut, satislar, tekrar)
+        if "sunucu" in modlar:
+            sonuc["sonuclar"] += sunucu_olc(boyut, satislar, tekrar, gecikme)
+    return sonuc
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ant Koli performans ölçümleri")
+    parser.add_argument("--boyutlar", default=",".join(map(str, VARSAYILAN_BOYUTLAR)),
+                        help="Virgülle ayrılmış satış sayıları (ör. 1000,10000,100000,1000000)")
+    parser.add_argument("--modlar", default="bellek,sunucu", help="bellek, sunucu veya ikisi")
+    parser.add_argument("--tekrar", type=int, default=VARSAYILAN_TEKRAR)
+    parser.add_argument("--gecikme", type=float, default=0.0, help="Sunucu modunda yanıt gecikmesi (sn)")
+    parser.add_argument("--tohum", type=int, default=VARSAYILAN_TOHUM)
+    parser.add_argument("--cikti", help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument("--karsilastir", help="Önceki sonuç dosyası; gerilemeler raporlanır")
+    args = parser.parse_args()
+
+    sonuc = calistir(
+        [int(b) for b in args.boyutlar.split(",") if b.strip()],
+        [m.strip() for m in args.modlar.split(",") if m.strip()],
+        args.tekrar, args.gecikme, args.tohum
+    )
+    if args.cikti:
+        with open(args.cikti, "w", encoding="utf-8") as f:
+            json.dump(sonuc, f, ensure_ascii=False, indent=2)
+        print(f"[OK] Sonuclar yazildi: {args.cikti}")
+    if args.karsilastir:
+        with open(args.karsilastir, "r", encoding="utf-8") as f:
+            gerilemeler = [s for s in karsilastir(json.load(f), sonuc) if s[3] > GERILEME_ESIGI]
+        sys.exit(1 if gerilemeler else 0)
@@ -4,8 +4,20 @@ Tüm bilgisayarlar aynı verilere erişir ve anlık senkronize olur.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
+import copy
+import functools
 import json
+from bisect import bisect_left, bisect_right
+import os
+import random
+import sys
+import threading
+import time
+import local_mirror
+import metrics
+import search_index
 
 # ============================================================
 # FIREBASE AYARLARI - BU KISMI KENDİ BİLGİLERİNİZLE DEĞİŞTİRİN
@@ -13,17 +25,312 @@ import json
 # Firebase Console > Project Settings > General > Your apps > Web app
 # Realtime Database URL'sini buraya yazın (sonunda .json olmadan)
 
-FIREBASE_DATABASE_URL = "https://ant-koli-kar-hesaplama-default-rtdb.europe-west1.firebasedatabase.app"
+VARSAYILAN_FIREBASE_URL = "https://ant-koli-kar-hesaplama-default-rtdb.europe-west1.firebasedatabase.app"
+
+# ANTKOLI_FIREBASE_URL ile başka bir sunucuya (ör. local_rtdb.py) yönlendirilebilir
+FIREBASE_DATABASE_URL = os.environ.get("ANTKOLI_FIREBASE_URL", VARSAYILAN_FIREBASE_URL)
 
 # Örnek: "https://antkoli-kar-hesaplama-default-rtdb.europe-west1.firebasedatabase.app"
 # ============================================================
 
+# Başka bir sunucunun aynası ve yazma kuyruğu ayrı dosyada tutulur
+local_mirror.sunucu_ayarla(
+    None if FIREBASE_DATABASE_URL == VARSAYILAN_FIREBASE_URL else FIREBASE_DATABASE_URL
+)
+
+
+# ============================================================
+# HTTP BAĞLANTI HAVUZU
+# ============================================================
+# Tüm Firebase istekleri tek bir paylaşılan oturum üzerinden gider; böylece
+# TLS bağlantıları yeniden kullanılır ve her çağrıda el sıkışma yapılmaz.
+
+HTTP_HAVUZ_BOYUTU = 10          # Havuzda açık tutulacak en fazla bağlantı
+HTTP_YENIDEN_DENEME = 3         # 5xx / zaman aşımında en fazla tekrar sayısı
+HTTP_GERI_CEKILME_TABANI = 0.25 # Üstel geri çekilme taban süresi (saniye)
+HTTP_GERI_CEKILME_UST = 4.0     # Tek bekleme için üst sınır (saniye)
+HTTP_BAGLANTI_ZAMAN_ASIMI = 3.05
+HTTP_ZAMAN_ASIMI = 5            # Varsayılan çağrı başına toplam süre bütçesi
+
+_oturum = None
+_oturum_kilidi = threading.Lock()
+
+
+def _oturum_olustur(havuz_boyutu):
+    """Bağlantı havuzlu yeni bir HTTP oturumu oluşturur"""
+    oturum = requests.Session()
+    adaptor = HTTPAdapter(pool_connections=2, pool_maxsize=havuz_boyutu)
+    oturum.mount("https://", adaptor)
+    oturum.mount("http://", adaptor)
+    oturum.headers.update({"Connection": "keep-alive"})
+    return oturum
+
+
+def _oturum_getir():
+    """Paylaşılan HTTP oturumunu döndürür (ilk çağrıda oluşturur)"""
+    global _oturum
+    if _oturum is None:
+        with _oturum_kilidi:
+            if _oturum is None:
+                _oturum = _oturum_olustur(HTTP_HAVUZ_BOYUTU)
+    return _oturum
+
+
+def havuz_boyutunu_ayarla(boyut):
+    """Bağlantı havuzu boyutunu değiştirir (eski oturum kapatılır)"""
+    global _oturum, HTTP_HAVUZ_BOYUTU
+    with _oturum_kilidi:
+        HTTP_HAVUZ_BOYUTU = max(1, int(boyut))
+        eski, _oturum = _oturum, _oturum_olustur(HTTP_HAVUZ_BOYUTU)
+    if eski is not None:
+        eski.close()
+
+
+def _geri_cekilme_suresi(deneme):
+    """Jitter'lı üstel bekleme süresi (full jitter)"""
+    ust = min(HTTP_GERI_CEKILME_UST, HTTP_GERI_CEKILME_TABANI * (2 ** deneme))
+    return random.uniform(0, ust)
+
+
+# ==================== ÖLÇÜMLER ====================
+# Her Firebase isteğinin süresi, gövde boyutları, durum kodu ve tekrar sayısı
+# (işlem, yol) bazında; yerel hesaplamaların süresi fonksiyon bazında
+# toplanır. ANTKOLI_METRIK_LOGU=1 (veya dosya yolu) ile kayıtlar dönen bir
+# JSON-lines dosyasına da yazılır.
+
+METRIK_LOG_DOSYASI = "metrikler.jsonl"
+
+_metrikler = metrics.Metrikler()
+
+
+def _islem_etiketi(method, params):
+    """İstek türünü sorgu biçimiyle birlikte adlandırır (ör. 'GET orderBy=ts')"""
+    if params:
+        if "shallow" in params:
+            return f"{method} shallow"
+        if "orderBy" in params:
+            return f"{method} orderBy={str(params['orderBy']).strip(chr(34))}"
+    return method
+
+
+def _govde_boyutu(govde):
+    if govde is None:
+        return 0
+    return len(govde) if isinstance(govde, bytes) else len(govde.encode("utf-8"))
+
+
+def _sure_olc(fonk):
+    """Fonksiyonun çalışma süresini ölçüm deposuna kaydeden dekoratör"""
+    @functools.wraps(fonk)
+    def sarmalayici(*args, **kwargs):
+        baslangic = time.perf_counter()
+        try:
+            return fonk(*args, **kwargs)
+        finally:
+            _metrikler.islem_kaydet(fonk.__name__, (time.perf_counter() - baslangic) * 1000)
+    return sarmalayici
+
+
+def metrikleri_getir():
+    """Toplanan ölçümlerin anlık görüntüsü: {'http': [...], 'islemler': [...]}"""
+    return _metrikler.anlik_goruntu()
+
+
+def metrikleri_sifirla():
+    _metrikler.sifirla()
+
+
+def metrik_logunu_ac(dosya_yolu=None):
+    """Ölçümleri dönen JSON-lines dosyasına yazmaya başlar; dosya yolunu döndürür"""
+    dosya_yolu = dosya_yolu or os.path.join(local_mirror.uygulama_veri_dizini(), METRIK_LOG_DOSYASI)
+    _metrikler.log_ac(dosya_yolu)
+    return dosya_yolu
+
+
+def metrik_logunu_kapat():
+    _metrikler.log_kapat()
+
+
+def metrik_logu_acik():
+    return _metrikler.log_acik()
+
+
+if os.environ.get("ANTKOLI_METRIK_LOGU"):
+    try:
+        metrik_logunu_ac(None if os.environ["ANTKOLI_METRIK_LOGU"] == "1" else os.environ["ANTKOLI_METRIK_LOGU"])
+    except OSError as e:
+        print(f"[HATA] Metrik logu acilamadi: {e}")
+
+
+# ==================== DEVRE KESİCİ ====================
+# Art arda başarısız istekler devreyi açar: sunucuya ulaşılamadığı sürece
+# istekler beklemeden CevrimdisiHatasi ile döner ve okumalar yerel aynadan
+# yapılır. Arka planda geri çekilmeli yoklama bağlantıyı dener; başarılı
+# olunca devre kapanır, kuyruk ve dinleyiciler uyandırılır, "baglanti"
+# kanalının abonelerine haber verilir.
+
+DEVRE_HATA_ESIGI = 2            # Art arda bu kadar başarısız çağrıda devre açılır
+DEVRE_YOKLAMA_TABANI = 2        # sn: ilk yoklama beklemesi
+DEVRE_YOKLAMA_UST = 60          # sn: yoklama beklemesi üst sınırı
+DEVRE_YOKLAMA_ZAMAN_ASIMI = 5
+
+_devre_kilidi = threading.Lock()
+_devre_acik = False
+_ardisik_hata = 0
+_yoklama_olayi = threading.Event()      # Yoklamayı beklemeden tetikler
+_yoklayici_thread = None
+
+
+class CevrimdisiHatasi(requests.exceptions.ConnectionError):
+    """Devre açıkken yapılan isteklerde ağa gitmeden yükseltilir"""
+
+
+def cevrimici():
+    """Firebase'e ulaşılabiliyor mu? (devre kapalı mı)"""
+    return not _devre_acik
+
+
+def baglantiyi_yokla():
+    """Çevrimdışıyken bir sonraki yoklamayı beklemeden bağlantıyı dener"""
+    _yoklama_olayi.set()
+
+
+def _devre_basarili():
+    global _devre_acik, _ardisik_hata
+    with _devre_kilidi:
+        _ardisik_hata = 0
+        if not _devre_acik:
+            return
+        _devre_acik = False
+    
+    print("[OK] Firebase baglantisi geri geldi.")
+    _aktarim_olayi.set()
+    _dinleyici_uyandir.set()
+    _bildir("baglanti")
+
+
+def _devre_basarisiz():
+    global _devre_acik, _ardisik_hata, _yoklayici_thread
+    with _devre_kilidi:
+        _ardisik_hata += 1
+        if _devre_acik or _ardisik_hata < DEVRE_HATA_ESIGI:
+            return
+        _devre_acik = True
+        _yoklama_olayi.clear()
+        if _yoklayici_thread is None or not _yoklayici_thread.is_alive():
+            _yoklayici_thread = threading.Thread(target=_yoklayici_dongusu, name="antkoli-yoklama", daemon=True)
+            _yoklayici_thread.start()
+    
+    print("[UYARI] Firebase'e ulasilamiyor, cevrimdisi moda gecildi.")
+    _bildir("baglanti")
+
+
+def _yoklayici_dongusu():
+    """Devre açık kaldıkça geri çekilmeyle sunucuyu yoklar"""
+    deneme = 0
+    while _devre_acik:
+        bekleme = min(DEVRE_YOKLAMA_UST, DEVRE_YOKLAMA_TABANI * 2 ** min(deneme, 5))
+        _yoklama_olayi.wait(bekleme * random.uniform(0.5, 1.0))
+        _yoklama_olayi.clear()
+        deneme += 1
+        try:
+            response = _oturum_getir().get(
+                f"{FIREBASE_DATABASE_URL}/.json", params={"shallow": "true"},
+                timeout=(HTTP_BAGLANTI_ZAMAN_ASIMI, DEVRE_YOKLAMA_ZAMAN_ASIMI)
+            )
+            if response.status_code < 500:
+                _devre_basarili()
+        except requests.exceptions.RequestException:
+            pass
+
+
+def _istek(method, path, data=None, params=None, headers=None,
+           zaman_asimi=HTTP_ZAMAN_ASIMI, tekrar=HTTP_YENIDEN_DENEME, idempotent=True, harici=False):
+    """
+    Firebase REST isteği gönderir (harici=True ise path tam adrestir).
+    5xx ve zaman aşımlarında jitter'lı üstel geri çekilme ile tekrar dener;
+    tüm denemeler zaman_asimi saniyelik toplam bütçeyi aşmaz.
+    Son denemede de başarısız olursa yanıtı döndürür ya da hatayı fırlatır.
+    Devre açıksa ağa gitmeden CevrimdisiHatasi fırlatır.
+    """
+    url = path if harici else f"{FIREBASE_DATABASE_URL}/{path}.json"
+    bitis = time.monotonic() + zaman_asimi
+    deneme = 0
+    response = None
+    baslangic = time.perf_counter()
+    
+    try:
+        if _devre_acik:
+            raise CevrimdisiHatasi("Firebase'e ulasilamiyor (cevrimdisi)")
+        while True:
+            kalan = max(0.1, bitis - time.monotonic())
+            try:
+                response = None
+                response = _oturum_getir().request(
+                    method, url, json=data, params=params, headers=headers,
+                    timeout=(min(HTTP_BAGLANTI_ZAMAN_ASIMI, kalan), kalan)
+                )
+                if response.status_code < 500:
+                    return response
+                hata = None
+            except requests.exceptions.ConnectTimeout as e:
+                hata = e
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                # İstek sunucuya ulaşmış olabilir; idempotent olmayanı tekrarlama
+                if not idempotent:
+                    raise
+                hata = e
+            
+            deneme += 1
+            bekleme = _geri_cekilme_suresi(deneme)
+            if deneme > tekrar or time.monotonic() + bekleme >= bitis:
+                if hata is not None:
+                    raise hata
+                return response
+            time.sleep(bekleme)
+    finally:
+        istisna = sys.exc_info()[1]
+        if isinstance(istisna, CevrimdisiHatasi):
+            pass
+        elif isinstance(istisna, requests.exceptions.RequestException) or (
+                response is not None and response.status_code >= 500):
+            _devre_basarisiz()
+        elif response is not None:
+            _devre_basarili()
+        _metrikler.http_kaydet(
+            _islem_etiketi(method, params), path, (time.perf_counter() - baslangic) * 1000,
+            durum=response.status_code if response is not None else None,
+            istek_bayt=_govde_boyutu(response.request.body) if response is not None else 0,
+            yanit_bayt=len(response.content) if response is not None else 0,
+            deneme=max(1, deneme + (1 if response is not None and response.status_code < 500 else 0)),
+            hata=type(istisna).__name__ if istisna is not None else None
+        )
 
-def firebase_get(path):
+
+def baglantiyi_isit():
+    """Uygulama açılırken Firebase'e arka planda bağlantı kurar (TLS ön ısıtma)"""
+    def isit():
+        try:
+            _istek("GET", "", params={"shallow": "true"}, tekrar=0)
+        except Exception:
+            pass
+    
+    threading.Thread(target=isit, daemon=True).start()
+
+
+def harici_get(url, zaman_asimi=HTTP_ZAMAN_ASIMI, tekrar=HTTP_YENIDEN_DENEME):
+    """
+    Firebase dışındaki bir adrese (ör. bayrak CDN'i) paylaşılan oturumla GET yapar.
+    Tekrar deneme, devre kesici ve ölçümler Firebase istekleriyle ortaktır.
+    Yanıtı döndürür; ağ hatasında (veya çevrimdışıyken) istisna fırlatır.
+    """
+    return _istek("GET", url, zaman_asimi=zaman_asimi, tekrar=tekrar, harici=True)
+
+
+def firebase_get(path, zaman_asimi=HTTP_ZAMAN_ASIMI):
     """Firebase'den veri okur"""
     try:
-        url = f"{FIREBASE_DATABASE_URL}/{path}.json"
-        response = requests.get(url, timeout=5)
+        response = _istek("GET", path, zaman_asimi=zaman_asimi)
         if response.status_code == 200:
             return response.json()
         return None
@@ -32,22 +339,21 @@ def firebase_get(path):
         return None
 
 
-def firebase_set(path, data):
+def firebase_set(path, data, zaman_asimi=HTTP_ZAMAN_ASIMI):
     """Firebase'e veri yazar (üzerine yazar)"""
     try:
-        url = f"{FIREBASE_DATABASE_URL}/{path}.json"
-        response = requests.put(url, json=data, timeout=5)
+        response = _istek("PUT", path, data=data, zaman_asimi=zaman_asimi)
         return response.status_code == 200
     except Exception as e:
         print(f"[HATA] Firebase yazma hatasi: {e}")
         return False
 
 
-def firebase_push(path, data):
+def firebase_push(path, data, zaman_asimi=HTTP_ZAMAN_ASIMI):
     """Firebase'e yeni veri ekler (benzersiz ID ile)"""
     try:
-        url = f"{FIREBASE_DATABASE_URL}/{path}.json"
-        response = requests.post(url, json=data, timeout=5)
+        # POST idempotent değil: yalnızca bağlantı kurulamadıysa tekrar dene
+        response = _istek("POST", path, data=data, zaman_asimi=zaman_asimi, idempotent=False)
         if response.status_code == 200:
             return response.json().get('name')  # Benzersiz ID döner
         return None
@@ -56,22 +362,20 @@ def firebase_push(path, data):
         return None
 
 
-def firebase_update(path, data):
+def firebase_update(path, data, zaman_asimi=HTTP_ZAMAN_ASIMI):
     """Firebase'deki veriyi günceller"""
     try:
-        url = f"{FIREBASE_DATABASE_URL}/{path}.json"
-        response = requests.patch(url, json=data, timeout=5)
+        response = _istek("PATCH", path, data=data, zaman_asimi=zaman_asimi)
         return response.status_code == 200
     except Exception as e:
         print(f"[HATA] Firebase guncelleme hatasi: {e}")
         return False
 
 
-def firebase_delete(path):
+def firebase_delete(path, zaman_asimi=HTTP_ZAMAN_ASIMI):
     """Firebase'den veri siler"""
     try:
-        url = f"{FIREBASE_DATABASE_URL}/{path}.json"
-        response = requests.delete(url, timeout=5)
+        response = _istek("DELETE", path, zaman_asimi=zaman_asimi)
         return response.status_code == 200
     except Exception as e:
         print(f"[HATA] Firebase silme hatasi: {e}")
@@ -81,8 +385,7 @@ def firebase_delete(path):
 def test_connection():
     """Firebase bağlantısını test eder"""
     try:
-        url = f"{FIREBASE_DATABASE_URL}/.json?shallow=true"
-        response = requests.get(url, timeout=5)
+        response = _istek("GET", "", params={"shallow": "true"})
         return response.status_code == 200
     except:
         return False
@@ -100,9 +403,8 @@ def init_db():
     
     print("[OK] Firebase baglantisi basarili!")
     
-    # Ayarları kontrol et, yoksa oluştur
-    ayarlar = firebase_get("ayarlar")
-    if not ayarlar:
+    # Ayar deposunu doldur; sunucuda hiç ayar yoksa varsayılanları oluştur
+    if ayarlari_tazele() and not _ayarlar_onbellek:
         varsayilan_ayarlar = {
             "aylik_kira": 0,
             "personel": 0,
@@ -141,15 +443,119 @@ AYLIK_GIDERLER = [
     ("muhasebe", "📊 Muhasebe (aylık)")
 ]
 
+# ==================== AYARLAR DEPOSU ====================
+# Aylık giderler bir kez yüklenip bellekte tutulur; hesaplamalar ağa gitmez.
+# Dinleyici açıkken akış önbelleği günceller. Değilse önbellek
+# AYAR_TAZELEME_ARALIGI'ndan eskiyse arka planda yeniden okunur; ETag
+# değişmediyse gövde yok sayılır. Son bilinen değerler yerel aynada saklanır,
+# böylece uygulama çevrimdışı açılsa da hesaplama yapılabilir.
+
+AYAR_TAZELEME_ARALIGI = 60          # sn
+
+_ayarlar_onbellek = None            # Ayarların güncel kopyası (gönderilmemiş yerel değişiklikler dahil)
+_ayarlar_etag = None
+_ayarlar_zamani = 0                 # Son doğrulamanın monotonic zamanı (0 = bayat)
+_ayarlar_kilidi = threading.Lock()
+_ayarlar_tazeleniyor = False
+
+
+def _ayarlari_kaydet(ayarlar, etag=None, bekleyen=None):
+    """Sunucudaki ayarları, bekleyen yerel değişiklikler üstte olacak şekilde önbelleğe ve aynaya yazar"""
+    global _ayarlar_onbellek, _ayarlar_etag, _ayarlar_zamani
+    ayarlar = dict(ayarlar or {}, **(_bekleyen_ayarlar() if bekleyen is None else bekleyen))
+    with _ayarlar_kilidi:
+        _ayarlar_onbellek = ayarlar
+        _ayarlar_etag = etag
+        _ayarlar_zamani = time.monotonic()
+    try:
+        local_mirror.meta_yaz("ayarlar", json.dumps(ayarlar, ensure_ascii=False))
+    except Exception as e:
+        print(f"[HATA] Yerel ayar kopyasi yazilamadi: {e}")
+
+
+def ayarlari_tazele():
+    """
+    Ayarları sunucudan okur; ETag önbellektekiyle aynıysa gövde işlenmez.
+    Sunucu okunabildiyse True döner.
+    """
+    global _ayarlar_zamani
+    # Kuyruk istekten önce okunur: yanıt gelene kadar gönderilen işlem ya
+    # yanıtta ya da bu listede bulunur
+    bekleyen = _bekleyen_ayarlar()
+    try:
+        response = _istek("GET", "ayarlar", headers={"X-Firebase-ETag": "true"})
+    except Exception as e:
+        print(f"[HATA] Ayarlar okunamadi: {e}")
+        return False
+    if response.status_code != 200:
+        return False
+    
+    etag = response.headers.get("ETag")
+    with _ayarlar_kilidi:
+        ayni = etag and etag == _ayarlar_etag
+        if ayni:
+            _ayarlar_zamani = time.monotonic()
+    if ayni:
+        return True
+    _ayarlari_kaydet(response.json(), etag, bekleyen)
+    _bildir("ayarlar")
+    return True
+
+
+def _ayarlari_arka_planda_tazele():
+    """Tazelemeyi (aynı anda en fazla bir tane) arka planda başlatır"""
+    global _ayarlar_tazeleniyor
+    with _ayarlar_kilidi:
+        if _ayarlar_tazeleniyor:
+            return
+        _ayarlar_tazeleniyor = True
+    
+    def tazele():
+        global _ayarlar_tazeleniyor
+        try:
+            ayarlari_tazele()
+        finally:
+            with _ayarlar_kilidi:
+                _ayarlar_tazeleniyor = False
+    
+    threading.Thread(target=tazele, daemon=True).start()
+
+
+def _ayarlar_getir():
+    """Ayarların bellekteki kopyası; ilk çağrıda diskten (o da yoksa sunucudan) yüklenir"""
+    global _ayarlar_onbellek
+    if _ayarlar_onbellek is None:
+        try:
+            kayitli = local_mirror.meta_oku("ayarlar")
+        except Exception as e:
+            print(f"[HATA] Yerel ayar kopyasi okunamadi: {e}")
+            kayitli = None
+        if kayitli:
+            ayarlar = dict(json.loads(kayitli), **_bekleyen_ayarlar())
+            with _ayarlar_kilidi:
+                if _ayarlar_onbellek is None:
+                    _ayarlar_onbellek = ayarlar
+        else:
+            ayarlari_tazele()   # İlk açılış: tek seferlik eşzamanlı yükleme
+    
+    if (not dinleyici_canli("ayarlar") and cevrimici()
+            and time.monotonic() - _ayarlar_zamani > AYAR_TAZELEME_ARALIGI):
+        _ayarlari_arka_planda_tazele()
+    return _ayarlar_onbellek or {}
+
+
+def _ayarlari_bayatlat():
+    """Sonraki okumada ayarların sunucudan yeniden doğrulanmasını sağlar"""
+    global _ayarlar_etag, _ayarlar_zamani
+    with _ayarlar_kilidi:
+        _ayarlar_etag = None
+        _ayarlar_zamani = 0
+
+
 def get_aylik_giderler():
-    """Tüm aylık giderleri getirir"""
-    ayarlar = firebase_get("ayarlar")
-    if ayarlar:
-        giderler = {}
-        for key, label in AYLIK_GIDERLER:
-            giderler[key] = float(ayarlar.get(key, 0))
-        return giderler
-    return {key: 0 for key, label in AYLIK_GIDERLER}
+    """Tüm aylık giderleri getirir (bellekten; ağ beklenmez)"""
+    ayarlar = _ayarlar_getir()
+    return {key: float(ayarlar.get(key, 0)) for key, label in AYLIK_GIDERLER}
 
 
 def get_aylik_kira():
@@ -165,20 +571,860 @@ def get_toplam_aylik_gider():
 
 
 def set_aylik_giderler(giderler_dict):
-    """Tüm aylık giderleri günceller"""
-    return firebase_update("ayarlar", giderler_dict)
+    """Tüm aylık giderleri günceller (kuyruğa yazılır, arka planda gönderilir)"""
+    global _ayarlar_onbellek, _ayarlar_etag
+    try:
+        _islem_kuyruga_al({f"ayarlar/{key}": value for key, value in giderler_dict.items()})
+    except Exception as e:
+        print(f"[HATA] Ayarlar kuyruga yazilamadi: {e}")
+        return False
+    
+    # Önbellek hemen güncellenir; ETag atıldığından sonraki tazeleme sunucuyu yeniden işler
+    ayarlar = dict(_ayarlar_getir(), **giderler_dict)
+    with _ayarlar_kilidi:
+        _ayarlar_onbellek = ayarlar
+        _ayarlar_etag = None
+    try:
+        local_mirror.meta_yaz("ayarlar", json.dumps(ayarlar, ensure_ascii=False))
+    except Exception as e:
+        print(f"[HATA] Yerel ayar kopyasi yazilamadi: {e}")
+    _bildir("ayarlar")
+    return True
 
 
 def set_aylik_kira(kira):
     """Aylık kira tutarını günceller (geriye uyumluluk için)"""
-    return firebase_update("ayarlar", {"aylik_kira": kira})
+    return set_aylik_giderler({"aylik_kira": kira})
+
+
+# ==================== SAYFALI OKUMA ====================
+# Büyük düğümler tek istekte indirilmez; anahtar sırasına göre
+# orderBy="$key" + limitToFirst + startAt ile sayfa sayfa okunur.
+# Push ID'ler zamana göre sıralı olduğundan anahtar sırası kronolojiktir.
+
+SAYFA_BOYUTU = 500
+
+
+def _push_id_siniri(zaman, son=False):
+    """datetime değerini push ID aralık sınırına çevirir (anahtar sorguları için)"""
+    return _push_zaman_kismi(int(zaman.timestamp() * 1000)) + ("z" if son else "-") * 12
+
+
+def _sayfalar(path, sayfa_boyutu=SAYFA_BOYUTU, baslangic=None, bitis=None):
+    """
+    Düğümün çocuklarını anahtar sırasıyla sayfa sayfa getirir.
+    Her sayfa [(anahtar, değer), ...] listesidir; ağ hatasında istisna fırlatır.
+    """
+    imlec = baslangic
+    ilk = True
+    
+    while True:
+        # İlk sayfadan sonra imleç kaydı tekrar gelir; bir fazlası istenip atılır
+        params = {"orderBy": '"$key"', "limitToFirst": sayfa_boyutu + (0 if ilk else 1)}
+        if imlec is not None:
+            params["startAt"] = json.dumps(imlec)
+        if bitis is not None:
+            params["endAt"] = json.dumps(bitis)
+        
+        response = _istek("GET", path, params=params)
+        if response.status_code != 200:
+            raise requests.exceptions.HTTPError(f"HTTP {response.status_code}: {path}")
+        
+        sayfa = sorted((response.json() or {}).items())
+        if not ilk and sayfa and sayfa[0][0] == imlec:
+            sayfa = sayfa[1:]
+        
+        if sayfa:
+            yield sayfa
+        if len(sayfa) < sayfa_boyutu:
+            return
+        
+        imlec = sayfa[-1][0]
+        ilk = False
+
+
+def iter_satislar(page_size=SAYFA_BOYUTU, start=None, end=None):
+    """
+    Satışları eskiden yeniye sayfa sayfa okuyup tek tek döndürür (sınırlı bellek).
+    start / end: push ID anahtarı veya datetime (dahil).
+    """
+    if isinstance(start, datetime):
+        start = _push_id_siniri(start)
+    if isinstance(end, datetime):
+        end = _push_id_siniri(end, son=True)
+    
+    for sayfa in _sayfalar("satislar", page_size, start, end):
+        for satis_id, satis_data in sayfa:
+            if satis_data:
+                yield _satis_hazirla(satis_id, satis_data)
+
+
+# ==================== YEREL AYNA & SENKRON ====================
+# Satışlar kullanıcının veri dizinindeki SQLite aynasında tutulur ve bellekte
+# bir kez yüklenir. Ağdan yalnızca son senkron noktasından sonraki kayıtlar
+# (push ID sırasına göre) çekilir; silmeler sunucudaki anahtar listesiyle
+# (shallow) belirli aralıklarla karşılaştırılarak yakalanır. Var olan
+# kayıtlardaki değişiklikler her yazımda sunucu saatiyle güncellenen degisim
+# alanı üzerinden (orderBy="degisim" + startAt) ikinci bir imleçle çekilir.
+
+MIN_SENKRON_ARALIGI = 2         # sn: bu süre içinde tekrar ağa gidilmez
+SILME_KONTROL_ARALIGI = 300     # sn: anahtar listesi karşılaştırma sıklığı
+TOPLU_EKSIK_ESIGI = 50          # Bundan fazla eksik kayıt aralık sorgusuyla çekilir
+
+_satislar = None                # id -> kayıt (aynanın bellekteki görüntüsü)
+_veri_surumu = 0                # Her yerel değişiklikte artar
+_veri_kilidi = threading.RLock()
+_senkron_kilidi = threading.Lock()
+_son_senkron = 0
+_sirali_onbellek = (None, [])
+_degisim_uyarisi = False        # degisim dizini eksik uyarısı bir kez yazılır
+
+SUNUCU_ZAMANI = {".sv": "timestamp"}
+
+
+def degisim_damgali(kayit):
+    """Sunucuya yazılacak satış kaydına degisim (sunucu saati) damgası ekler"""
+    return dict(kayit, degisim=SUNUCU_ZAMANI)
+
+
+def _yerel_yukle():
+    """Aynayı (gerekirse diskten) belleğe yükler"""
+    global _satislar
+    if _satislar is None:
+        with _veri_kilidi:
+            if _satislar is None:
+                try:
+                    _satislar = local_mirror.satislari_oku()
+                except Exception as e:
+                    print(f"[HATA] Yerel ayna okunamadi: {e}")
+                    _satislar = {}
+    return _satislar
+
+
+def _yerel_uygula(degisiklikler, sunucudan=False):
+    """
+    id -> kayıt değişikliklerini belleğe ve aynaya uygular (None = sil).
+    sunucudan=True ise kuyrukta bekleyen yerel işlemi olan kayıtlar atlanır.
+    """
+    global _veri_surumu
+    if sunucudan:
+        bekleyen = _bekleyen_idleri_getir()
+        if bekleyen:
+            degisiklikler = {k: v for k, v in degisiklikler.items() if k not in bekleyen}
+    if not degisiklikler:
+        return
+    
+    with _veri_kilidi:
+        satislar = _yerel_yukle()
+        for satis_id, veri in degisiklikler.items():
+            if veri is None:
+                satislar.pop(satis_id, None)
+            else:
+                satislar[satis_id] = veri
+        _veri_surumu += 1
+        
+        try:
+            local_mirror.kaydet(degisiklikler)
+        except Exception as e:
+            print(f"[HATA] Yerel ayna yazma hatasi: {e}")
+
+
+def _anahtarlari_karsilastir():
+    """Sunucudaki anahtar listesiyle karşılaştırıp silinen/eksik kayıtları düzeltir"""
+    response = _istek("GET", "satislar", params={"shallow": "true"})
+    if response.status_code != 200:
+        return False
+    
+    sunucu = set((response.json() or {}).keys())
+    yerel = set(_yerel_yukle())
+    
+    degisiklikler = {satis_id: None for satis_id in yerel - sunucu}
+    eksik = sunucu - yerel
+    
+    if len(eksik) > TOPLU_EKSIK_ESIGI:
+        for sayfa in _sayfalar("satislar", baslangic=min(eksik)):
+            degisiklikler.update({k: v for k, v in sayfa if k in eksik and v})
+    else:
+        for satis_id in eksik:
+            response = _istek("GET", f"satislar/{satis_id}")
+            if response.status_code == 200 and response.json():
+                degisiklikler[satis_id] = response.json()
+    
+    _yerel_uygula(degisiklikler, sunucudan=True)
+    local_mirror.meta_yaz("son_silme_kontrolu", time.time())
+    return True
+
+
+def _degisim_sorgusu(params):
+    """orderBy="degisim" sorgusu; dizin tanımlı değilse (400) None döner"""
+    global _degisim_uyarisi
+    response = _istek("GET", "satislar", params=dict(params, orderBy='"degisim"'))
+    if response.status_code == 400:
+        if not _degisim_uyarisi:
+            _degisim_uyarisi = True
+            print("[UYARI] degisim dizini tanimli degil, duzenlemeler cekilemiyor "
+                  "(kurallar icin: python database.py kurallar)")
+        return None
+    if response.status_code != 200:
+        raise requests.exceptions.HTTPError(f"HTTP {response.status_code}: satislar (degisim)")
+    return response.json() or {}
+
+
+def _degisim_degeri(kayit):
+    degisim = kayit.get("degisim") if isinstance(kayit, dict) else None
+    return degisim if isinstance(degisim, (int, float)) else 0
+
+
+def _son_degisim():
+    """Sunucudaki en büyük degisim değeri (hiç yoksa 0)"""
+    sonuc = _degisim_sorgusu({"limitToLast": 1})
+    return max((_degisim_degeri(v) for v in (sonuc or {}).values()), default=0)
+
+
+def _degisiklikleri_cek(imlec, sayfa_boyutu=SAYFA_BOYUTU):
+    """
+    degisim değeri imleçten büyük kayıtları sayfa sayfa çekip aynaya uygular.
+    Aynı milisaniyede yazılmış (ör. tek PATCH'lik göç yığını) kayıtlar sayfaya
+    sığmazsa o değer equalTo ile bütün olarak alınır. Yeni imleci döndürür.
+    """
+    satislar = _yerel_yukle()
+    alt = imlec + 1
+    while True:
+        sonuc = _degisim_sorgusu({"startAt": alt, "limitToFirst": sayfa_boyutu})
+        if sonuc is None:
+            return imlec
+        sayfa = sorted(sonuc.items(), key=lambda kv: (_degisim_degeri(kv[1]), kv[0]))
+        if len(sayfa) >= sayfa_boyutu and _degisim_degeri(sayfa[0][1]) == _degisim_degeri(sayfa[-1][1]):
+            sayfa = sorted((_degisim_sorgusu({"equalTo": _degisim_degeri(sayfa[0][1])}) or {}).items())
+        
+        if sayfa:
+            _yerel_uygula({k: v for k, v in sayfa if v and satislar.get(k) != v}, sunucudan=True)
+            imlec = max(imlec, max(_degisim_degeri(v) for _, v in sayfa))
+            local_mirror.meta_yaz("son_degisim", imlec)
+        if len(sayfa) < sayfa_boyutu:
+            return imlec
+        # Son değerdeki kayıtların hepsi sayfaya sığmamış olabilir; o değerden yeniden başlanır
+        alt = imlec if imlec > alt else imlec + 1
+
+
+@_sure_olc
+def satislari_senkronize(zorla=False, silme_kontrolu=None):
+    """
+    Yerel aynayı Firebase ile eşitler.
+    Yalnızca son senkron noktasından sonra eklenen veya değişen kayıtlar indirilir.
+    Başarılıysa True, ağ hatasında False döner (ayna olduğu gibi kalır).
+    """
+    global _son_senkron
+    with _senkron_kilidi:
+        if not zorla and time.monotonic() - _son_senkron < MIN_SENKRON_ARALIGI:
+            return True
+        
+        satislar = _yerel_yukle()
+        try:
+            # İmleç her sayfadan sonra ilerler; yarıda kalan ilk indirme kaldığı yerden sürer
+            imlec = local_mirror.meta_oku("son_anahtar")
+            degisim = local_mirror.meta_oku("son_degisim")
+            if degisim is None:
+                # İlk senkron (veya degisim imleci olmayan eski ayna): değişim imleci
+                # taramadan önce alınır, anahtar taraması baştan yapılır; böylece
+                # tarama sırasında ve öncesinde düzenlenen kayıtlar kaçmaz
+                degisim = _son_degisim()
+                local_mirror.meta_yaz("son_degisim", degisim)
+                imlec = None
+            
+            for sayfa in _sayfalar("satislar", baslangic=imlec):
+                _yerel_uygula({k: v for k, v in sayfa if v and satislar.get(k) != v}, sunucudan=True)
+                local_mirror.meta_yaz("son_anahtar", sayfa[-1][0])
+            local_mirror.meta_yaz("tam_senkron", 1)
+            _degisiklikleri_cek(int(float(degisim)))
+            
+            if silme_kontrolu is None:
+                son_kontrol = float(local_mirror.meta_oku("son_silme_kontrolu", 0))
+                silme_kontrolu = time.time() - son_kontrol > SILME_KONTROL_ARALIGI
+            if silme_kontrolu:
+                _anahtarlari_karsilastir()
+            
+            _son_senkron = time.monotonic()
+            return True
+        except Exception as e:
+            print(f"[HATA] Senkron hatasi: {e}")
+            return False
+
+
+def yerel_aynayi_sifirla():
+    """Aynayı boşaltır; sonraki senkron tüm satışları yeniden indirir"""
+    global _satislar, _veri_surumu, _son_senkron
+    with _senkron_kilidi, _veri_kilidi:
+        local_mirror.temizle()
+        _satislar = {}
+        _veri_surumu += 1
+        _son_senkron = 0
+    _ayarlari_bayatlat()
+
+
+def _tarih_ts(tarih):
+    """'DD-MM-YYYY HH:MM:SS' (veya YYYY-MM-DD) yerel tarihini epoch milisaniyeye çevirir"""
+    try:
+        gun_kismi, _, saat_kismi = tarih.strip().partition(' ')
+        parts = [int(p) for p in gun_kismi.split('-')]
+        if len(str(parts[0])) == 4:  # YYYY-MM-DD
+            yil, ay, gun = parts
+        else:  # DD-MM-YYYY
+            gun, ay, yil = parts
+        saat = [int(p) for p in saat_kismi.split(':')] if saat_kismi else []
+        saat += [0] * (3 - len(saat))
+        return int(datetime(yil, ay, gun, *saat[:3]).timestamp() * 1000)
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+_hazir_kayitlar = {}    # satis_id -> (ham kayıt, hazırlanmış kayıt)
+
+
+def _satis_hazirla(satis_id, satis_data):
+    """
+    Ham kaydı okuma biçimine çevirir: id, sayısal ts (epoch ms) ve
+    önceden ayrıştırılmış yil / ay alanları eklenir.
+    Aynı ham kayıt için sonuç önbellekten döner.
+    """
+    onceki = _hazir_kayitlar.get(satis_id)
+    if onceki and onceki[0] is satis_data:
+        return onceki[1]
+    
+    ts = satis_data.get('ts')
+    if not isinstance(ts, (int, float)):
+        ts = _tarih_ts(satis_data.get('tarih', ''))
+    
+    kayit = dict(satis_data, id=satis_id, ts=ts or 0, yil=None, ay=None)
+    if ts:
+        zaman = datetime.fromtimestamp(ts / 1000)
+        kayit['yil'], kayit['ay'] = zaman.year, zaman.month
+    
+    _hazir_kayitlar[satis_id] = (satis_data, kayit)
+    return kayit
+
+
+@_sure_olc
+def _sirali_satislar():
+    """Bellekteki satışları tarihe göre sıralı liste olarak döndürür (sürüm bazlı önbellekli)"""
+    global _sirali_onbellek
+    with _veri_kilidi:
+        surum, liste = _sirali_onbellek
+        if surum != _veri_surumu:
+            satislar = _yerel_yukle()
+            for satis_id in list(_hazir_kayitlar):
+                if satis_id not in satislar:
+                    del _hazir_kayitlar[satis_id]
+            
+            liste = [
+                _satis_hazirla(satis_id, satis_data)
+                for satis_id, satis_data in satislar.items()
+                if satis_data  # None olmayan kayıtlar
+            ]
+            
+            # Zamana göre sırala (en yeni en üstte)
+            liste.sort(key=lambda x: (x['ts'], x['id']), reverse=True)
+            _sirali_onbellek = (_veri_surumu, liste)
+        return list(liste)
+
+
+# ==================== GERÇEK ZAMANLI DİNLEYİCİ ====================
+# Firebase REST streaming (text/event-stream) ile satislar ve ayarlar
+# düğümleri dinlenir. Gelen put/patch olayları bellekteki önbelleğe ve
+# yerel aynaya uygulanır, ardından abonelere haber verilir. Bağlantı koparsa
+# geri çekilmeyle yeniden bağlanılır ve son anahtardan devam edilir.
+# satislar akışı yalnızca son anahtardan sonrasını izler; daha eski kayıtların
+# düzenlenmesi ve silinmesi akış açıkken periyodik artımlı senkronla yakalanır.
+
+DINLEYICI_OKUMA_ZAMAN_ASIMI = 75    # sn: sunucu 30 sn'de bir keep-alive gönderir
+DINLEYICI_GERI_CEKILME_UST = 60     # sn: yeniden bağlanma beklemesi üst sınırı
+DINLEYICI_KANALLARI = ("satislar", "ayarlar")
+CANLI_MUTABAKAT_ARALIGI = SILME_KONTROL_ARALIGI  # sn: akış açıkken senkron sıklığı
+
+_aboneler = {}                      # kanal -> [callback]
+_abone_kilidi = threading.Lock()
+_dinleyici_threadleri = {}
+_dinleyici_durdur = threading.Event()
+_dinleyici_uyandir = threading.Event()  # Geri çekilme beklemesini erken bitirir
+_canli_kanallar = set()
+
+
+def abone_ol(kanal, callback):
+    """Kanal ("satislar" / "ayarlar") değiştiğinde callback(kanal) çağrılır (dinleyici thread'inden)"""
+    with _abone_kilidi:
+        _aboneler.setdefault(kanal, []).append(callback)
+
+
+def abonelikten_cik(kanal, callback):
+    """Aboneliği kaldırır"""
+    with _abone_kilidi:
+        if callback in _aboneler.get(kanal, []):
+            _aboneler[kanal].remove(callback)
+
+
+def _bildir(kanal):
+    """Kanal abonelerine değişikliği bildirir"""
+    with _abone_kilidi:
+        callbacks = list(_aboneler.get(kanal, []))
+    for callback in callbacks:
+        try:
+            callback(kanal)
+        except Exception as e:
+            print(f"[HATA] Abone bildirimi hatasi: {e}")
+
+
+def dinleyici_canli(kanal="satislar"):
+    """Kanal için akış bağlantısı açık ve güncel mi?"""
+    return kanal in _canli_kanallar
+
+
+def _akis_satirlari(response):
+    """
+    Akışı satır satır okur. Gelen her bayt hemen işlenir; iter_lines'ın
+    varsayılan 512 baytlık okuması chunked olmayan akışta olayı bekletir,
+    küçük parçayla da CRLF'yi boş satır (olay sonu) sanar.
+    """
+    tampon = bytearray()
+    for bayt in response.iter_content(chunk_size=1):
+        if bayt == b"\n":
+            if tampon.endswith(b"\r"):
+                del tampon[-1]
+            yield tampon.decode("utf-8")
+            tampon.clear()
+        else:
+            tampon += bayt
+
+
+def _sse_olaylari(response):
+    """text/event-stream yanıtını (olay, veri) çiftlerine ayırır"""
+    olay, veri_satirlari = None, []
+    for satir in _akis_satirlari(response):
+        if _dinleyici_durdur.is_set():
+            return
+        if not satir:
+            if olay:
+                yield olay, "\n".join(veri_satirlari)
+            olay, veri_satirlari = None, []
+            continue
+        if satir.startswith(":"):
+            continue
+        alan, _, deger = satir.partition(":")
+        if deger.startswith(" "):
+            deger = deger[1:]
+        if alan == "event":
+            olay = deger
+        elif alan == "data":
+            veri_satirlari.append(deger)
+
+
+def _yol_uygula(kayit, parcalar, deger):
+    """İç içe sözlükte parcalar yolundaki değeri ayarlar (None = sil)"""
+    hedef = kayit
+    for parca in parcalar[:-1]:
+        if not isinstance(hedef.get(parca), dict):
+            hedef[parca] = {}
+        hedef = hedef[parca]
+    if deger is None:
+        hedef.pop(parcalar[-1], None)
+    else:
+        hedef[parcalar[-1]] = deger
+
+
+def _olay_degisiklikleri(olay, yol, data, mevcut):
+    """
+    put/patch olayını kök düğüm altındaki çocuk -> yeni değer sözlüğüne çevirir.
+    mevcut: çocuk anahtarı -> şu anki değer (alan güncellemeleri için)
+    """
+    parcalar = [p for p in yol.split("/") if p]
+    if olay == "patch":
+        # patch: data içindeki her anahtar yola göre ayrı bir put gibidir
+        girdiler = [(parcalar + [p for p in k.split("/") if p], v) for k, v in (data or {}).items()]
+    elif parcalar:
+        girdiler = [(parcalar, data)]
+    else:
+        # Kök put: sorgu penceresindeki çocukların tamamı
+        return dict(data) if isinstance(data, dict) else {}
+    
+    degisiklikler = {}
+    for girdi_yolu, deger in girdiler:
+        cocuk = girdi_yolu[0]
+        if len(girdi_yolu) == 1:
+            degisiklikler[cocuk] = deger
+            continue
+        kayit = degisiklikler.get(cocuk, mevcut.get(cocuk))
+        kayit = copy.deepcopy(kayit) if isinstance(kayit, dict) else {}
+        _yol_uygula(kayit, girdi_yolu[1:], deger)
+        degisiklikler[cocuk] = kayit or None
+    return degisiklikler
+
+
+def _satis_olayini_uygula(olay, yol, data):
+    """satislar akışındaki olayı önbelleğe ve aynaya uygular"""
+    satislar = _yerel_yukle()
+    with _veri_kilidi:
+        degisiklikler = _olay_degisiklikleri(olay, yol, data, satislar)
+        degisiklikler = {k: v for k, v in degisiklikler.items() if satislar.get(k) != v}
+        _yerel_uygula(degisiklikler, sunucudan=True)
+    
+    yeni_anahtarlar = [k for k, v in degisiklikler.items() if v is not None]
+    if yeni_anahtarlar:
+        imlec = local_mirror.meta_oku("son_anahtar")
+        en_buyuk = max(yeni_anahtarlar)
+        if not imlec or en_buyuk > imlec:
+            local_mirror.meta_yaz("son_anahtar", en_buyuk)
+    return bool(degisiklikler)
+
+
+def _ayar_olayini_uygula(olay, yol, data):
+    """ayarlar akışındaki olayı bellekteki ayar önbelleğine uygular"""
+    parcalar = [p for p in yol.split("/") if p]
+    if olay == "put" and not parcalar:
+        _ayarlari_kaydet(data if isinstance(data, dict) else {})
+        return True
+    
+    ayarlar = dict(_ayarlar_onbellek or {})
+    ayarlar.update(_olay_degisiklikleri(olay, yol, data, ayarlar))
+    _ayarlari_kaydet({k: v for k, v in ayarlar.items() if v is not None})
+    return True
+
+
+def _dinleyici_dongusu(kanal):
+    """Tek kanal için akışı açık tutar; koparsa geri çekilmeyle yeniden bağlanır"""
+    oturum = requests.Session()  # Uzun ömürlü bağlantı havuzu meşgul etmesin
+    deneme = 0
+    
+    while not _dinleyici_durdur.is_set():
+        params = None
+        try:
+            if not cevrimici():
+                raise CevrimdisiHatasi("cevrimdisi")
+            if kanal == "satislar":
+                # Devam: önce kaçırılanları artımlı çek, sonra son anahtardan dinle.
+                # Yeniden bağlanırken kopukluk sırasındaki silmeler de yakalanır.
+                satislari_senkronize(zorla=True, silme_kontrolu=True if deneme else None)
+                imlec = local_mirror.meta_oku("son_anahtar")
+                if imlec:
+                    params = {"orderBy": '"$key"', "startAt": json.dumps(imlec)}
+            
+            response = oturum.get(
+                f"{FIREBASE_DATABASE_URL}/{kanal}.json",
+                params=params,
+                headers={"Accept": "text/event-stream"},
+                stream=True,
+                timeout=(HTTP_BAGLANTI_ZAMAN_ASIMI, DINLEYICI_OKUMA_ZAMAN_ASIMI)
+            )
+            if response.status_code != 200:
+                raise requests.exceptions.HTTPError(f"HTTP {response.status_code}")
+            _devre_basarili()
+            
+            uygula = _satis_olayini_uygula if kanal == "satislar" else _ayar_olayini_uygula
+            with response:
+                for olay, veri in _sse_olaylari(response):
+                    if olay in ("put", "patch"):
+                        govde = json.loads(veri)
+                        degisti = uygula(olay, govde.get("path", "/"), govde.get("data"))
+                        if kanal not in _canli_kanallar:
+                            _canli_kanallar.add(kanal)
+                            deneme = 0
+                            degisti = True
+                        if degisti:
+                            _bildir(kanal)
+                    elif olay in ("cancel", "auth_revoked"):
+                        print(f"[UYARI] Dinleyici kapatildi ({kanal}): {olay}")
+                        break
+        except CevrimdisiHatasi:
+            pass    # Bağlantı gelince _dinleyici_uyandir ile erken denenir
+        except Exception as e:
+            if not _dinleyici_durdur.is_set():
+                print(f"[HATA] Dinleyici baglantisi koptu ({kanal}): {e}")
+        
+        if kanal in _canli_kanallar:
+            _canli_kanallar.discard(kanal)
+            _bildir(kanal)  # Aboneler yoklamaya geri dönebilsin
+        deneme += 1
+        bekleme = min(DINLEYICI_GERI_CEKILME_UST, 2 ** min(deneme, 6))
+        _dinleyici_uyandir.wait(bekleme * random.uniform(0.5, 1.0))
+        _dinleyici_uyandir.clear()
+    
+    oturum.close()
+
+
+def _mutabakat_dongusu():
+    """
+    Akış açıkken belirli aralıklarla artımlı senkron yapar (degisim imleci ve
+    anahtar karşılaştırması); akışın penceresi dışındaki değişiklikler böylece gelir.
+    """
+    while not _dinleyici_durdur.wait(CANLI_MUTABAKAT_ARALIGI):
+        if not dinleyici_canli("satislar"):
+            continue    # Akış kapalıyken okuma yolları senkronu kendisi yapar
+        surum = _veri_surumu
+        if satislari_senkronize(zorla=True, silme_kontrolu=True) and _veri_surumu != surum:
+            _bildir("satislar")
+
+
+def dinleyiciyi_baslat():
+    """satislar ve ayarlar için arka plan dinleyicilerini başlatır (tekrar çağrılabilir)"""
+    _dinleyici_durdur.clear()
+    hedefler = [(kanal, _dinleyici_dongusu, (kanal,)) for kanal in DINLEYICI_KANALLARI]
+    hedefler.append(("mutabakat", _mutabakat_dongusu, ()))
+    for ad, hedef, args in hedefler:
+        thread = _dinleyici_threadleri.get(ad)
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=hedef, args=args, daemon=True)
+            _dinleyici_threadleri[ad] = thread
+            thread.start()
+
+
+def dinleyiciyi_durdur():
+    """Dinleyicileri durdurur (açık akış bir sonraki olayda kapanır)"""
+    _dinleyici_durdur.set()
+    _dinleyici_uyandir.set()
+    _canli_kanallar.clear()
+
+
+# ==================== İSTEMCİ TARAFLI PUSH ID ====================
+# Firebase push ID algoritması: 8 karakter zaman + 12 karakter rastgele.
+# ID'yi istemci ürettiği için yazmalar tekrar denense de aynı kayda gider.
+
+_PUSH_KARAKTERLERI = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+_son_push_zamani = 0
+_son_push_rastgele = [0] * 12
+_push_kilidi = threading.Lock()
+
+
+def _push_zaman_kismi(ms):
+    """Milisaniye zamanını push ID'nin 8 karakterlik zaman önekine çevirir"""
+    karakterler = []
+    for _ in range(8):
+        karakterler.append(_PUSH_KARAKTERLERI[ms % 64])
+        ms //= 64
+    return "".join(reversed(karakterler))
+
+
+def _push_id_uret():
+    """Zamana göre sıralanabilir, benzersiz bir Firebase push ID üretir"""
+    global _son_push_zamani
+    with _push_kilidi:
+        simdi = int(time.time() * 1000)
+        if simdi <= _son_push_zamani:
+            # Aynı milisaniye (veya saat geri gitti): rastgele kısmı bir artır
+            simdi = _son_push_zamani
+            for i in range(11, -1, -1):
+                if _son_push_rastgele[i] != 63:
+                    _son_push_rastgele[i] += 1
+                    break
+                _son_push_rastgele[i] = 0
+        else:
+            _son_push_zamani = simdi
+            for i in range(12):
+                _son_push_rastgele[i] = random.randrange(64)
+        
+        return _push_zaman_kismi(simdi) + "".join(_PUSH_KARAKTERLERI[i] for i in _son_push_rastgele)
+
+
+# ==================== ÇEVRİMDIŞI YAZMA KUYRUĞU ====================
+# Satış ekleme/silme ve ayar güncellemeleri önce yerel SQLite kuyruğuna
+# (write-ahead log) yazılır ve UI hemen döner. Arka plandaki aktarıcı
+# bekleyen işlemleri boyut sınırlı çok yollu PATCH yığınlarıyla gönderir.
+# ID'ler istemcide üretildiği için tekrar gönderim aynı kayda yazar.
+
+AKTARIM_YIGIN_ISLEM = 200           # Bir PATCH'e alınacak en fazla işlem
+AKTARIM_YIGIN_BAYT = 256 * 1024     # Bir PATCH gövdesinin üst sınırı
+AKTARIM_GERI_CEKILME_UST = 60       # sn: ağ hatasında bekleme üst sınırı
+
+_aktarim_olayi = threading.Event()
+_aktarici_thread = None
+_aktarici_kilidi = threading.Lock()
+_aktarim_kilidi = threading.Lock()  # Yığın gönderimi sürerken kuyruk atılmasın
+_bekleyen_idler = None              # Kuyrukta işlemi olan satış id'leri
+
+
+def _islem_satis_idleri(guncelleme):
+    """Güncellemenin dokunduğu satış id'lerini döndürür"""
+    idler = set()
+    for yol in guncelleme:
+        parcalar = yol.split("/")
+        if parcalar[0] == "satislar" and len(parcalar) > 1:
+            idler.add(parcalar[1])
+    return idler
+
+
+def _bekleyen_idleri_hesapla():
+    """Kuyruktaki tüm işlemlerin dokunduğu satış id'leri"""
+    idler = set()
+    for _, guncelleme in local_mirror.bekleyen_islemler():
+        idler |= _islem_satis_idleri(guncelleme)
+    return idler
+
+
+def _bekleyen_idleri_getir():
+    """Sunucuya henüz yazılmamış satış id'leri (sunucudan gelen eski hali bunları ezmez)"""
+    global _bekleyen_idler
+    if _bekleyen_idler is None:
+        with _veri_kilidi:
+            if _bekleyen_idler is None:
+                _bekleyen_idler = _bekleyen_idleri_hesapla()
+    return _bekleyen_idler
+
+
+def _bekleyen_ayarlar():
+    """Kuyrukta bekleyen ayar değerleri"""
+    ayarlar = {}
+    for _, guncelleme in local_mirror.bekleyen_islemler():
+        for yol, deger in guncelleme.items():
+            if yol.startswith("ayarlar/"):
+                ayarlar[yol[len("ayarlar/"):]] = deger
+    return ayarlar
+
+
+def bekleyen_islem_sayisi():
+    """Sunucuya gönderilmeyi bekleyen işlem sayısı"""
+    return local_mirror.bekleyen_sayisi()
+
+
+def _islem_kuyruga_al(guncelleme):
+    """Çok yollu güncellemeyi kalıcı kuyruğa yazar ve aktarıcıyı uyandırır"""
+    with _veri_kilidi:
+        local_mirror.islem_ekle(guncelleme)
+        _bekleyen_idleri_getir().update(_islem_satis_idleri(guncelleme))
+    aktariciyi_baslat()
+    _bildir("bekleyen")
+
+
+def _yigin_olustur(islemler):
+    """Kuyruktaki işlemleri boyut sınırlı, yolları çakışmayan tek bir PATCH'te birleştirir"""
+    birlesik = {}
+    atalar = set()      # Yığındaki yolların üst yolları
+    siralar = []
+    boyut = 0
+    
+    for sira, guncelleme in islemler:
+        onekler = set()
+        cakisma = False
+        for yol in guncelleme:
+            parcalar = yol.split("/")
+            yol_onekleri = {"/".join(parcalar[:i]) for i in range(1, len(parcalar))}
+            # Aynı yol üzerine yazılabilir; ata/torun yollar aynı PATCH'te olamaz
+            if yol in atalar or yol_onekleri & birlesik.keys():
+                cakisma = True
+            onekler |= yol_onekleri
+        
+        ek_boyut = len(json.dumps(guncelleme, ensure_ascii=False).encode("utf-8"))
+        if siralar and (cakisma or boyut + ek_boyut > AKTARIM_YIGIN_BAYT):
+            break
+        
+        birlesik.update(guncelleme)
+        atalar |= onekler
+        siralar.append(sira)
+        boyut += ek_boyut
+    
+    return siralar, birlesik
+
+
+def _islemler_tamamlandi(siralar, guncelleme):
+    """Sunucuya yazılan işlemleri kuyruktan çıkarır"""
+    global _bekleyen_idler
+    with _veri_kilidi:
+        local_mirror.islemleri_sil(siralar)
+        _bekleyen_idler = _bekleyen_idleri_hesapla()
+    
+    if any(yol.startswith("ozet/") for yol in guncelleme):
+        ozet_katla()
+    _bildir("bekleyen")
+
+
+def _yigin_aktar():
+    """
+    Kuyruğun başındaki yığını gönderir.
+    Kuyruk boşsa None, ilerleme olduysa True, ağ hatasında False döner.
+    """
+    islemler = local_mirror.bekleyen_islemler(AKTARIM_YIGIN_ISLEM)
+    if not islemler:
+        return None
+    
+    siralar, guncelleme = _yigin_olustur(islemler)
+    try:
+        response = _istek("PATCH", "", data=guncelleme, zaman_asimi=15)
+    except Exception as e:
+        print(f"[HATA] Kuyruk aktarim hatasi: {e}")
+        return False
+    
+    if response.status_code == 200:
+        _islemler_tamamlandi(siralar, guncelleme)
+        return True
+    
+    if 400 <= response.status_code < 500:
+        # Kalıcı hata: işlemleri tek tek gönder, reddedileni kuyruktan çıkar
+        for sira, tek in islemler[:len(siralar)]:
+            try:
+                tek_yanit = _istek("PATCH", "", data=tek, zaman_asimi=15)
+            except Exception:
+                break
+            if tek_yanit.status_code != 200 and not 400 <= tek_yanit.status_code < 500:
+                break
+            if tek_yanit.status_code != 200:
+                print(f"[HATA] Islem reddedildi (HTTP {tek_yanit.status_code}), kuyruktan cikarildi: {list(tek)}")
+            _islemler_tamamlandi([sira], tek)
+        return True
+    return False
+
+
+def _aktarici_dongusu():
+    """Kuyruğu boşaltan arka plan döngüsü"""
+    deneme = 0
+    while True:
+        _aktarim_olayi.wait(timeout=30)
+        _aktarim_olayi.clear()
+        
+        while True:
+            with _aktarim_kilidi:
+                ilerledi = _yigin_aktar()
+            if ilerledi is None:
+                deneme = 0
+                break
+            if ilerledi:
+                deneme = 0
+                continue
+            
+            # Ağ hatası: geri çekilip tekrar dene (yeni işlem gelirse erken uyanır)
+            deneme += 1
+            bekleme = min(AKTARIM_GERI_CEKILME_UST, 2 ** min(deneme, 6))
+            _aktarim_olayi.wait(bekleme * random.uniform(0.5, 1.0))
+            _aktarim_olayi.clear()
+
+
+def bekleyen_islemleri_at():
+    """
+    Sunucuya henüz gönderilmemiş işlemleri atar, sayısını döndürür.
+    Geri yüklemeden önce çağrılır: eski yazımlar geri yüklenen verinin üstüne
+    yazılmasın. Süren bir yığın gönderimi varsa bitmesi beklenir.
+    """
+    global _bekleyen_idler
+    with _aktarim_kilidi, _veri_kilidi:
+        adet = local_mirror.bekleyen_sayisi()
+        local_mirror.islemleri_temizle()
+        _bekleyen_idler = set()
+    _bildir("bekleyen")
+    return adet
+
+
+def aktariciyi_baslat():
+    """Kuyruk aktarıcısını başlatır (çalışıyorsa uyandırır)"""
+    global _aktarici_thread
+    with _aktarici_kilidi:
+        if _aktarici_thread is None or not _aktarici_thread.is_alive():
+            _aktarici_thread = threading.Thread(target=_aktarici_dongusu, daemon=True)
+            _aktarici_thread.start()
+    _aktarim_olayi.set()
 
 
 def satis_ekle(firma_adi, malzeme_gideri, toplam_satis_tutari, satis_suresi_gun, 
                kira_gideri, uzerine_kar, net_kar, kar_yuzdesi, notlar='', ulke='TR'):
     """Yeni satış kaydı ekler"""
+    simdi = datetime.now()
     yeni_satis = {
         "firma_adi": firma_adi,
+        "firma_key": _firma_anahtari(firma_adi),   # firma_key dizini ile firma sorgusu için
         "malzeme_gideri": malzeme_gideri,
         "toplam_satis_tutari": toplam_satis_tutari,
         "satis_suresi_gun": satis_suresi_gun,
@@ -188,154 +1434,694 @@ def satis_ekle(firma_adi, malzeme_gideri, toplam_satis_tutari, satis_suresi_gun,
         "kar_yuzdesi": kar_yuzdesi,
         "notlar": notlar,
         "ulke": ulke,
-        "tarih": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
+        "tarih": simdi.strftime("%d-%m-%Y %H:%M:%S"),
+        "ts": int(simdi.timestamp() * 1000)
     }
     
-    satis_id = firebase_push("satislar", yeni_satis)
-    if satis_id:
-        print(f"[OK] Satis eklendi: {satis_id}")
+    # Satış ve özet farkı tek atomik çok yollu PATCH olarak kuyruğa yazılır;
+    # ts sunucuda sunucu saatiyle yazılır, yerel kopyada istemci saati kullanılır
+    satis_id = _push_id_uret()
+    try:
+        _islem_kuyruga_al({
+            f"satislar/{satis_id}": degisim_damgali(dict(yeni_satis, ts=SUNUCU_ZAMANI)),
+            f"ozet/bekleyen/ekle_{satis_id}": _ozet_farki(yeni_satis, 1)
+        })
+    except Exception as e:
+        print(f"[HATA] Satis kuyruga yazilamadi: {e}")
+        return None
+    
+    _yerel_uygula({satis_id: yeni_satis})
+    print(f"[OK] Satis eklendi: {satis_id}")
     return satis_id
 
 
-def tum_satislari_getir():
-    """Tüm satış kayıtlarını getirir"""
-    satislar = firebase_get("satislar")
+@_sure_olc
+def tum_satislari_getir(senkronize=True):
+    """
+    Tüm satış kayıtlarını getirir.
+    Okuma yerel aynadan yapılır; senkronize=False ise ağa hiç gidilmez.
+    """
+    # Dinleyici açıksa önbellek zaten güncel; ağa gitmeye gerek yok
+    if senkronize and not dinleyici_canli("satislar"):
+        satislari_senkronize()
+    return _sirali_satislar()
+
+
+def satis_sil(satis_id):
+    """Satış kaydını siler"""
+    satis = _yerel_yukle().get(satis_id) or firebase_get(f"satislar/{satis_id}")
     
-    if not satislar:
-        return []
+    guncelleme = {f"satislar/{satis_id}": None}
+    if satis:
+        guncelleme[f"ozet/bekleyen/sil_{satis_id}"] = _ozet_farki(satis, -1)
     
-    satis_listesi = []
-    for satis_id, satis_data in satislar.items():
-        if satis_data:  # None olmayan kayıtlar
-            satis_data['id'] = satis_id
-            satis_listesi.append(satis_data)
+    try:
+        _islem_kuyruga_al(guncelleme)
+    except Exception as e:
+        print(f"[HATA] Silme kuyruga yazilamadi: {e}")
+        return False
     
-    # Tarihe göre sırala (en yeni en üstte)
-    satis_listesi.sort(key=lambda x: x.get('tarih', ''), reverse=True)
-    return satis_listesi
+    _yerel_uygula({satis_id: None})
+    print(f"[OK] Satis silindi: {satis_id}")
+    return True
 
 
-def satis_sil(satis_id):
-    """Satış kaydını siler"""
-    if firebase_delete(f"satislar/{satis_id}"):
-        print(f"[OK] Satis silindi: {satis_id}")
-        return True
-    return False
+# ==================== TARİH ARALIĞI SORGULARI ====================
+# Yerel ayna hazırsa bellekteki ts dizini üzerinde ikili arama yapılır;
+# ayna henüz hiç indirilmemişse sunucuda orderBy="ts" ile yalnızca istenen
+# pencere çekilir. Her iki yolda da iş, pencere boyutuyla orantılıdır.
+# ts alanı olmayan eski kayıtlar sunucu dizininde görünmez; ts göçü
+# tamamlanmadıysa ayna doldurulur ve aralık tarih alanından hesaplanır.
+
+TS_GOC_SURUMU = 1
+TS_GOC_YOLU = "gocler/ts"
 
+_ts_indeksi = (None, [], [])    # (veri_surumu, artan ts listesi, kayıtlar)
+
+
+def _ts_degeri(zaman):
+    """datetime veya epoch ms değerini epoch ms'ye çevirir"""
+    if zaman is None:
+        return None
+    if isinstance(zaman, datetime):
+        return int(zaman.timestamp() * 1000)
+    return int(zaman)
 
-def istatistikleri_getir():
-    """Genel istatistikleri hesaplar"""
-    satislar = tum_satislari_getir()
+
+def _ayna_hazir():
+    """Yerel ayna en az bir kez tam olarak senkronize edildi mi?"""
+    return dinleyici_canli("satislar") or local_mirror.meta_oku("tam_senkron") is not None
+
+
+def _ts_indeksi_getir():
+    """(artan ts listesi, aynı sıradaki kayıtlar) çiftini döndürür (sürüm bazlı önbellekli)"""
+    global _ts_indeksi
+    with _veri_kilidi:
+        if _ts_indeksi[0] != _veri_surumu:
+            kayitlar = _sirali_satislar()
+            kayitlar.reverse()
+            _ts_indeksi = (_veri_surumu, [k['ts'] for k in kayitlar], kayitlar)
+        return _ts_indeksi[1], _ts_indeksi[2]
+
+
+def _yerel_ts_araligi(bas_ts, bit_ts):
+    """Bellekteki satışlardan ts aralığını ikili aramayla döndürür (en yeni en üstte)"""
+    zamanlar, kayitlar = _ts_indeksi_getir()
     
-    if not satislar:
-        return {
-            'toplam_satis': 0,
-            'toplam_kar': 0,
-            'ortalama_kar_yuzdesi': 0,
-            'toplam_ciro': 0
-        }
+    i = bisect_left(zamanlar, bas_ts) if bas_ts is not None else 0
+    j = bisect_right(zamanlar, bit_ts) if bit_ts is not None else len(zamanlar)
+    return kayitlar[i:j][::-1]
+
+
+def _sunucu_ts_araligi(bas_ts, bit_ts):
+    """Sunucudan ts dizini ile aralık sorgusu yapar; hata olursa None döner"""
+    params = {"orderBy": '"ts"'}
+    if bas_ts is not None:
+        params["startAt"] = bas_ts
+    if bit_ts is not None:
+        params["endAt"] = bit_ts
+    try:
+        response = _istek("GET", "satislar", params=params)
+        if response.status_code != 200:
+            return None
+        kayitlar = [_satis_hazirla(k, v) for k, v in (response.json() or {}).items() if v]
+        kayitlar.sort(key=lambda x: (x['ts'], x['id']), reverse=True)
+        return kayitlar
+    except Exception as e:
+        print(f"[HATA] Aralik sorgusu hatasi: {e}")
+        return None
+
+
+@_sure_olc
+def satislar_aralik(baslangic=None, bitis=None, firma=None, ulke=None):
+    """
+    [baslangic, bitis] aralığındaki satışları getirir (en yeni en üstte).
+    baslangic / bitis: datetime veya epoch ms (dahil); firma / ulke isteğe bağlı süzgeçtir.
+    """
+    bas_ts, bit_ts = _ts_degeri(baslangic), _ts_degeri(bitis)
     
-    toplam_satis = len(satislar)
-    toplam_kar = sum(s.get('net_kar', 0) for s in satislar)
-    toplam_ciro = sum(s.get('toplam_satis_tutari', 0) for s in satislar)
-    ortalama_kar_yuzdesi = sum(s.get('kar_yuzdesi', 0) for s in satislar) / toplam_satis if toplam_satis > 0 else 0
+    satislar = None
+    if not _ayna_hazir() and _goc_tamamlandi(TS_GOC_YOLU, TS_GOC_SURUMU):
+        satislar = _sunucu_ts_araligi(bas_ts, bit_ts)
+    elif not dinleyici_canli("satislar"):
+        # ts'siz eski kayıtlar dizinde yok: tam okuma, ts tarih alanından ayrıştırılır
+        satislari_senkronize()
+    if satislar is None:
+        satislar = _yerel_ts_araligi(bas_ts, bit_ts)
     
-    return {
-        'toplam_satis': toplam_satis,
-        'toplam_kar': toplam_kar,
-        'ortalama_kar_yuzdesi': ortalama_kar_yuzdesi,
-        'toplam_ciro': toplam_ciro
-    }
+    if firma is not None:
+        firma_key = _firma_anahtari(firma)
+        satislar = [s for s in satislar if _firma_anahtari(s.get('firma_adi')) == firma_key]
+    if ulke is not None:
+        satislar = [s for s in satislar if s.get('ulke', 'TR') == ulke]
+    return satislar
 
 
-# ==================== FİRMA YÖNETİMİ ====================
+# ==================== SAYFALI GEÇMİŞ ====================
+# Geçmiş satışlar penceresi en yeni sayfadan başlayıp geriye doğru okur.
+# Yerel ayna hazırsa sayfalar bellekteki ts dizininden kesilir; değilse
+# sunucuda orderBy="$key" + limitToLast + endAt ile yalnızca istenen sayfa
+# çekilir (push ID sırası oluşturma sırasıdır). Sunucu sayfaları kısa süre
+# bellekte tutulur; önden yüklenen sayfa kaydırma anında hazır olur.
+
+GECMIS_SAYFA_BOYUTU = 50
+GECMIS_ONBELLEK_SAYFA = 40          # Bellekte tutulan en fazla sunucu sayfası
+GECMIS_ONBELLEK_OMRU = 60           # sn: sunucu sayfası bu süreden eskiyse yeniden çekilir
+
+_sayfa_onbellek = {}                # (imleç id, adet) -> (veri_surumu, zaman, kayıtlar, devam)
+_sayfa_kilidi = threading.Lock()
+
 
-def tum_firmalari_getir():
-    """Tüm kayıtlı firmaları getirir (benzersiz firma adları)"""
-    satislar = tum_satislari_getir()
+def _yerel_sayfa(once, adet):
+    """Aynadan 'once' kaydından daha eski en fazla 'adet' satışı döndürür"""
+    zamanlar, kayitlar = _ts_indeksi_getir()
+    if once is None:
+        j = len(kayitlar)
+    else:
+        sinir = (once['ts'], once['id'])
+        j = bisect_left(zamanlar, once['ts'])
+        while j < len(kayitlar) and (kayitlar[j]['ts'], kayitlar[j]['id']) < sinir:
+            j += 1
+    i = max(0, j - adet)
+    return kayitlar[i:j][::-1], i > 0
+
+
+def _sunucu_sayfasi(once_id, adet):
+    """Sunucudan 'once_id' anahtarından önceki en fazla 'adet' satışı çeker"""
+    # endAt imleç kaydını da döndürür; bir fazlası istenip atılır
+    params = {"orderBy": '"$key"', "limitToLast": adet + (1 if once_id else 0)}
+    if once_id:
+        params["endAt"] = json.dumps(once_id)
     
-    if not satislar:
-        return []
+    # İstekten önce alınır: yanıt beklenirken aktarılan işlem iki tarafta da kaybolmaz
+    bekleyen = set(_bekleyen_idleri_getir())
+    response = _istek("GET", "satislar", params=params)
+    if response.status_code != 200:
+        raise requests.exceptions.HTTPError(f"HTTP {response.status_code}: satislar")
+    
+    sayfa = sorted((response.json() or {}).items(), reverse=True)
+    if once_id and sayfa and sayfa[0][0] == once_id:
+        sayfa = sayfa[1:]
+    devam = len(sayfa) >= adet
+    sayfa = sayfa[:adet]
+    
+    # Kuyrukta bekleyen yerel ekleme / silmeler sayfanın anahtar aralığına işlenir
+    kayitlar = dict(sayfa)
+    if bekleyen:
+        alt = sayfa[-1][0] if devam and sayfa else ""
+        yerel = _yerel_yukle()
+        for satis_id in bekleyen:
+            if satis_id >= alt and (once_id is None or satis_id < once_id):
+                kayitlar[satis_id] = yerel.get(satis_id)
+    
+    return [
+        _satis_hazirla(satis_id, kayitlar[satis_id])
+        for satis_id in sorted(kayitlar, reverse=True)
+        if kayitlar[satis_id]
+    ], devam
+
+
+@_sure_olc
+def satis_sayfasi(once=None, adet=GECMIS_SAYFA_BOYUTU, senkronize=True):
+    """
+    Geçmiş satışların bir sayfasını en yeniden eskiye döndürür: (kayıtlar, devam).
+    once: önceki sayfanın son kaydı (None = en yeni sayfa).
+    devam False ise daha eski kayıt yoktur.
+    senkronize=True ise sayfa ağdan tazelenir (ayna senkronu veya önbelleği atlayan istek).
+    """
+    if _ayna_hazir():
+        if senkronize and once is None and not dinleyici_canli("satislar"):
+            satislari_senkronize()
+        return _yerel_sayfa(once, adet)
+    
+    anahtar = (once['id'] if once else None, adet)
+    if not senkronize:
+        with _sayfa_kilidi:
+            kayit = _sayfa_onbellek.get(anahtar)
+        if kayit and kayit[0] == _veri_surumu and time.monotonic() - kayit[1] < GECMIS_ONBELLEK_OMRU:
+            return list(kayit[2]), kayit[3]
+    
+    surum = _veri_surumu
+    kayitlar, devam = _sunucu_sayfasi(anahtar[0], adet)
+    with _sayfa_kilidi:
+        _sayfa_onbellek.pop(anahtar, None)
+        _sayfa_onbellek[anahtar] = (surum, time.monotonic(), kayitlar, devam)
+        while len(_sayfa_onbellek) > GECMIS_ONBELLEK_SAYFA:
+            # Sözlük ekleme sırasını korur: en eski sayfa atılır
+            del _sayfa_onbellek[next(iter(_sayfa_onbellek))]
+    return list(kayitlar), devam
+
+
+# ==================== İSTATİSTİK MOTORU ====================
+# Tüm istatistikler satışların tek geçişte toplanmasıyla üretilir ve veri
+# sürümüne göre önbelleklenir. Aynı anlık görüntü için ikinci tarama yapılmaz.
+
+_ozet_onbellek = (None, None)   # (veri_surumu, ozet)
+_firma_indeksi = search_index.FirmaIndeksi()   # Özetle birlikte güncellenen firma arama indeksi
+
+
+def _firma_anahtari(firma_adi):
+    """Firma adını karşılaştırma anahtarına çevirir (noktalı/noktasız i tek harf)"""
+    return search_index.i_katla((firma_adi or '').strip()).lower()
+
+
+@_sure_olc
+def ozet_hesapla(satislar):
+    """
+    Hazırlanmış satış listesini (en yeni en üstte) tek geçişte toplar.
+    Genel, firma, ülke ve (yıl, ay) bazlı toplamları birlikte döndürür.
+    """
+    genel = {'toplam_satis': 0, 'toplam_ciro': 0, 'toplam_kar': 0, 'kar_yuzdesi_toplam': 0}
+    firmalar = {}           # firma_key -> firma özeti
+    firma_satislari = {}    # firma_key -> [satış]
+    firma_aylari = {}       # firma_key -> {(yıl, ay): toplamlar}
+    ulke_firmalar = {}      # ulke -> set(firma_key)
+    ulke_cirolar = {}       # ulke -> toplam ciro
+    aylar = {}              # (yıl, ay) -> toplamlar
     
-    # Firma adlarını ve istatistiklerini topla
-    firmalar = {}
     for satis in satislar:
-        firma_adi = satis.get('firma_adi', '').strip()
-        ulke = satis.get('ulke', 'TR')
+        ciro = satis.get('toplam_satis_tutari', 0)
+        kar = satis.get('net_kar', 0)
+        
+        genel['toplam_satis'] += 1
+        genel['toplam_ciro'] += ciro
+        genel['toplam_kar'] += kar
+        genel['kar_yuzdesi_toplam'] += satis.get('kar_yuzdesi', 0)
+        
+        yil_ay = (satis['yil'], satis['ay']) if satis.get('yil') else None
+        if yil_ay:
+            ay = aylar.setdefault(yil_ay, {'satis': 0, 'ciro': 0, 'kar': 0})
+            ay['satis'] += 1
+            ay['ciro'] += ciro
+            ay['kar'] += kar
         
+        firma_adi = satis.get('firma_adi', '').strip()
         if not firma_adi:
             continue
         
-        # Firma adını normalize et (büyük harfe çevir karşılaştırma için)
-        firma_key = firma_adi.lower()
+        firma_key = _firma_anahtari(firma_adi)
+        ulke = satis.get('ulke', 'TR')
         
-        if firma_key not in firmalar:
-            firmalar[firma_key] = {
-                'firma_adi': firma_adi,  # Orijinal yazım
+        firma = firmalar.get(firma_key)
+        if firma is None:
+            # İlk görülen (en yeni) kaydın yazımı ve ülkesi kullanılır
+            firma = firmalar[firma_key] = {
+                'firma_adi': firma_adi,
                 'ulke': ulke,
                 'toplam_satis': 0,
                 'toplam_ciro': 0,
-                'toplam_kar': 0
+                'toplam_kar': 0,
+                'kar_yuzdesi_toplam': 0
             }
+            firma_satislari[firma_key] = []
+            firma_aylari[firma_key] = {}
+        
+        firma['toplam_satis'] += 1
+        firma['toplam_ciro'] += ciro
+        firma['toplam_kar'] += kar
+        firma['kar_yuzdesi_toplam'] += satis.get('kar_yuzdesi', 0)
+        firma_satislari[firma_key].append(satis)
         
-        # İstatistikleri güncelle
-        firmalar[firma_key]['toplam_satis'] += 1
-        firmalar[firma_key]['toplam_ciro'] += satis.get('toplam_satis_tutari', 0)
-        firmalar[firma_key]['toplam_kar'] += satis.get('net_kar', 0)
+        if yil_ay:
+            ay = firma_aylari[firma_key].setdefault(yil_ay, {'satis': 0, 'ciro': 0, 'kar': 0})
+            ay['satis'] += 1
+            ay['ciro'] += ciro
+            ay['kar'] += kar
+        
+        ulke_firmalar.setdefault(ulke, set()).add(firma_key)
+        ulke_cirolar[ulke] = ulke_cirolar.get(ulke, 0) + ciro
     
-    # Liste olarak döndür ve satış sayısına göre sırala
-    firma_listesi = list(firmalar.values())
+    # Satış sayısına göre sıralı firma listesi (iç toplamlar hariç)
+    firma_listesi = [
+        {k: v for k, v in firma.items() if k != 'kar_yuzdesi_toplam'}
+        for firma in firmalar.values()
+    ]
     firma_listesi.sort(key=lambda x: x['toplam_satis'], reverse=True)
     
-    return firma_listesi
+    ulkeler = {
+        ulke: {'firma_sayisi': len(ulke_firmalar[ulke]), 'toplam_ciro': ulke_cirolar[ulke]}
+        for ulke in ulke_firmalar
+    }
+    
+    return {
+        'genel': genel,
+        'firmalar': firmalar,
+        'firma_listesi': firma_listesi,
+        'firma_satislari': firma_satislari,
+        'firma_aylari': firma_aylari,
+        'ulkeler': ulkeler,
+        'aylar': aylar
+    }
 
 
-def firma_ara(arama_terimi):
-    """Firma adına göre arama yapar (autocomplete için)"""
-    if not arama_terimi or len(arama_terimi) < 1:
-        return []
+def _ozet_getir(senkronize=True):
+    """Güncel anlık görüntünün toplamlarını döndürür (sürüm değişmediyse önbellekten)"""
+    global _ozet_onbellek
+    if senkronize and not dinleyici_canli("satislar"):
+        satislari_senkronize()
     
-    firmalar = tum_firmalari_getir()
-    arama = arama_terimi.lower()
+    with _veri_kilidi:
+        surum, ozet = _ozet_onbellek
+        if surum == _veri_surumu:
+            return ozet
+        surum = _veri_surumu
+        satislar = _sirali_satislar()
     
-    # Eşleşen firmaları bul
-    eslesen = []
-    for firma in firmalar:
-        if arama in firma['firma_adi'].lower():
-            eslesen.append(firma)
+    # Hesaplama kilit dışında yapılır; dinleyici bu sırada bloklanmaz
+    ozet = ozet_hesapla(satislar)
+    with _veri_kilidi:
+        guncel = _ozet_onbellek[0] is None or surum >= _ozet_onbellek[0]
+        if guncel:
+            _ozet_onbellek = (surum, ozet)
+    if guncel:
+        # Arama indeksi yalnızca değişen firmalar için güncellenir
+        _firma_indeksi.guncelle({_firma_anahtari(f['firma_adi']): f for f in ozet['firma_listesi']})
+    return ozet
+
+
+@_sure_olc
+def istatistikleri_getir(senkronize=True):
+    """Genel istatistikleri hesaplar (senkronize=False: yalnızca yerel ayna)"""
+    # Dinleyici açıksa (veya gönderilmemiş yerel işlem varsa) yerel toplamlar
+    # kullanılır; değilse sunucudaki küçük özet okunur
+    genel = None
+    if senkronize and not dinleyici_canli("satislar") and not _bekleyen_idleri_getir():
+        genel = sunucu_ozetini_getir()
+    if genel is None:
+        genel = _ozet_getir(senkronize)['genel']
+    toplam_satis = genel['toplam_satis']
     
-    # En fazla 10 öneri döndür
-    return eslesen[:10]
+    return {
+        'toplam_satis': toplam_satis,
+        'toplam_kar': genel['toplam_kar'],
+        'ortalama_kar_yuzdesi': genel['kar_yuzdesi_toplam'] / toplam_satis if toplam_satis > 0 else 0,
+        'toplam_ciro': genel['toplam_ciro']
+    }
+
+
+# ==================== SUNUCU ÖZETİ (ozet/) ====================
+# ozet/ düğümü genel, firma, ülke ve ay bazlı toplamları tutar. satis_ekle ve
+# satis_sil, satış kaydıyla birlikte aynı atomik PATCH içinde ozet/bekleyen/
+# altına bir fark kaydı yazar. Farklar ETag + if-match koşullu PUT ile ozet'e
+# katlanır ve katlanan farklar aynı yazımla silinir; araya başka bir istemci
+# girerse (412) yeniden okunup tekrar denenir. Özet henüz hiç kurulmamışsa
+# farklar biriktirilmez, özet tüm satışlardan bir kez kurulur.
+
+OZET_KATLAMA_DENEME = 5
 
 
-def firma_istatistikleri_getir(firma_adi):
-    """Belirli bir firmanın detaylı istatistiklerini getirir"""
-    satislar = tum_satislari_getir()
+def _firebase_anahtari(metin):
+    """Metni Firebase anahtarında kullanılabilir hale getirir (. $ # [ ] / %)"""
+    for karakter in "%.$#[]/":
+        metin = metin.replace(karakter, f"%{ord(karakter):02X}")
+    return metin
+
+
+def _ay_anahtari(satis):
+    """Satışın 'YYYY-MM' ay anahtarını üretir"""
+    ts = satis.get('ts')
+    if not isinstance(ts, (int, float)):
+        ts = _tarih_ts(satis.get('tarih', ''))
+    return datetime.fromtimestamp(ts / 1000).strftime("%Y-%m") if ts else None
+
+
+def _ozet_farki(satis, isaret):
+    """Bir satışın özete etkisini (isaret: +1 ekleme, -1 silme) döndürür"""
+    firma_adi = (satis.get('firma_adi') or '').strip()
+    return {
+        'isaret': isaret,
+        'firma_key': _firebase_anahtari(_firma_anahtari(firma_adi)) if firma_adi else None,
+        'firma_adi': firma_adi,
+        'ulke': satis.get('ulke', 'TR'),
+        'ay': _ay_anahtari(satis),
+        'ciro': satis.get('toplam_satis_tutari', 0),
+        'kar': satis.get('net_kar', 0),
+        'kar_yuzdesi': satis.get('kar_yuzdesi', 0)
+    }
+
+
+def _ozete_ekle(ozet, fark):
+    """Fark kaydını özet sözlüğüne uygular"""
+    isaret = fark['isaret']
+    ciro = isaret * fark.get('ciro', 0)
+    kar = isaret * fark.get('kar', 0)
+    
+    genel = ozet.setdefault('genel', {'toplam_satis': 0, 'toplam_ciro': 0, 'toplam_kar': 0, 'kar_yuzdesi_toplam': 0})
+    genel['toplam_satis'] += isaret
+    genel['toplam_ciro'] += ciro
+    genel['toplam_kar'] += kar
+    genel['kar_yuzdesi_toplam'] += isaret * fark.get('kar_yuzdesi', 0)
+    
+    if fark.get('ay'):
+        aylar = ozet.setdefault('aylar', {})
+        ay = aylar.setdefault(fark['ay'], {'satis': 0, 'ciro': 0, 'kar': 0})
+        ay['satis'] += isaret
+        ay['ciro'] += ciro
+        ay['kar'] += kar
+        if ay['satis'] <= 0:
+            del aylar[fark['ay']]
+    
+    firma_key = fark.get('firma_key')
+    if not firma_key:
+        return
+    
+    firmalar = ozet.setdefault('firmalar', {})
+    firma = firmalar.setdefault(firma_key, {
+        'firma_adi': fark['firma_adi'], 'ulke': fark['ulke'],
+        'toplam_satis': 0, 'toplam_ciro': 0, 'toplam_kar': 0, 'kar_yuzdesi_toplam': 0
+    })
+    if isaret > 0:
+        # En yeni satışın yazımı ve ülkesi geçerli olur
+        firma['firma_adi'] = fark['firma_adi']
+        firma['ulke'] = fark['ulke']
+    firma['toplam_satis'] += isaret
+    firma['toplam_ciro'] += ciro
+    firma['toplam_kar'] += kar
+    firma['kar_yuzdesi_toplam'] += isaret * fark.get('kar_yuzdesi', 0)
+    if firma['toplam_satis'] <= 0:
+        del firmalar[firma_key]
     
-    if not satislar:
+    ulkeler = ozet.setdefault('ulkeler', {})
+    ulke = ulkeler.setdefault(fark['ulke'], {'toplam_ciro': 0, 'firmalar': {}})
+    ulke['toplam_ciro'] += ciro
+    adet = ulke['firmalar'].get(firma_key, 0) + isaret
+    if adet > 0:
+        ulke['firmalar'][firma_key] = adet
+    else:
+        ulke['firmalar'].pop(firma_key, None)
+    if not ulke['firmalar']:
+        del ulkeler[fark['ulke']]
+
+
+def ozet_katla():
+    """ozet/bekleyen altındaki farkları koşullu yazma ile özete katlar"""
+    for _ in range(OZET_KATLAMA_DENEME):
+        try:
+            response = _istek("GET", "ozet", headers={"X-Firebase-ETag": "true"})
+            if response.status_code != 200:
+                return False
+            
+            ozet = response.json() or {}
+            bekleyen = ozet.pop('bekleyen', None) or {}
+            if not bekleyen:
+                return True
+            if 'surum' not in ozet:
+                # Özet hiç oluşturulmamış: farklar katlanacak bir taban olmadan
+                # sonsuza kadar birikmesin, özet satışlardan kurulur
+                return ozet_yeniden_olustur()
+            
+            for fark in bekleyen.values():
+                _ozete_ekle(ozet, fark)
+            ozet['surum'] += 1
+            
+            # bekleyen yazılan özette yok: katlanan farklar aynı koşullu PUT ile silinir.
+            # Bu arada yeni fark eklenirse ETag değişir ve 412 ile yeniden denenir.
+            response = _istek("PUT", "ozet", data=ozet, headers={"if-match": response.headers.get("ETag", "")})
+            if response.status_code == 200:
+                return True
+            if response.status_code != 412:
+                return False
+            # 412: özet başka bir istemci tarafından değişti, yeniden oku
+        except Exception as e:
+            print(f"[HATA] Ozet katlama hatasi: {e}")
+            return False
+    return False
+
+
+def _ozet_katla_arka_planda():
+    """Katlamayı UI'ı bekletmeden arka planda yapar"""
+    threading.Thread(target=ozet_katla, daemon=True).start()
+
+
+def sunucu_ozetini_getir():
+    """
+    ozet/genel ve henüz katlanmamış farkları okuyup genel toplamları döndürür.
+    Özet hiç oluşturulmamışsa veya okunamazsa None döner.
+    """
+    try:
+        response = _istek("GET", "ozet/genel")
+        if response.status_code != 200 or not response.json():
+            return None
+        ozet = {'genel': response.json()}
+        
+        response = _istek("GET", "ozet/bekleyen")
+        if response.status_code != 200:
+            return None
+        for fark in (response.json() or {}).values():
+            _ozete_ekle(ozet, dict(fark, firma_key=None, ay=None))
+        return ozet['genel']
+    except Exception as e:
+        print(f"[HATA] Ozet okuma hatasi: {e}")
         return None
+
+
+def _sunucu_ozeti_olustur(toplamlar):
+    """ozet_hesapla sonucunu ozet/ düğümü biçimine çevirir"""
+    firmalar = {}
+    ulkeler = {}
+    for firma_key, firma in toplamlar['firmalar'].items():
+        anahtar = _firebase_anahtari(firma_key)
+        firmalar[anahtar] = dict(firma)
+        for satis in toplamlar['firma_satislari'][firma_key]:
+            ulke = ulkeler.setdefault(satis.get('ulke', 'TR'), {'toplam_ciro': 0, 'firmalar': {}})
+            ulke['toplam_ciro'] += satis.get('toplam_satis_tutari', 0)
+            ulke['firmalar'][anahtar] = ulke['firmalar'].get(anahtar, 0) + 1
     
-    firma_key = firma_adi.lower()
-    firma_satislari = [s for s in satislar if s.get('firma_adi', '').lower() == firma_key]
+    return {
+        'genel': dict(toplamlar['genel']),
+        'firmalar': firmalar,
+        'ulkeler': ulkeler,
+        'aylar': {f"{yil}-{ay:02d}": dict(t) for (yil, ay), t in toplamlar['aylar'].items()}
+    }
+
+
+def ozet_yeniden_olustur():
+    """
+    ozet/ düğümünü tüm satışlardan baştan hesaplar (onarım komutu).
+    Önce özetin ETag'i alınır, sonra satışlar okunur; yazma if-match ile
+    yapıldığından arada eklenen/silinen satış varsa işlem tekrarlanır.
+    """
+    for _ in range(OZET_KATLAMA_DENEME):
+        try:
+            response = _istek("GET", "ozet", headers={"X-Firebase-ETag": "true"})
+            if response.status_code != 200:
+                return False
+            etag = response.headers.get("ETag", "")
+            surum = (response.json() or {}).get('surum', 0)
+            
+            if not satislari_senkronize(zorla=True, silme_kontrolu=True):
+                return False
+            
+            ozet = _sunucu_ozeti_olustur(_ozet_getir(senkronize=False))
+            ozet['surum'] = surum + 1
+            
+            response = _istek("PUT", "ozet", data=ozet, headers={"if-match": etag}, zaman_asimi=30)
+            if response.status_code == 200:
+                print("[OK] Ozet yeniden olusturuldu.")
+                return True
+            if response.status_code != 412:
+                return False
+        except Exception as e:
+            print(f"[HATA] Ozet olusturma hatasi: {e}")
+            return False
+    return False
+
+
+# ==================== FİRMA YÖNETİMİ ====================
+
+@_sure_olc
+def tum_firmalari_getir(senkronize=True):
+    """Tüm kayıtlı firmaları getirir (benzersiz firma adları, satış sayısına göre sıralı)"""
+    return list(_ozet_getir(senkronize)['firma_listesi'])
+
+
+@_sure_olc
+def firma_ara(arama_terimi, limit=10):
+    """
+    Firma adına göre arama yapar (autocomplete için).
+    Bellek içi önek/trigram indeksi kullanılır, arama başına ağa gidilmez.
+    """
+    if not arama_terimi or not arama_terimi.strip():
+        return []
+    
+    # İndeks özetle birlikte güncellenir; sürüm değişmediyse bu çağrı önbellekten döner
+    _ozet_getir(senkronize=False)
+    return _firma_indeksi.ara(arama_terimi, limit)
+
+
+FIRMA_KEY_SURUMU = 1        # _firma_anahtari değişince artırılır; göç yeniden gerekir
+FIRMA_KEY_GOC_YOLU = "gocler/firma_key"
+
+
+def _firma_key_dizini_hazir():
+    """firma_key göçü bu anahtar sürümüyle tamamlanmış mı? (yoksa dizin eksik sonuç verir)"""
+    return _goc_tamamlandi(FIRMA_KEY_GOC_YOLU, FIRMA_KEY_SURUMU)
+
+
+def _sunucu_firma_satislari(firma_key):
+    """
+    firma_key dizini ile yalnızca bu firmanın satışlarını çeker (id -> kayıt).
+    Dizin tanımlı değilse veya hata olursa None döner.
+    """
+    try:
+        response = _istek("GET", "satislar", params={"orderBy": '"firma_key"', "equalTo": json.dumps(firma_key)})
+        if response.status_code != 200:
+            return None
+        satislar = response.json() or {}
+    except Exception as e:
+        print(f"[HATA] Firma sorgusu hatasi: {e}")
+        return None
+    
+    # Henüz sunucuya gönderilmemiş yerel ekleme/silmeler
+    yerel = _yerel_yukle()
+    for satis_id in _bekleyen_idleri_getir():
+        kayit = yerel.get(satis_id)
+        if kayit is None:
+            satislar.pop(satis_id, None)
+        elif _firma_anahtari(kayit.get('firma_adi')) == firma_key:
+            satislar[satis_id] = kayit
+    return satislar
+
+
+@_sure_olc
+def firma_istatistikleri_getir(firma_adi, senkronize=True):
+    """
+    Belirli bir firmanın detaylı istatistiklerini getirir.
+    Yerel ayna hazırsa bellekteki özetten, değilse sunucudan firma_key
+    dizini ile yalnızca bu firmanın satışları çekilerek hesaplanır.
+    """
+    firma_key = _firma_anahtari(firma_adi)
+    
+    ozet = None
+    # Dizin ancak firma_key göçü tamamlandıysa tam sonuç verir; yoksa tam tarama
+    if senkronize and not _ayna_hazir() and _firma_key_dizini_hazir():
+        satislar = _sunucu_firma_satislari(firma_key)
+        if satislar is not None:
+            kayitlar = [_satis_hazirla(k, v) for k, v in satislar.items() if v]
+            kayitlar.sort(key=lambda x: (x['ts'], x['id']), reverse=True)
+            ozet = ozet_hesapla(kayitlar)
+    if ozet is None:
+        ozet = _ozet_getir(senkronize)
     
-    if not firma_satislari:
+    firma = ozet['firmalar'].get(firma_key)
+    if not firma:
         return None
     
     return {
         'firma_adi': firma_adi,
-        'toplam_satis': len(firma_satislari),
-        'toplam_ciro': sum(s.get('toplam_satis_tutari', 0) for s in firma_satislari),
-        'toplam_kar': sum(s.get('net_kar', 0) for s in firma_satislari),
-        'ortalama_kar_yuzdesi': sum(s.get('kar_yuzdesi', 0) for s in firma_satislari) / len(firma_satislari),
-        'satislar': firma_satislari
+        'toplam_satis': firma['toplam_satis'],
+        'toplam_ciro': firma['toplam_ciro'],
+        'toplam_kar': firma['toplam_kar'],
+        'ortalama_kar_yuzdesi': firma['kar_yuzdesi_toplam'] / firma['toplam_satis'],
+        'satislar': list(ozet['firma_satislari'][firma_key]),
+        'aylar': dict(ozet['firma_aylari'][firma_key])
     }
 
 
 def tum_verileri_yedekle():
     """Tüm Firebase verilerini JSON olarak döndürür (yedekleme için)"""
     try:
-        url = f"{FIREBASE_DATABASE_URL}/.json"
-        response = requests.get(url, timeout=10)
+        response = _istek("GET", "", zaman_asimi=10)
         if response.status_code == 200:
             return response.json()
         return None
@@ -345,47 +2131,154 @@ def tum_verileri_yedekle():
 
 
 def verileri_geri_yukle(data):
-    """JSON verilerini Firebase'e geri yükler"""
+    """
+    Yedeği Firebase'e geri yükler (tek PUT yerine doğrulanmış, parçalı PATCH'lerle).
+    data: eski biçimde sözlük veya yedek dosyası yolu; ayrıntılar backup.yedegi_geri_yukle.
+    """
+    import backup
     try:
-        url = f"{FIREBASE_DATABASE_URL}/.json"
-        response = requests.put(url, json=data, timeout=10)
-        return response.status_code == 200
+        sonuc = backup.yedegi_geri_yukle(data)
+        for satir_no, hata in sonuc['hatalar']:
+            print(f"[HATA] Yedek satir {satir_no}: {hata}")
+        return not sonuc['hatalar'] and not sonuc['iptal_edildi']
     except Exception as e:
         print(f"[HATA] Geri yukleme hatasi: {e}")
         return False
 
 
-def ulke_firma_sayisi_getir():
+@_sure_olc
+def ulke_firma_sayisi_getir(senkronize=True):
     """Her ülkedeki benzersiz firma sayısını döndürür (harita için)"""
-    satislar = tum_satislari_getir()
+    return {ulke: dict(bilgi) for ulke, bilgi in _ozet_getir(senkronize)['ulkeler'].items()}
+
+
+# ==================== VERİ GÖÇLERİ ====================
+# Bir kerelik, sayfa sayfa ilerleyen göçler. Güncellemeler çok yollu PATCH
+# yığınlarıyla yazılır; yarıda kesilirse tekrar çalıştırmak güvenlidir.
+
+GOC_YIGIN_BOYUTU = 500
+
+_goc_durumlari = {}     # göç işareti yolu -> tamamlandı mı (oturumda bir kez okunur)
+
+
+def _goc_tamamlandi(yol, surum):
+    """
+    Sunucudaki göç işareti bu sürümü gösteriyor mu? İşaret oturumda bir kez
+    okunur; okunamazsa (çevrimdışı, hata) göç yapılmamış sayılır.
+    """
+    if yol not in _goc_durumlari:
+        try:
+            response = _istek("GET", yol)
+            if response.status_code != 200:
+                return False
+            _goc_durumlari[yol] = response.json() == surum
+        except Exception as e:
+            print(f"[HATA] Goc isareti okunamadi: {e}")
+            return False
+    return _goc_durumlari[yol]
+
+
+def _goc_isaretle(yol, surum):
+    """Göç tamamlanınca sunucuya işaretini yazar"""
+    response = _istek("PUT", yol, data=surum)
+    if response.status_code != 200:
+        raise requests.exceptions.HTTPError(f"HTTP {response.status_code}: {yol}")
+    _goc_durumlari[yol] = True
+
+
+def _goc_yigini_yaz(yigin):
+    """Göç güncellemelerini tek PATCH ile yazar (değişen satışlar degisim damgası alır)"""
+    if yigin:
+        damgalar = {f"satislar/{satis_id}/degisim": SUNUCU_ZAMANI for satis_id in _islem_satis_idleri(yigin)}
+        response = _istek("PATCH", "", data=dict(yigin, **damgalar), zaman_asimi=30)
+        if response.status_code != 200:
+            raise requests.exceptions.HTTPError(f"HTTP {response.status_code}")
+
+
+def ts_gocu():
+    """
+    ts alanı olmayan eski satışlara tarih alanından epoch ms yazar; güncellenen
+    sayısını döndürür. Tamamlanınca sunucuya göç işareti yazılır; tarih aralığı
+    sorguları ts dizinini ancak bundan sonra kullanır.
+    """
+    yigin = {}
+    guncellenen = 0
     
-    if not satislar:
-        return {}
+    for sayfa in _sayfalar("satislar"):
+        for satis_id, satis in sayfa:
+            if satis and not isinstance(satis.get('ts'), (int, float)):
+                ts = _tarih_ts(satis.get('tarih', ''))
+                if ts:
+                    yigin[f"satislar/{satis_id}/ts"] = ts
+        
+        if len(yigin) >= GOC_YIGIN_BOYUTU:
+            _goc_yigini_yaz(yigin)
+            guncellenen += len(yigin)
+            yigin = {}
+            print(f"[OK] ts gocu: {guncellenen} kayit")
     
-    ulke_firmalar = {}  # ulke -> set(firma_adlari)
-    ulke_cirolar = {}   # ulke -> toplam_ciro
+    _goc_yigini_yaz(yigin)
+    guncellenen += len(yigin)
+    _goc_isaretle(TS_GOC_YOLU, TS_GOC_SURUMU)
+    print(f"[OK] ts gocu tamamlandi: {guncellenen} kayit guncellendi.")
+    return guncellenen
+
+
+def firma_key_gocu():
+    """
+    firma_key alanı olmayan (veya eskimiş) satışlara normalize firma anahtarını yazar.
+    Tamamlanınca sunucuya göç işareti (FIRMA_KEY_SURUMU) yazılır; firma sorguları
+    dizini ancak bundan sonra kullanır.
+    """
+    yigin = {}
+    guncellenen = 0
     
-    for satis in satislar:
-        ulke = satis.get('ulke', 'TR')
-        firma_adi = satis.get('firma_adi', '').strip().lower()
-        ciro = satis.get('toplam_satis_tutari', 0)
+    for sayfa in _sayfalar("satislar"):
+        for satis_id, satis in sayfa:
+            if satis:
+                firma_key = _firma_anahtari(satis.get('firma_adi'))
+                if satis.get('firma_key') != firma_key:
+                    yigin[f"satislar/{satis_id}/firma_key"] = firma_key
         
-        if not firma_adi:
-            continue
-        
-        if ulke not in ulke_firmalar:
-            ulke_firmalar[ulke] = set()
-            ulke_cirolar[ulke] = 0
-        
-        ulke_firmalar[ulke].add(firma_adi)
-        ulke_cirolar[ulke] += ciro
-    
-    # Sonuçları döndür
-    sonuc = {}
-    for ulke in ulke_firmalar:
-        sonuc[ulke] = {
-            'firma_sayisi': len(ulke_firmalar[ulke]),
-            'toplam_ciro': ulke_cirolar[ulke]
-        }
+        if len(yigin) >= GOC_YIGIN_BOYUTU:
+            _goc_yigini_yaz(yigin)
+            guncellenen += len(yigin)
+            yigin = {}
+            print(f"[OK] firma_key gocu: {guncellenen} kayit")
+    
+    _goc_yigini_yaz(yigin)
+    guncellenen += len(yigin)
+    _goc_isaretle(FIRMA_KEY_GOC_YOLU, FIRMA_KEY_SURUMU)
+    print(f"[OK] firma_key gocu tamamlandi: {guncellenen} kayit guncellendi.")
+    return guncellenen
+
+
+# Sorgularda orderBy ile kullanılan alanlar; kurallara .indexOn olarak eklenmelidir
+DIZINLI_ALANLAR = {"satislar": ["ts", "firma_key", "degisim"]}
+
+
+def kural_parcasi():
+    """Firebase güvenlik kurallarına eklenecek .indexOn parçasını JSON metni olarak üretir"""
+    kurallar = {dugum: {".indexOn": alanlar} for dugum, alanlar in DIZINLI_ALANLAR.items()}
+    return json.dumps({"rules": kurallar}, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Ant Koli veritabanı bakım komutları")
+    komutlar = parser.add_subparsers(dest="komut", required=True)
+    komutlar.add_parser("ozet-onar", help="ozet/ düğümünü tüm satışlardan yeniden hesaplar")
+    komutlar.add_parser("ts-gocu", help="Eski satışlara sayısal ts alanı ekler")
+    komutlar.add_parser("firma-key-gocu", help="Eski satışlara normalize firma_key alanı ekler")
+    komutlar.add_parser("kurallar", help="Gerekli .indexOn kural parçasını yazdırır")
+    args = parser.parse_args()
     
-    return sonuc
+    if args.komut == "ozet-onar":
+        sys.exit(0 if ozet_yeniden_olustur() else 1)
+    elif args.komut == "ts-gocu":
+        ts_gocu()
+    elif args.komut == "firma-key-gocu":
+        firma_key_gocu()
+    elif args.komut == "kurallar":
+        print(kural_parcasi())
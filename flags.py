@@ -0,0 +1,265 @@
+"""
+Bayrak Servisi
+Ülke bayraklarını tek yerden, paylaşılan CTkImage nesneleri olarak sunar.
+
+Arama sırası:
+    1. Bellek (her ülke için tek CTkImage, tüm pencereler ortak kullanır)
+    2. Uygulamayla gelen atlas (bayraklar.png + bayraklar.json, tek dosyada
+       hazır boyutlu tüm bayraklar; `python flags.py atlas-olustur` ile üretilir)
+    3. Veri dizinindeki disk önbelleği (bayraklar/<kod>.png, bir kez doldurulur)
+    4. flagcdn.com - yalnızca arka planda; arayüz yolu asla ağı beklemez
+
+İndirilemeyen bayraklar BAYRAK_OLUMSUZ_SURE boyunca yeniden denenmez.
+Bağlantı yokken (devre açık) hiç istek yapılmaz.
+"""
+
+import io
+import json
+import os
+import sys
+import time
+
+from PIL import Image, ImageOps
+
+import database
+import local_mirror
+import tasks
+
+BAYRAK_URL = "https://flagcdn.com/w80/{kod}.png"
+BAYRAK_ZAMAN_ASIMI = 5
+BAYRAK_BOYUTU = (24, 16)            # Ekrandaki boyut
+HUCRE_BOYUTU = (48, 32)             # Diskte / atlasta saklanan boyut (yüksek DPI için 2x)
+BAYRAK_OLUMSUZ_SURE = 600           # sn: başarısız indirme bu süre sonra yeniden denenir
+ATLAS_SUTUN = 16
+ATLAS_DOSYASI = "bayraklar.png"
+ATLAS_DIZINI = "bayraklar.json"
+ONBELLEK_KLASORU = "bayraklar"
+
+if getattr(sys, 'frozen', False):
+    UYGULAMA_DIZINI = sys._MEIPASS
+else:
+    UYGULAMA_DIZINI = os.path.dirname(os.path.abspath(__file__))
+
+_gorseller = {}         # kod -> CTkImage (yalnızca ana thread'de oluşturulur)
+_bos_gorsel = None
+_basarisiz = {}         # kod -> son başarısız deneme (monotonic)
+_atlas = None           # (PIL atlas, kod -> hücre sırası, hücre boyutu, sütun); yoksa (None, {}, ...)
+
+
+# ==================== KAYNAKLAR ====================
+
+def _onbellek_dizini():
+    dizin = os.path.join(local_mirror.uygulama_veri_dizini(), ONBELLEK_KLASORU)
+    os.makedirs(dizin, exist_ok=True)
+    return dizin
+
+
+def _onbellek_yolu(kod):
+    return os.path.join(_onbellek_dizini(), f"{kod.lower()}.png")
+
+
+def _atlas_getir():
+    """Uygulamayla gelen atlası ilk kullanımda bir kez açar"""
+    global _atlas
+    if _atlas is None:
+        try:
+            with open(os.path.join(UYGULAMA_DIZINI, ATLAS_DIZINI), encoding="utf-8") as f:
+                dizin = json.load(f)
+            goruntu = Image.open(os.path.join(UYGULAMA_DIZINI, ATLAS_DOSYASI))
+            goruntu.load()
+            _atlas = (goruntu, {kod: i for i, kod in enumerate(dizin["kodlar"])},
+                      tuple(dizin["hucre"]), dizin["sutun"])
+        except (OSError, ValueError, KeyError):
+            _atlas = (None, {}, HUCRE_BOYUTU, ATLAS_SUTUN)
+    return _atlas
+
+
+def _atlastan_kes(kod):
+    goruntu, siralar, (genislik, yukseklik), sutun = _atlas_getir()
+    sira = siralar.get(kod)
+    if sira is None:
+        return None
+    x, y = (sira % sutun) * genislik, (sira // sutun) * yukseklik
+    return goruntu.crop((x, y, x + genislik, y + yukseklik))
+
+
+def _diskten_oku(kod):
+    try:
+        goruntu = Image.open(_onbellek_yolu(kod))
+        goruntu.load()
+        return goruntu
+    except OSError:
+        return None
+
+
+def _hucreye_sigdir(png):
+    """İndirilen PNG'yi en-boy oranını koruyarak saydam hücreye ortalar"""
+    goruntu = ImageOps.contain(Image.open(io.BytesIO(png)).convert("RGBA"), HUCRE_BOYUTU)
+    hucre = Image.new("RGBA", HUCRE_BOYUTU, (0, 0, 0, 0))
+    hucre.paste(goruntu, ((HUCRE_BOYUTU[0] - goruntu.width) // 2, (HUCRE_BOYUTU[1] - goruntu.height) // 2))
+    return hucre
+
+
+def bayrak_verisi_indir(kod):
+    """Bayrağın PNG verisini indirir (bulunamazsa None; ağ hatasında istisna)"""
+    response = database.harici_get(BAYRAK_URL.format(kod=kod.lower()), zaman_asimi=BAYRAK_ZAMAN_ASIMI)
+    if response.status_code == 200:
+        return response.content
+    return None
+
+
+def _indir_ve_kaydet(kod):
+    """Arka planda indirir, hücre boyutunda diske yazar; PIL görüntüsü veya None döndürür"""
+    try:
+        png = bayrak_verisi_indir(kod)
+        if not png:
+            return None
+        goruntu = _hucreye_sigdir(png)
+    except Exception as e:
+        print(f"[UYARI] Bayrak indirilemedi ({kod}): {e}")
+        return None
+
+    try:
+        gecici = _onbellek_yolu(kod) + ".tmp"
+        goruntu.save(gecici, "PNG")
+        os.replace(gecici, _onbellek_yolu(kod))
+    except OSError as e:
+        print(f"[UYARI] Bayrak diske yazilamadi ({kod}): {e}")
+    return goruntu
+
+
+# ==================== ARAYÜZ ====================
+
+def _ctk_gorseli(goruntu):
+    import customtkinter as ctk
+    return ctk.CTkImage(light_image=goruntu, dark_image=goruntu, size=BAYRAK_BOYUTU)
+
+
+def bos_bayrak():
+    """Bayrak hazır olana kadar gösterilen saydam görüntü"""
+    # CTkLabel image=None ile eski görüntüyü temizlemez; saydam görüntü kullanılır
+    global _bos_gorsel
+    if _bos_gorsel is None:
+        _bos_gorsel = _ctk_gorseli(Image.new("RGBA", HUCRE_BOYUTU, (0, 0, 0, 0)))
+    return _bos_gorsel
+
+
+def bayrak_getir(kod):
+    """
+    Bayrağın paylaşılan CTkImage'ını döndürür; atlasta veya diskte yoksa None.
+    Ağa gitmez, ana thread'den çağrılabilir.
+    """
+    kod = (kod or "").upper()
+    gorsel = _gorseller.get(kod)
+    if gorsel is None and kod:
+        goruntu = _atlastan_kes(kod) or _diskten_oku(kod)
+        if goruntu is not None:
+            gorsel = _gorseller[kod] = _ctk_gorseli(goruntu)
+    return gorsel
+
+
+def _indirilebilir(kod):
+    """Bağlantı varsa ve yakın zamanda başarısız olmadıysa True"""
+    son = _basarisiz.get(kod)
+    if son is not None and time.monotonic() - son < BAYRAK_OLUMSUZ_SURE:
+        return False
+    return database.cevrimici()
+
+
+def _indir(kod):
+    """Görev havuzunda çalışır: indirir, diske yazar, başarısızlığı not eder"""
+    goruntu = _indir_ve_kaydet(kod)
+    if goruntu is None:
+        _basarisiz[kod] = time.monotonic()
+    else:
+        _basarisiz.pop(kod, None)
+    return goruntu
+
+
+def bayrak_iste(widget, kod, geri_cagri):
+    """
+    Bayrak hazırsa geri_cagri(CTkImage) hemen çağrılır. Değilse arka planda
+    indirilir ve hazır olunca ana thread'de çağrılır (widget kapanmadıysa).
+    Aynı ülke için süren indirme paylaşılır; başarısızlıkta çağrı yapılmaz.
+    """
+    gorsel = bayrak_getir(kod)
+    if gorsel is not None:
+        geri_cagri(gorsel)
+        return
+
+    kod = (kod or "").upper()
+    if not kod or not _indirilebilir(kod):
+        return
+
+    def teslim_et(goruntu):
+        if goruntu is None:
+            return
+        # CTkImage ana thread'de bir kez oluşturulur, tüm isteyenlere verilir
+        gorsel = _gorseller.get(kod)
+        if gorsel is None:
+            gorsel = _gorseller[kod] = _ctk_gorseli(goruntu)
+        geri_cagri(gorsel)
+
+    tasks.gonder(
+        _indir, kod, anahtar=("bayrak", kod), oncelik=tasks.ONCELIK_ARKA_PLAN,
+        sahip=widget, basarili=teslim_et
+    )
+
+
+def onbellegi_doldur(kodlar):
+    """
+    Atlasta ve diskte olmayan bayrakları arka planda indirip diske yazar.
+    Bir kez tamamlandıktan sonra bayraklar çevrimdışıyken de açılır.
+    """
+    eksikler = [
+        kod.upper() for kod in kodlar
+        if kod.upper() not in _atlas_getir()[1] and not os.path.exists(_onbellek_yolu(kod))
+    ]
+    for kod in eksikler:
+        if _indirilebilir(kod):
+            tasks.gonder(_indir, kod, anahtar=("bayrak", kod), oncelik=tasks.ONCELIK_ONDEN_YUKLEME)
+    return len(eksikler)
+
+
+# ==================== ATLAS ÜRETİMİ ====================
+
+def atlas_olustur(kodlar, cikti_dizini=UYGULAMA_DIZINI):
+    """
+    Verilen ülke kodlarının bayraklarını (diskten veya ağdan) tek bir atlas
+    PNG'sinde ve kod sırasını tutan JSON dizininde toplar.
+    """
+    kodlar = list(dict.fromkeys(kod.upper() for kod in kodlar))
+    bulunanlar = []
+    for kod in kodlar:
+        goruntu = _diskten_oku(kod) or _indir_ve_kaydet(kod)
+        if goruntu is None:
+            print(f"[UYARI] Atlasa eklenemedi: {kod}")
+            continue
+        bulunanlar.append((kod, goruntu))
+
+    genislik, yukseklik = HUCRE_BOYUTU
+    satir = (len(bulunanlar) + ATLAS_SUTUN - 1) // ATLAS_SUTUN
+    atlas = Image.new("RGBA", (ATLAS_SUTUN * genislik, max(1, satir) * yukseklik), (0, 0, 0, 0))
+    for sira, (kod, goruntu) in enumerate(bulunanlar):
+        atlas.paste(goruntu, ((sira % ATLAS_SUTUN) * genislik, (sira // ATLAS_SUTUN) * yukseklik))
+
+    atlas.save(os.path.join(cikti_dizini, ATLAS_DOSYASI), "PNG", optimize=True)
+    with open(os.path.join(cikti_dizini, ATLAS_DIZINI), "w", encoding="utf-8") as f:
+        json.dump({"hucre": list(HUCRE_BOYUTU), "sutun": ATLAS_SUTUN,
+                   "kodlar": [kod for kod, _ in bulunanlar]}, f)
+    print(f"[OK] Bayrak atlasi olusturuldu: {len(bulunanlar)}/{len(kodlar)} bayrak")
+    return len(bulunanlar)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ant Koli bayrak atlası")
+    komutlar = parser.add_subparsers(dest="komut", required=True)
+    olustur = komutlar.add_parser("atlas-olustur", help="ULKELER listesindeki tüm bayraklardan atlas üretir")
+    olustur.add_argument("--cikti", default=UYGULAMA_DIZINI, help="Atlasın yazılacağı dizin")
+    args = parser.parse_args()
+
+    if args.komut == "atlas-olustur":
+        from main import ULKELER
+        sys.exit(0 if atlas_olustur([kod for kod, _ in ULKELER], args.cikti) else 1)
@@ -0,0 +1,207 @@
+"""
+Yerel SQLite Aynası
+Firebase'deki satislar düğümünün kullanıcının uygulama veri dizinindeki kopyası.
+Okumalar diskten yapılır; ağdan yalnızca son senkrondan sonraki kayıtlar çekilir.
+Aynı dosyada sunucuya henüz yazılmamış işlemlerin kuyruğu da tutulur.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+VERITABANI_ADI = "antkoli_ayna.sqlite3"
+SEMA_SURUMU = 2
+
+_baglanti = None
+_kilit = threading.RLock()
+_sunucu = None          # Varsayılan dışındaki sunucunun adresi (ayna dosyası ona göre ayrılır)
+
+
+def uygulama_veri_dizini():
+    """Kullanıcıya ait uygulama veri dizinini döndürür (yoksa oluşturur)"""
+    ozel = os.environ.get("ANTKOLI_VERI_DIZINI")
+    if ozel:
+        dizin = ozel
+    elif sys.platform == 'win32':
+        dizin = os.path.join(os.environ.get("APPDATA") or os.path.expanduser("~"), "AntKoli")
+    elif sys.platform == 'darwin':
+        dizin = os.path.join(os.path.expanduser("~"), "Library", "Application Support", "AntKoli")
+    else:
+        taban = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+        dizin = os.path.join(taban, "antkoli")
+
+    os.makedirs(dizin, exist_ok=True)
+    return dizin
+
+
+def veritabani_yolu():
+    """Ayna veritabanı dosyasının tam yolu (varsayılan dışındaki sunucular için ayrı dosya)"""
+    if _sunucu is None:
+        return os.path.join(uygulama_veri_dizini(), VERITABANI_ADI)
+    ozet = hashlib.sha1(_sunucu.encode("utf-8")).hexdigest()[:12]
+    kok, uzanti = os.path.splitext(VERITABANI_ADI)
+    return os.path.join(uygulama_veri_dizini(), f"{kok}_{ozet}{uzanti}")
+
+
+def sunucu_ayarla(url):
+    """
+    Aynanın ait olduğu sunucuyu belirler (varsayılan sunucu için None).
+    Başka bir sunucunun (ör. local_rtdb.py) satırları, imleçleri ve yazma
+    kuyruğu ayrı dosyada tutulur; test yazmaları canlı veritabanına gitmez.
+    """
+    global _sunucu
+    url = url.rstrip("/") if url else None
+    with _kilit:
+        if url != _sunucu:
+            kapat()
+            _sunucu = url
+
+
+def _sema_olustur(baglanti):
+    """Tabloları oluşturur / şemayı günceller"""
+    surum = baglanti.execute("PRAGMA user_version").fetchone()[0]
+    if surum < 1:
+        baglanti.executescript("""
+            CREATE TABLE IF NOT EXISTS satislar (
+                id   TEXT PRIMARY KEY,
+                veri TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                anahtar TEXT PRIMARY KEY,
+                deger   TEXT
+            );
+        """)
+    if surum < 2:
+        # Çevrimdışı yazma kuyruğu (write-ahead log)
+        baglanti.executescript("""
+            CREATE TABLE IF NOT EXISTS bekleyen_islemler (
+                sira       INTEGER PRIMARY KEY AUTOINCREMENT,
+                guncelleme TEXT NOT NULL,
+                olusturma  REAL NOT NULL
+            );
+        """)
+    baglanti.execute(f"PRAGMA user_version = {SEMA_SURUMU}")
+
+
+def _baglanti_getir():
+    """Paylaşılan SQLite bağlantısını döndürür (ilk çağrıda açar)"""
+    global _baglanti
+    with _kilit:
+        if _baglanti is None:
+            baglanti = sqlite3.connect(veritabani_yolu(), check_same_thread=False, isolation_level=None)
+            baglanti.execute("PRAGMA journal_mode=WAL")
+            baglanti.execute("PRAGMA synchronous=NORMAL")
+            _sema_olustur(baglanti)
+            _baglanti = baglanti
+        return _baglanti
+
+
+def kapat():
+    """Veritabanı bağlantısını kapatır"""
+    global _baglanti
+    with _kilit:
+        if _baglanti is not None:
+            _baglanti.close()
+            _baglanti = None
+
+
+def satislari_oku():
+    """Aynadaki tüm satışları id -> kayıt sözlüğü olarak döndürür"""
+    with _kilit:
+        satirlar = _baglanti_getir().execute("SELECT id, veri FROM satislar").fetchall()
+    return {satis_id: json.loads(veri) for satis_id, veri in satirlar}
+
+
+def anahtarlar():
+    """Aynadaki satış anahtarlarını döndürür"""
+    with _kilit:
+        satirlar = _baglanti_getir().execute("SELECT id FROM satislar").fetchall()
+    return {satir[0] for satir in satirlar}
+
+
+def kaydet(degisiklikler):
+    """id -> kayıt değişikliklerini tek işlemde yazar (kayıt None ise siler)"""
+    if not degisiklikler:
+        return
+
+    eklenen = [(k, json.dumps(v, ensure_ascii=False)) for k, v in degisiklikler.items() if v is not None]
+    silinen = [(k,) for k, v in degisiklikler.items() if v is None]
+
+    with _kilit:
+        baglanti = _baglanti_getir()
+        baglanti.execute("BEGIN")
+        try:
+            if eklenen:
+                baglanti.executemany("INSERT OR REPLACE INTO satislar (id, veri) VALUES (?, ?)", eklenen)
+            if silinen:
+                baglanti.executemany("DELETE FROM satislar WHERE id = ?", silinen)
+            baglanti.execute("COMMIT")
+        except Exception:
+            baglanti.execute("ROLLBACK")
+            raise
+
+
+def meta_oku(anahtar, varsayilan=None):
+    """Senkron bilgisi gibi meta değerleri okur"""
+    with _kilit:
+        satir = _baglanti_getir().execute("SELECT deger FROM meta WHERE anahtar = ?", (anahtar,)).fetchone()
+    return satir[0] if satir else varsayilan
+
+
+def meta_yaz(anahtar, deger):
+    """Meta değer yazar"""
+    with _kilit:
+        _baglanti_getir().execute(
+            "INSERT OR REPLACE INTO meta (anahtar, deger) VALUES (?, ?)", (anahtar, str(deger))
+        )
+
+
+def islem_ekle(guncelleme):
+    """Çok yollu güncellemeyi kuyruğa kalıcı olarak yazar; sıra numarasını döndürür"""
+    with _kilit:
+        imlec = _baglanti_getir().execute(
+            "INSERT INTO bekleyen_islemler (guncelleme, olusturma) VALUES (?, ?)",
+            (json.dumps(guncelleme, ensure_ascii=False), time.time())
+        )
+        return imlec.lastrowid
+
+
+def bekleyen_islemler(limit=None):
+    """Kuyruktaki işlemleri eskiden yeniye [(sira, guncelleme)] olarak döndürür"""
+    sorgu = "SELECT sira, guncelleme FROM bekleyen_islemler ORDER BY sira"
+    with _kilit:
+        if limit:
+            satirlar = _baglanti_getir().execute(sorgu + " LIMIT ?", (limit,)).fetchall()
+        else:
+            satirlar = _baglanti_getir().execute(sorgu).fetchall()
+    return [(sira, json.loads(guncelleme)) for sira, guncelleme in satirlar]
+
+
+def bekleyen_sayisi():
+    """Kuyrukta bekleyen işlem sayısı"""
+    with _kilit:
+        return _baglanti_getir().execute("SELECT COUNT(*) FROM bekleyen_islemler").fetchone()[0]
+
+
+def islemleri_sil(siralar):
+    """Sunucuya yazılmış işlemleri kuyruktan siler"""
+    with _kilit:
+        _baglanti_getir().executemany("DELETE FROM bekleyen_islemler WHERE sira = ?", [(s,) for s in siralar])
+
+
+def islemleri_temizle():
+    """Kuyruktaki tüm işlemleri siler"""
+    with _kilit:
+        _baglanti_getir().execute("DELETE FROM bekleyen_islemler")
+
+
+def temizle():
+    """Aynayı tamamen boşaltır (sonraki senkron baştan indirir)"""
+    with _kilit:
+        baglanti = _baglanti_getir()
+        baglanti.execute("DELETE FROM satislar")
+        baglanti.execute("DELETE FROM meta")
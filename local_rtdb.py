@@ -0,0 +1,603 @@
+"""
+Yerel RTDB Sunucusu
+Firebase Realtime Database REST API'sinin uygulamanın kullandığı alt
+kümesini taklit eden, yalnızca standart kütüphaneyle çalışan HTTP sunucusu.
+Testler ve ölçümler canlı veritabanına dokunmadan tekrarlanabilir olsun diye
+vardır.
+
+Desteklenenler:
+    GET / PUT / POST / PATCH / DELETE  <yol>.json
+    shallow, orderBy ("$key", "$value", alan), startAt, endAt, equalTo,
+    limitToFirst, limitToLast
+    X-Firebase-ETag / if-match (uyuşmazlıkta 412)
+    {".sv": "timestamp"} ve {".sv": {"increment": n}} sunucu değerleri
+    Accept: text/event-stream ile put / patch / keep-alive akışı (sorgu
+    penceresi sonraki olaylara da uygulanır)
+Gecikme, bant genişliği ve hata enjeksiyonu ayarlanabilir.
+
+Kullanım:
+    python local_rtdb.py --port 9000 --veri firebase_yedek.json --gecikme 0.05
+    ANTKOLI_FIREBASE_URL=http://127.0.0.1:9000 python main.py
+"""
+
+import argparse
+import hashlib
+import json
+import queue
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+CANLI_TUTMA_ARALIGI = 30        # sn: akışta keep-alive aralığı
+_PUSH_KARAKTERLERI = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+
+
+# ==================== VERİ AĞACI ====================
+
+def _yol_parcalari(yol):
+    return [unquote(p) for p in yol.strip("/").split("/") if p]
+
+
+def _kopya(deger):
+    return json.loads(json.dumps(deger))
+
+
+def _sadele(deger):
+    """Boş nesneleri ve None değerleri ağaçtan çıkarır (RTDB boş düğüm tutmaz)"""
+    if isinstance(deger, dict):
+        sade = {k: _sadele(v) for k, v in deger.items()}
+        sade = {k: v for k, v in sade.items() if v is not None}
+        return sade or None
+    if isinstance(deger, list):
+        return _sadele({str(i): v for i, v in enumerate(deger)})
+    return deger
+
+
+def _siralama_anahtari(deger):
+    """RTDB sıralaması: null < false < true < sayı < metin < nesne"""
+    if deger is None:
+        return (0, 0)
+    if deger is False:
+        return (1, 0)
+    if deger is True:
+        return (2, 0)
+    if isinstance(deger, (int, float)):
+        return (3, deger)
+    if isinstance(deger, str):
+        return (4, deger)
+    return (5, 0)
+
+
+def _etag(deger):
+    return hashlib.sha1(json.dumps(deger, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class _PushUretici:
+    """Firebase biçiminde, zamana göre sıralı push ID üretir"""
+
+    def __init__(self):
+        self._son_zaman = 0
+        self._son_rastgele = [0] * 12
+        self._kilit = threading.Lock()
+
+    def uret(self):
+        with self._kilit:
+            simdi = int(time.time() * 1000)
+            if simdi == self._son_zaman:
+                for i in range(11, -1, -1):
+                    if self._son_rastgele[i] < 63:
+                        self._son_rastgele[i] += 1
+                        break
+                    self._son_rastgele[i] = 0
+            else:
+                self._son_zaman = simdi
+                self._son_rastgele = [random.randrange(64) for _ in range(12)]
+
+            zaman_kismi = []
+            for _ in range(8):
+                zaman_kismi.append(_PUSH_KARAKTERLERI[simdi % 64])
+                simdi //= 64
+            return "".join(reversed(zaman_kismi)) + "".join(_PUSH_KARAKTERLERI[r] for r in self._son_rastgele)
+
+
+class VeriAgaci:
+    """Bellekteki JSON ağacı ve değişiklik dinleyicileri"""
+
+    def __init__(self, veri=None):
+        self.kok = _sadele(_kopya(veri)) or {}
+        self.kilit = threading.RLock()
+        self.dinleyiciler = []      # [(yol_parcalari, queue.Queue, sorgu, penceredeki çocuklar)]
+        self.push = _PushUretici()
+
+    def oku(self, parcalar):
+        with self.kilit:
+            dugum = self.kok
+            for parca in parcalar:
+                if not isinstance(dugum, dict) or parca not in dugum:
+                    return None
+                dugum = dugum[parca]
+            return dugum
+
+    def _sunucu_degerleri(self, deger, parcalar):
+        """{".sv": ...} yer tutucularını çözer"""
+        if isinstance(deger, dict):
+            sv = deger.get(".sv")
+            if sv == "timestamp":
+                return int(time.time() * 1000)
+            if isinstance(sv, dict) and "increment" in sv:
+                mevcut = self.oku(parcalar)
+                return (mevcut if isinstance(mevcut, (int, float)) else 0) + sv["increment"]
+            return {k: self._sunucu_degerleri(v, parcalar + [k]) for k, v in deger.items()}
+        return deger
+
+    def _yaz(self, parcalar, deger):
+        """Kilit tutulurken çağrılır; None siler"""
+        deger = _sadele(self._sunucu_degerleri(deger, parcalar))
+        if not parcalar:
+            self.kok = deger if isinstance(deger, dict) else {}
+            return deger
+        dugum = self.kok
+        yol = []
+        for parca in parcalar[:-1]:
+            if not isinstance(dugum.get(parca), dict):
+                if deger is None:
+                    return None
+                dugum[parca] = {}
+            yol.append((dugum, parca))
+            dugum = dugum[parca]
+        if deger is None:
+            dugum.pop(parcalar[-1], None)
+            # Boşalan üst düğümleri temizle
+            for ust, parca in reversed(yol):
+                if ust[parca]:
+                    break
+                del ust[parca]
+        else:
+            dugum[parcalar[-1]] = deger
+        return deger
+
+    def yaz(self, parcalar, deger):
+        with self.kilit:
+            sonuc = self._yaz(parcalar, deger)
+            self._bildir("put", parcalar, [(parcalar, sonuc)])
+            return sonuc
+
+    def guncelle(self, parcalar, guncelleme):
+        """Çok yollu güncelleme (anahtarlar '/' içerebilir)"""
+        with self.kilit:
+            yazilanlar = []
+            for anahtar, deger in guncelleme.items():
+                tam_yol = parcalar + _yol_parcalari(anahtar)
+                yazilanlar.append((tam_yol, self._yaz(tam_yol, deger)))
+            self._bildir("patch", parcalar, yazilanlar)
+            return guncelleme
+
+    def _bildir(self, olay, parcalar, yazilanlar):
+        """
+        Yazılan yolları dinleyicilere olay olarak iletir.
+        yazilanlar: [(tam_yol, yeni_deger)]; put için tek öğe.
+        """
+        for dinleyici_yolu, kuyruk, sorgu, gorunen in list(self.dinleyiciler):
+            n = len(dinleyici_yolu)
+            alt = {}
+            ustune_yazildi = False
+            for tam_yol, deger in yazilanlar:
+                if tam_yol[:n] == dinleyici_yolu:
+                    alt["/".join(tam_yol[n:])] = deger
+                elif dinleyici_yolu[:len(tam_yol)] == tam_yol:
+                    ustune_yazildi = True
+
+            if ustune_yazildi or (sorgu and "" in alt):
+                # Dinlenen düğümün üstüne yazıldı: yeni hali tamamen gönderilir
+                kuyruk.put(("put", {"path": "/", "data": self._gorunum(dinleyici_yolu, sorgu, gorunen)}))
+            elif sorgu and alt:
+                alt = self._pencereye_sinirla(dinleyici_yolu, sorgu, gorunen, alt)
+                if alt:
+                    kuyruk.put(("patch", {"path": "/", "data": alt}))
+            elif olay == "put" and alt:
+                yol, deger = next(iter(alt.items()))
+                kuyruk.put(("put", {"path": "/" + yol, "data": _kopya(deger)}))
+            elif alt:
+                if parcalar[:n] == dinleyici_yolu:
+                    # Güncelleme konumu dinlenen düğümün içinde: anahtarlar konuma göre
+                    konum = parcalar[n:]
+                    veri = {"/".join(tam_yol[len(parcalar):]): _kopya(deger) for tam_yol, deger in yazilanlar}
+                    kuyruk.put(("patch", {"path": "/" + "/".join(konum), "data": veri}))
+                else:
+                    kuyruk.put(("patch", {"path": "/", "data": _kopya(alt)}))
+
+    def _gorunum(self, parcalar, sorgu, gorunen):
+        """Dinleyicinin gördüğü hali döndürür, penceredeki çocukları günceller"""
+        deger = _kopya(self.oku(parcalar))
+        if not sorgu:
+            return deger
+        deger = sorgu_uygula(deger, sorgu)
+        gorunen.clear()
+        gorunen.update(deger or {})
+        return deger
+
+    def _pencerede(self, parcalar, sorgu, cocuk):
+        """Çocuğun şu anki değeri sorgunun startAt / endAt / equalTo penceresinde mi?"""
+        deger = self.oku(parcalar + [cocuk])
+        return deger is not None and bool(sorgu_uygula({cocuk: deger}, sorgu))
+
+    def _pencereye_sinirla(self, parcalar, sorgu, gorunen, alt):
+        """
+        Sorgulu akışta yalnızca penceredeki çocukların değişiklikleri gider:
+        pencereye yeni giren çocuk tamamen, pencereden çıkan null olarak gönderilir.
+        """
+        cocuklar = {}
+        for alt_yol, deger in alt.items():
+            cocuklar.setdefault(alt_yol.split("/")[0], {})[alt_yol] = deger
+
+        veri = {}
+        for cocuk, yazilanlar in cocuklar.items():
+            if self._pencerede(parcalar, sorgu, cocuk):
+                if cocuk in gorunen:
+                    veri.update({k: _kopya(v) for k, v in yazilanlar.items()})
+                else:
+                    veri[cocuk] = _kopya(self.oku(parcalar + [cocuk]))
+                    gorunen.add(cocuk)
+            elif cocuk in gorunen:
+                veri[cocuk] = None
+                gorunen.discard(cocuk)
+        return veri
+
+    def dinle(self, parcalar, params=None):
+        """
+        Dinleyici ekler; (kuyruk, ilk görüntü) döndürür. params'taki orderBy /
+        startAt / endAt / equalTo sonraki olaylara da uygulanır (limitTo* yalnızca
+        ilk görüntüye).
+        """
+        params = params or {}
+        sorgu = {k: v for k, v in params.items() if k in ("orderBy", "startAt", "endAt", "equalTo")}
+        if "orderBy" not in sorgu:
+            sorgu = {}
+        kuyruk = queue.Queue()
+        gorunen = set()
+        with self.kilit:
+            ilk = sorgu_uygula(_kopya(self.oku(parcalar)), params)
+            if sorgu:
+                gorunen.update(ilk or {})
+            self.dinleyiciler.append((parcalar, kuyruk, sorgu, gorunen))
+        return kuyruk, ilk
+
+    def dinlemeyi_birak(self, kuyruk):
+        with self.kilit:
+            self.dinleyiciler = [d for d in self.dinleyiciler if d[1] is not kuyruk]
+
+
+# ==================== SORGULAR ====================
+
+def _json_param(params, ad):
+    if ad not in params:
+        return None, False
+    try:
+        return json.loads(params[ad]), True
+    except ValueError:
+        raise _IstekHatasi(400, f"{ad} gecerli JSON degil")
+
+
+def sorgu_uygula(deger, params):
+    """shallow / orderBy / startAt / endAt / equalTo / limitTo* parametrelerini uygular"""
+    if params.get("shallow") == "true":
+        if isinstance(deger, dict):
+            return {k: (True if isinstance(v, dict) else v) for k, v in deger.items()}
+        return deger
+
+    sirala, var = _json_param(params, "orderBy")
+    if not var:
+        return deger
+    if not isinstance(deger, dict):
+        return None
+
+    if sirala == "$key":
+        def degeri(k, v):
+            return k
+        def anahtar(k, v):
+            return (k,)
+    elif sirala == "$value":
+        def degeri(k, v):
+            return v
+        def anahtar(k, v):
+            return (_siralama_anahtari(v), k)
+    else:
+        alan = _yol_parcalari(sirala)
+        def degeri(k, v):
+            for parca in alan:
+                v = v.get(parca) if isinstance(v, dict) else None
+            return v
+        def anahtar(k, v):
+            return (_siralama_anahtari(degeri(k, v)), k)
+
+    ogeler = sorted(deger.items(), key=lambda kv: anahtar(*kv))
+
+    def karsilastir(k, v):
+        return _siralama_anahtari(degeri(k, v)) if sirala != "$key" else (4, k)
+
+    def sinir(d):
+        return (4, str(d)) if sirala == "$key" else _siralama_anahtari(d)
+
+    esit, var = _json_param(params, "equalTo")
+    if var:
+        ogeler = [(k, v) for k, v in ogeler if karsilastir(k, v) == sinir(esit)]
+    bas, var = _json_param(params, "startAt")
+    if var:
+        ogeler = [(k, v) for k, v in ogeler if karsilastir(k, v) >= sinir(bas)]
+    bit, var = _json_param(params, "endAt")
+    if var:
+        ogeler = [(k, v) for k, v in ogeler if karsilastir(k, v) <= sinir(bit)]
+
+    if "limitToFirst" in params:
+        ogeler = ogeler[:int(params["limitToFirst"])]
+    if "limitToLast" in params:
+        limit = int(params["limitToLast"])
+        ogeler = ogeler[-limit:] if limit else []
+    return dict(ogeler)
+
+
+# ==================== HTTP ====================
+
+class _IstekHatasi(Exception):
+    def __init__(self, durum, mesaj):
+        super().__init__(mesaj)
+        self.durum = durum
+
+
+class Ayarlar:
+    """Ağ koşulu benzetimi (çalışırken değiştirilebilir)"""
+
+    def __init__(self, gecikme=0.0, sapma=0.0, bant_genisligi=0, hata_orani=0.0, kopma_orani=0.0):
+        self.gecikme = gecikme              # sn: her yanıta eklenen gecikme
+        self.sapma = sapma                  # sn: gecikmeye eklenen rastgele [0, sapma)
+        self.bant_genisligi = bant_genisligi    # bayt/sn (0 = sınırsız)
+        self.hata_orani = hata_orani        # [0, 1]: 503 dönme olasılığı
+        self.kopma_orani = kopma_orani      # [0, 1]: yanıt vermeden bağlantıyı kapatma olasılığı
+
+
+class _IstekIsleyici(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "AntKoliLocalRTDB/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.ayrintili:
+            super().log_message(format, *args)
+
+    # ---------- yardımcılar ----------
+
+    def _cozumle(self):
+        bolumler = urlsplit(self.path)
+        yol = bolumler.path
+        if not yol.endswith(".json"):
+            raise _IstekHatasi(404, "Yol .json ile bitmeli")
+        params = {k: v[-1] for k, v in parse_qs(bolumler.query, keep_blank_values=True).items()}
+        return _yol_parcalari(yol[:-len(".json")]), params
+
+    def _govde(self):
+        uzunluk = int(self.headers.get("Content-Length") or 0)
+        ham = self.rfile.read(uzunluk) if uzunluk else b""
+        if not ham:
+            return None
+        try:
+            return json.loads(ham)
+        except ValueError:
+            raise _IstekHatasi(400, "Gecersiz JSON govde")
+
+    def _ag_kosulu(self):
+        """Gecikme ve hata enjeksiyonu; bağlantı koparılırsa False"""
+        ayarlar = self.server.ayarlar
+        bekleme = ayarlar.gecikme + random.uniform(0, ayarlar.sapma) if ayarlar.sapma else ayarlar.gecikme
+        if bekleme > 0:
+            time.sleep(bekleme)
+        if ayarlar.kopma_orani and random.random() < ayarlar.kopma_orani:
+            self.close_connection = True
+            return False
+        if ayarlar.hata_orani and random.random() < ayarlar.hata_orani:
+            self._yanit(503, {"error": "Enjekte edilmis hata"})
+            return False
+        return True
+
+    def _yaz_sinirli(self, veri):
+        """Gövdeyi bant genişliği sınırına uyarak yazar"""
+        hiz = self.server.ayarlar.bant_genisligi
+        if not hiz:
+            self.wfile.write(veri)
+            return
+        parca = max(1024, hiz // 20)
+        for i in range(0, len(veri), parca):
+            self.wfile.write(veri[i:i + parca])
+            self.wfile.flush()
+            time.sleep(len(veri[i:i + parca]) / hiz)
+
+    def _yanit(self, durum, veri, etag=None):
+        govde = json.dumps(veri, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(durum)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(govde)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self._yaz_sinirli(govde)
+
+    def _isle(self, islem):
+        try:
+            if not self._ag_kosulu():
+                return
+            islem()
+        except _IstekHatasi as e:
+            self._yanit(e.durum, {"error": str(e)})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _etag_kontrol(self, parcalar):
+        """if-match başlığı varsa mevcut değerin ETag'i ile karşılaştırır"""
+        beklenen = self.headers.get("if-match")
+        if beklenen is None:
+            return True
+        mevcut = self.server.agac.oku(parcalar)
+        etag = _etag(mevcut)
+        if beklenen != etag:
+            self._yanit(412, mevcut, etag=etag)
+            return False
+        return True
+
+    # ---------- yöntemler ----------
+
+    def do_GET(self):
+        def islem():
+            parcalar, params = self._cozumle()
+            if "text/event-stream" in (self.headers.get("Accept") or ""):
+                return self._akis(parcalar, params)
+            deger = _kopya(self.server.agac.oku(parcalar))
+            etag = _etag(deger) if self.headers.get("X-Firebase-ETag") == "true" else None
+            self._yanit(200, sorgu_uygula(deger, params), etag=etag)
+        self._isle(islem)
+
+    def do_PUT(self):
+        def islem():
+            parcalar, _ = self._cozumle()
+            veri = self._govde()
+            agac = self.server.agac
+            with agac.kilit:
+                if not self._etag_kontrol(parcalar):
+                    return
+                sonuc = agac.yaz(parcalar, veri)
+            self._yanit(200, sonuc)
+        self._isle(islem)
+
+    def do_POST(self):
+        def islem():
+            parcalar, _ = self._cozumle()
+            veri = self._govde()
+            anahtar = self.server.agac.push.uret()
+            self.server.agac.yaz(parcalar + [anahtar], veri)
+            self._yanit(200, {"name": anahtar})
+        self._isle(islem)
+
+    def do_PATCH(self):
+        def islem():
+            parcalar, _ = self._cozumle()
+            veri = self._govde()
+            if not isinstance(veri, dict):
+                raise _IstekHatasi(400, "PATCH govdesi nesne olmali")
+            self._yanit(200, self.server.agac.guncelle(parcalar, veri))
+        self._isle(islem)
+
+    def do_DELETE(self):
+        def islem():
+            parcalar, _ = self._cozumle()
+            agac = self.server.agac
+            with agac.kilit:
+                if not self._etag_kontrol(parcalar):
+                    return
+                agac.yaz(parcalar, None)
+            self._yanit(200, None)
+        self._isle(islem)
+
+    def _akis(self, parcalar, params):
+        """text/event-stream: ilk put, sonra değişiklikler ve keep-alive"""
+        agac = self.server.agac
+        kuyruk, ilk = agac.dinle(parcalar, params)
+
+        # Uzunluğu belli olmayan gövde: her olay ayrı bir chunked parça olarak
+        # hemen gönderilir (Firebase gibi); istemci parçayı beklemeden okuyabilir
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.close_connection = True
+
+        def parca_yaz(veri):
+            self._yaz_sinirli(f"{len(veri):x}\r\n".encode("ascii") + veri + b"\r\n")
+            self.wfile.flush()
+
+        def gonder(olay, veri):
+            metin = f"event: {olay}\ndata: {json.dumps(veri, ensure_ascii=False)}\n\n"
+            parca_yaz(metin.encode("utf-8"))
+
+        try:
+            gonder("put", {"path": "/", "data": ilk})
+            while not self.server.durduruluyor.is_set():
+                try:
+                    olay, veri = kuyruk.get(timeout=self.server.canli_tutma)
+                except queue.Empty:
+                    gonder("keep-alive", None)
+                    continue
+                gonder(olay, veri)
+            parca_yaz(b"")     # Son parça: akış düzgün kapanır
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            agac.dinlemeyi_birak(kuyruk)
+
+
+class YerelRTDB(ThreadingHTTPServer):
+    """
+    Yerel RTDB sunucusu.
+
+        sunucu = YerelRTDB(veri={...}, ayarlar=Ayarlar(gecikme=0.05))
+        url = sunucu.arka_planda_baslat()
+        ...
+        sunucu.durdur()
+    """
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, veri=None, ayarlar=None,
+                 canli_tutma=CANLI_TUTMA_ARALIGI, ayrintili=False):
+        super().__init__((host, port), _IstekIsleyici)
+        self.agac = VeriAgaci(veri)
+        self.ayarlar = ayarlar or Ayarlar()
+        self.canli_tutma = canli_tutma
+        self.ayrintili = ayrintili
+        self.durduruluyor = threading.Event()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def arka_planda_baslat(self):
+        """Sunucuyu daemon thread'de başlatır, taban URL'yi döndürür"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self.url
+
+    def durdur(self):
+        self.durduruluyor.set()
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Firebase RTDB REST API'sinin yerel taklidi")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--veri", help="Başlangıç verisi (JSON dosyası, ör. firebase_yedek.json)")
+    parser.add_argument("--gecikme", type=float, default=0.0, help="Her yanıta eklenen gecikme (sn)")
+    parser.add_argument("--sapma", type=float, default=0.0, help="Gecikmeye eklenen rastgele üst sınır (sn)")
+    parser.add_argument("--bant", type=int, default=0, help="Bant genişliği (bayt/sn, 0 = sınırsız)")
+    parser.add_argument("--hata-orani", type=float, default=0.0, help="503 döndürme olasılığı [0-1]")
+    parser.add_argument("--kopma-orani", type=float, default=0.0, help="Bağlantıyı koparma olasılığı [0-1]")
+    parser.add_argument("--ayrintili", action="store_true", help="İstekleri logla")
+    args = parser.parse_args()
+
+    veri = None
+    if args.veri:
+        with open(args.veri, "r", encoding="utf-8-sig") as f:
+            veri = json.load(f)
+
+    sunucu = YerelRTDB(
+        args.host, args.port, veri,
+        Ayarlar(args.gecikme, args.sapma, args.bant, args.hata_orani, args.kopma_orani),
+        ayrintili=args.ayrintili
+    )
+    print(f"[OK] Yerel RTDB: {sunucu.url}  (ANTKOLI_FIREBASE_URL={sunucu.url})")
+    try:
+        sunucu.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sunucu.durduruluyor.set()
+        sunucu.server_close()
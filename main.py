@@ -12,8 +12,6 @@ import os
 import sys
 import subprocess
 import threading
-import io
-import requests
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
@@ -21,12 +19,18 @@ from database import (
     init_db, get_aylik_kira, set_aylik_kira, satis_ekle,
     tum_satislari_getir, satis_sil, istatistikleri_getir, FIREBASE_DATABASE_URL,
     get_aylik_giderler, set_aylik_giderler, get_toplam_aylik_gider, AYLIK_GIDERLER,
-    tum_firmalari_getir, firma_ara, firma_istatistikleri_getir,
-    tum_verileri_yedekle, verileri_geri_yukle
+    tum_firmalari_getir, firma_ara, satislar_aralik,
+    baglantiyi_isit,
+    dinleyiciyi_baslat, dinleyici_canli, abone_ol, aktariciyi_baslat,
+    metrikleri_getir, metrikleri_sifirla, metrik_logunu_ac, metrik_logunu_kapat, metrik_logu_acik,
+    cevrimici, baglantiyi_yokla, bekleyen_islem_sayisi, satis_sayfasi, GECMIS_SAYFA_BOYUTU
 )
-import json
 from tkinter import filedialog
-from updater import auto_check_updates, show_update_dialog, CURRENT_VERSION
+from updater import show_update_dialog, auto_check_updates, CURRENT_VERSION
+import backup
+import flags
+import tasks
+from search_index import turkce_siralama_anahtari
 
 
 # Global cache - veriler arka planda yüklenir
@@ -38,6 +42,12 @@ def refresh_cache():
     """Cache'i arka planda yenile"""
     global _satislar_cache, _firmalar_cache, _cache_loaded
     try:
+        # İlk açılışta ağı beklemeden diskteki yerel aynadan doldur
+        if not _cache_loaded:
+            _satislar_cache = tum_satislari_getir(senkronize=False)
+            _firmalar_cache = tum_firmalari_getir(senkronize=False)
+            _cache_loaded = bool(_satislar_cache)
+        
         _satislar_cache = tum_satislari_getir()
         _firmalar_cache = tum_firmalari_getir()
         _cache_loaded = True
@@ -45,8 +55,8 @@ def refresh_cache():
         pass
 
 def start_cache_refresh():
-    """Cache yenilemeyi arka planda başlat"""
-    threading.Thread(target=refresh_cache, daemon=True).start()
+    """Cache yenilemeyi arka planda başlat (süren bir yenileme varsa ona katılır)"""
+    tasks.gonder(refresh_cache, anahtar="cache_refresh", oncelik=tasks.ONCELIK_ARKA_PLAN)
 
 
 # Uygulama dizini (exe için)
@@ -134,6 +144,26 @@ def format_number(number):
     return str(number)
 
 
+def create_value_column(parent, baslik, text_color=None):
+    """Başlık + değer etiketi sütunu oluşturur, değer etiketini döndürür"""
+    frame = ctk.CTkFrame(parent, fg_color="transparent")
+    frame.pack(side="left", padx=15)
+    
+    ctk.CTkLabel(
+        frame, text=baslik,
+        font=ctk.CTkFont(size=11),
+        text_color=COLORS['text_muted']
+    ).pack()
+    
+    label = ctk.CTkLabel(
+        frame, text="",
+        font=ctk.CTkFont(size=14, weight="bold"),
+        text_color=text_color or COLORS['text_secondary']
+    )
+    label.pack()
+    return label
+
+
 class StatCard(ctk.CTkFrame):
     """İstatistik kartı widget'ı"""
     def __init__(self, parent, icon, label, value, value_color=None):
@@ -166,6 +196,154 @@ class StatCard(ctk.CTkFrame):
             self.value_label.configure(text_color=color)
 
 
+class VirtualList(ctk.CTkFrame):
+    """
+    Sanal kaydırmalı liste - yalnızca görünen (ve çevresindeki birkaç)
+    satır için widget üretir, kaydırdıkça aynı widget'ları yeni satırlara
+    bağlar. Açılış süresi ve bellek kullanımı liste uzunluğundan bağımsızdır.
+    
+    create_row(parent) -> widget   : havuz için satır widget'ı üretir
+    bind_row(widget, item, index)  : widget'ı verilen satırı gösterecek şekilde günceller
+    """
+    TAMPON_SATIR = 3        # Görünür alanın üstünde / altında hazır tutulan satır
+    KAYDIRMA_ADIMI = 20     # Tekerlek / ok tuşu adımı (piksel)
+    
+    def __init__(self, parent, row_height, create_row, bind_row, row_gap=10,
+                 on_near_end=None, near_end_rows=None, **kwargs):
+        super().__init__(parent, fg_color="transparent", **kwargs)
+        self.row_height = row_height
+        self.row_gap = row_gap
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.on_near_end = on_near_end   # Sona yaklaşınca çağrılır (sonsuz kaydırma)
+        self.near_end_rows = self.TAMPON_SATIR if near_end_rows is None else near_end_rows
+        self.items = []
+        self._rows = []                  # Havuz: [widget, canvas öğesi, bağlı olduğu index]
+        self._render_job = None
+        
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        
+        self.canvas = tk.Canvas(
+            self, bg=COLORS['bg_dark'], highlightthickness=0, bd=0,
+            yscrollincrement=self.KAYDIRMA_ADIMI
+        )
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.canvas.configure(yscrollcommand=self._on_canvas_scroll)
+        self.canvas.bind("<Configure>", lambda e: self._schedule_render(resize=True))
+        self._bind_wheel(self.canvas)
+    
+    # ---------- veri ----------
+    
+    def set_items(self, items, keep_position=True):
+        """Satır modelini değiştirir; yalnızca görünen satırlar yeniden bağlanır"""
+        self.items = items
+        for row in self._rows:
+            row[2] = None
+        self._update_scrollregion()
+        if not keep_position:
+            self.canvas.yview_moveto(0)
+        self._render()
+    
+    def refresh_item(self, index):
+        """Tek satırın verisi değiştiyse (görünüyorsa) yeniden bağlar"""
+        for row in self._rows:
+            if row[2] == index:
+                row[2] = None
+        self._render()
+    
+    # ---------- kaydırma ----------
+    
+    def _bind_wheel(self, widget):
+        """Tekerlek olaylarını widget ve tüm alt widget'larında listeye yönlendirir"""
+        widget.bind("<MouseWheel>", self._on_wheel, add="+")
+        widget.bind("<Button-4>", self._on_wheel, add="+")
+        widget.bind("<Button-5>", self._on_wheel, add="+")
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
+    
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4:
+            adim = -3
+        elif getattr(event, "num", None) == 5:
+            adim = 3
+        elif event.delta:
+            # Windows: 120'nin katları, macOS: küçük değerler
+            adim = -3 * (event.delta // 120) if abs(event.delta) >= 120 else -event.delta
+        else:
+            return
+        self.canvas.yview_scroll(int(adim), "units")
+        return "break"
+    
+    def _on_scrollbar(self, *args):
+        self.canvas.yview(*args)
+    
+    def _on_canvas_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._schedule_render()
+    
+    def _update_scrollregion(self):
+        yukseklik = len(self.items) * self.row_height
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), yukseklik))
+    
+    # ---------- çizim ----------
+    
+    def _schedule_render(self, resize=False):
+        """Ardışık kaydırma olaylarını tek çizimde birleştirir"""
+        if resize:
+            self._update_scrollregion()
+            genislik = self.canvas.winfo_width()
+            for widget, oge, _ in self._rows:
+                self.canvas.itemconfigure(oge, width=genislik)
+        if self._render_job is None:
+            self._render_job = self.after_idle(self._render)
+    
+    def _render(self):
+        self._render_job = None
+        if not self.winfo_exists():
+            return
+        
+        adet = len(self.items)
+        ust = self.canvas.canvasy(0)
+        gorunur = max(1, self.canvas.winfo_height())
+        ilk = max(0, int(ust // self.row_height) - self.TAMPON_SATIR)
+        son = min(adet, int((ust + gorunur) // self.row_height) + 1 + self.TAMPON_SATIR)
+        
+        # Havuz görünür satır + tampon kadar büyür; küçülmez
+        gereken = gorunur // self.row_height + 2 + 2 * self.TAMPON_SATIR
+        if gereken > len(self._rows):
+            for row in self._rows:
+                row[2] = None   # Havuz boyutu değişti: yuvalar yeniden dağıtılır
+            while len(self._rows) < gereken:
+                widget = self.create_row(self.canvas)
+                self._bind_wheel(widget)
+                oge = self.canvas.create_window(
+                    0, 0, anchor="nw", window=widget, state="hidden",
+                    width=self.canvas.winfo_width(), height=self.row_height - self.row_gap
+                )
+                self._rows.append([widget, oge, None])
+        
+        # index % havuz boyutu yuvası: kaydırmada yalnızca görünüme yeni giren satırlar bağlanır
+        havuz = len(self._rows)
+        kullanilan = set()
+        for index in range(ilk, son):
+            yuva = index % havuz
+            kullanilan.add(yuva)
+            row = self._rows[yuva]
+            if row[2] != index:
+                self.bind_row(row[0], self.items[index], index)
+                row[2] = index
+                self.canvas.coords(row[1], 0, index * self.row_height)
+            self.canvas.itemconfigure(row[1], state="normal")
+        for yuva, row in enumerate(self._rows):
+            if yuva not in kullanilan:
+                self.canvas.itemconfigure(row[1], state="hidden")
+                row[2] = None
+        
+        if self.on_near_end and adet and son >= adet - self.near_end_rows:
+            self.on_near_end()
+
+
 class NewSaleWindow(ctk.CTkToplevel):
     """Yeni satış penceresi"""
     def __init__(self, parent, on_save_callback):
@@ -509,17 +687,19 @@ class NewSaleWindow(ctk.CTkToplevel):
             self.ulke_dropdown.event_generate('<Down>')
     
     def load_firma_cache(self):
-        """Firmaları arka planda cache'e yükle (thread ile)"""
-        def fetch():
-            try:
-                firmalar = tum_firmalari_getir()
-                self.firma_cache = firmalar
-                self.firma_cache_loaded = True
-            except:
-                self.firma_cache = []
-                self.firma_cache_loaded = True
+        """Firmaları arka planda cache'e yükle (firma listesiyle aynı istek paylaşılır)"""
+        def yuklendi(firmalar):
+            self.firma_cache = firmalar
+            self.firma_cache_loaded = True
+        
+        def basarisiz(_hata):
+            self.firma_cache = []
+            self.firma_cache_loaded = True
         
-        threading.Thread(target=fetch, daemon=True).start()
+        tasks.gonder(
+            tum_firmalari_getir, anahtar="firmalar", sahip=self,
+            basarili=yuklendi, hata=basarisiz
+        )
     
     def on_firma_adi_change(self, event=None):
         """Firma adı değiştiğinde autocomplete önerilerini göster"""
@@ -533,9 +713,8 @@ class NewSaleWindow(ctk.CTkToplevel):
         if not self.firma_cache_loaded:
             return
         
-        # Cache'den ara (hızlı, Firebase'e gitmez)
-        arama_lower = arama.lower()
-        oneriler = [f for f in self.firma_cache if arama_lower in f['firma_adi'].lower()][:10]
+        # Bellek içi firma indeksinden ara (hızlı, Firebase'e gitmez)
+        oneriler = firma_ara(arama)
         
         if not oneriler:
             self.hide_autocomplete()
@@ -748,8 +927,8 @@ class NewSaleWindow(ctk.CTkToplevel):
         
         result = self.calculation_result
         
-        # Veritabanına kaydet
-        satis_ekle(
+        # Veritabanına kaydet (yerel kuyruğa yazılır, arka planda gönderilir)
+        satis_id = satis_ekle(
             firma_adi=result['firma_adi'],
             malzeme_gideri=result['malzeme_gideri'],
             toplam_satis_tutari=result['toplam_satis'],
@@ -762,6 +941,10 @@ class NewSaleWindow(ctk.CTkToplevel):
             ulke=result['ulke']
         )
         
+        if not satis_id:
+            messagebox.showerror("Hata", "Satış kaydedilemedi!")
+            return
+        
         messagebox.showinfo("Başarılı", "Satış kaydı başarıyla eklendi!")
         
         # Callback'i çağır ve pencereyi kapat
@@ -897,14 +1080,12 @@ class SettingsWindow(ctk.CTkToplevel):
 
 
 class SaleCard(ctk.CTkFrame):
-    """Satış kartı widget'ı"""
+    """Satış kartı widget'ı (sanal listede farklı satışlara yeniden bağlanabilir)"""
     
-    # Bayrak cache (sınıf düzeyinde paylaşımlı)
-    _flag_cache = {}
-    
-    def __init__(self, parent, satis_data, on_delete):
+    def __init__(self, parent, satis_data=None, on_delete=None):
         super().__init__(parent, fg_color=COLORS['bg_card'], corner_radius=12)
-        self.satis_id = satis_data['id']
+        self.satis_id = None
+        self.ulke_kodu = None
         self.on_delete = on_delete
         
         # Ana içerik
@@ -916,35 +1097,30 @@ class SaleCard(ctk.CTkFrame):
         left_frame.pack(side="left", fill="y")
         
         # Firma adı
-        firma_label = ctk.CTkLabel(
-            left_frame, text=f"🏢 {satis_data['firma_adi']}",
+        self.firma_label = ctk.CTkLabel(
+            left_frame, text="",
             font=ctk.CTkFont(size=16, weight="bold"),
             text_color=COLORS['text_primary'],
             anchor="w"
         )
-        firma_label.pack(anchor="w")
+        self.firma_label.pack(anchor="w")
         
         # Tarih ve bayrak satırı
         tarih_row = ctk.CTkFrame(left_frame, fg_color="transparent")
         tarih_row.pack(anchor="w", pady=(2, 0))
         
-        tarih = satis_data['tarih'][:10] if satis_data.get('tarih') else "-"
-        tarih_label = ctk.CTkLabel(
-            tarih_row, text=f"📅 {tarih}",
+        self.tarih_label = ctk.CTkLabel(
+            tarih_row, text="",
             font=ctk.CTkFont(size=12),
             text_color=COLORS['text_muted'],
             anchor="w"
         )
-        tarih_label.pack(side="left", padx=(0, 10))
+        self.tarih_label.pack(side="left", padx=(0, 10))
         
         # Bayrak için label (tarih satırında)
-        ulke_kodu = satis_data.get('ulke', 'TR')
         self.flag_label = ctk.CTkLabel(tarih_row, text="", width=24)
         self.flag_label.pack(side="left")
         
-        # Bayrağı arka planda yükle
-        self.load_flag(ulke_kodu)
-        
         # Sağ taraf - Değerler
         right_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
         right_frame.pack(side="right", fill="y")
@@ -952,59 +1128,10 @@ class SaleCard(ctk.CTkFrame):
         values_frame = ctk.CTkFrame(right_frame, fg_color="transparent")
         values_frame.pack(side="left", padx=(0, 20))
         
-        # Satış Tutarı
-        satis_frame = ctk.CTkFrame(values_frame, fg_color="transparent")
-        satis_frame.pack(side="left", padx=15)
-        
-        ctk.CTkLabel(
-            satis_frame, text="Satış Tutarı",
-            font=ctk.CTkFont(size=11),
-            text_color=COLORS['text_muted']
-        ).pack()
-        
-        ctk.CTkLabel(
-            satis_frame, text=f"{format_number(satis_data['toplam_satis_tutari'])} ₺",
-            font=ctk.CTkFont(size=14, weight="bold"),
-            text_color=COLORS['text_secondary']
-        ).pack()
-        
-        # Net Kar/Zarar
-        kar_frame = ctk.CTkFrame(values_frame, fg_color="transparent")
-        kar_frame.pack(side="left", padx=15)
-        
-        ctk.CTkLabel(
-            kar_frame, text="Net Kar/Zarar",
-            font=ctk.CTkFont(size=11),
-            text_color=COLORS['text_muted']
-        ).pack()
-        
-        kar = satis_data['net_kar']
-        kar_color = COLORS['success'] if kar >= 0 else COLORS['danger']
-        kar_text = f"+{format_number(kar)} ₺" if kar >= 0 else f"{format_number(kar)} ₺"
-        
-        ctk.CTkLabel(
-            kar_frame, text=kar_text,
-            font=ctk.CTkFont(size=14, weight="bold"),
-            text_color=kar_color
-        ).pack()
-        
-        # Kar Oranı
-        oran_frame = ctk.CTkFrame(values_frame, fg_color="transparent")
-        oran_frame.pack(side="left", padx=15)
-        
-        ctk.CTkLabel(
-            oran_frame, text="Kar Oranı",
-            font=ctk.CTkFont(size=11),
-            text_color=COLORS['text_muted']
-        ).pack()
-        
-        oran_color = COLORS['success'] if satis_data['kar_yuzdesi'] >= 0 else COLORS['danger']
-        
-        ctk.CTkLabel(
-            oran_frame, text=f"%{satis_data['kar_yuzdesi']:.1f}",
-            font=ctk.CTkFont(size=14, weight="bold"),
-            text_color=oran_color
-        ).pack()
+        # Satış Tutarı / Net Kar/Zarar / Kar Oranı
+        self.satis_label = create_value_column(values_frame, "Satış Tutarı")
+        self.kar_label = create_value_column(values_frame, "Net Kar/Zarar")
+        self.oran_label = create_value_column(values_frame, "Kar Oranı")
         
         # Sil butonu
         delete_btn = ctk.CTkButton(
@@ -1018,29 +1145,42 @@ class SaleCard(ctk.CTkFrame):
             command=self.delete_sale
         )
         delete_btn.pack(side="right")
+        
+        if satis_data is not None:
+            self.set_data(satis_data)
+    
+    def set_data(self, satis_data):
+        """Kartı verilen satışı gösterecek şekilde günceller"""
+        self.satis_id = satis_data['id']
+        
+        self.firma_label.configure(text=f"🏢 {satis_data['firma_adi']}")
+        tarih = satis_data['tarih'][:10] if satis_data.get('tarih') else "-"
+        self.tarih_label.configure(text=f"📅 {tarih}")
+        
+        self.satis_label.configure(text=f"{format_number(satis_data['toplam_satis_tutari'])} ₺")
+        
+        kar = satis_data['net_kar']
+        kar_color = COLORS['success'] if kar >= 0 else COLORS['danger']
+        kar_text = f"+{format_number(kar)} ₺" if kar >= 0 else f"{format_number(kar)} ₺"
+        self.kar_label.configure(text=kar_text, text_color=kar_color)
+        
+        oran_color = COLORS['success'] if satis_data['kar_yuzdesi'] >= 0 else COLORS['danger']
+        self.oran_label.configure(text=f"%{satis_data['kar_yuzdesi']:.1f}", text_color=oran_color)
+        
+        ulke_kodu = satis_data.get('ulke', 'TR')
+        if ulke_kodu != self.ulke_kodu:
+            self.ulke_kodu = ulke_kodu
+            self.flag_label.configure(image=flags.bos_bayrak(), text="")
+            self.load_flag(ulke_kodu)
     
     def load_flag(self, country_code):
-        """Bayrağı yükle"""
-        if country_code in SaleCard._flag_cache:
-            img = SaleCard._flag_cache[country_code]
-            if img:
+        """Bayrağı paylaşılan bayrak servisinden yükle (ağ yalnızca arka planda)"""
+        def goster(img):
+            # Kart bu sürede başka bir satışa bağlanmış olabilir
+            if self.ulke_kodu == country_code:
                 self.flag_label.configure(image=img, text="")
-            return
         
-        def fetch():
-            try:
-                url = f"https://flagcdn.com/w40/{country_code.lower()}.png"
-                response = requests.get(url, timeout=2)
-                if response.status_code == 200:
-                    img_data = io.BytesIO(response.content)
-                    pil_image = Image.open(img_data)
-                    ctk_image = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=(24, 16))
-                    SaleCard._flag_cache[country_code] = ctk_image
-                    self.after(0, lambda: self.flag_label.configure(image=ctk_image, text=""))
-            except:
-                SaleCard._flag_cache[country_code] = None
-        
-        threading.Thread(target=fetch, daemon=True).start()
+        flags.bayrak_iste(self, country_code, goster)
     
     def delete_sale(self):
         if messagebox.askyesno("Onay", "Bu satışı silmek istediğinizden emin misiniz?"):
@@ -1060,7 +1200,7 @@ class FirmaDetayWindow(ctk.CTkToplevel):
         self.firma_adi = firma_adi
         self.current_year = datetime.now().year  # Mevcut yıl
         self.selected_year = self.current_year   # Seçili yıl
-        self.all_sales_data = None               # Tüm satış verileri
+        self.all_sales_data = None               # Seçili yılın satışları
         
         self.title(f"📊 {firma_adi} - Satış Detayları")
         self.geometry("900x750")
@@ -1167,32 +1307,36 @@ class FirmaDetayWindow(ctk.CTkToplevel):
         self.table_frame.pack(fill="x")
     
     def load_data(self):
-        """Firma verilerini yükle"""
-        def fetch():
-            try:
-                data = firma_istatistikleri_getir(self.firma_adi)
-                self.after(0, lambda: self.display_data(data))
-            except Exception as e:
-                print(f"Veri yükleme hatası: {e}")
-                self.after(0, lambda: self.display_data(None))
+        """Seçili yılın firma satışlarını yükle (yalnızca o yılın aralığı sorgulanır)"""
+        yil = self.selected_year
         
-        threading.Thread(target=fetch, daemon=True).start()
+        def basarisiz(e):
+            print(f"Veri yükleme hatası: {e}")
+            self.display_data(yil, None)
+        
+        tasks.gonder(
+            satislar_aralik, datetime(yil, 1, 1), datetime(yil, 12, 31, 23, 59, 59, 999000),
+            firma=self.firma_adi,
+            anahtar=("firma_yili", self.firma_adi, yil), sahip=self,
+            basarili=lambda satislar: self.display_data(yil, satislar), hata=basarisiz
+        )
     
-    def display_data(self, data):
+    def display_data(self, yil, satislar):
         """Verileri göster"""
-        if not data:
+        if yil != self.selected_year:
+            return  # Bu arada başka bir yıl seçildi
+        
+        if satislar is None:
             self.stats_label.configure(text="Veri bulunamadı")
             return
         
-        # Tüm satış verilerini sakla
-        self.all_sales_data = data
-        
-        # Seçili yıl için verileri göster
+        # Seçili yılın satışlarını sakla
+        self.all_sales_data = satislar
         self.update_year_display()
     
     def update_year_display(self):
         """Seçili yıla göre verileri güncelle"""
-        if not self.all_sales_data:
+        if self.all_sales_data is None:
             return
         
         # Yıl etiketini güncelle
@@ -1204,23 +1348,7 @@ class FirmaDetayWindow(ctk.CTkToplevel):
         else:
             self.next_year_btn.configure(state="normal")
         
-        # Seçili yıla göre satışları filtrele
-        yil_satislari = []
-        for satis in self.all_sales_data['satislar']:
-            tarih = satis.get('tarih', '')
-            if not tarih:
-                continue
-            try:
-                parts = tarih.split(' ')[0].split('-')
-                if len(parts[0]) == 4:  # YYYY-MM-DD
-                    yil = int(parts[0])
-                else:  # DD-MM-YYYY
-                    yil = int(parts[2])
-                
-                if yil == self.selected_year:
-                    yil_satislari.append(satis)
-            except:
-                continue
+        yil_satislari = self.all_sales_data
         
         # Yıl istatistiklerini hesapla
         toplam_satis = len(yil_satislari)
@@ -1244,16 +1372,21 @@ class FirmaDetayWindow(ctk.CTkToplevel):
         # Tablo oluştur
         self.create_table(aylik_veriler)
     
+    def change_year(self, yil):
+        """Yılı değiştir ve o yılın verilerini yükle"""
+        self.selected_year = yil
+        self.year_label.configure(text=f"📅 {self.selected_year}")
+        self.stats_label.configure(text="Yükleniyor...")
+        self.load_data()
+    
     def prev_year(self):
         """Önceki yıla git"""
-        self.selected_year -= 1
-        self.update_year_display()
+        self.change_year(self.selected_year - 1)
     
     def next_year(self):
         """Sonraki yıla git"""
         if self.selected_year < self.current_year:
-            self.selected_year += 1
-            self.update_year_display()
+            self.change_year(self.selected_year + 1)
     
     def hesapla_aylik_veriler(self, satislar):
         """Satışları seçili yılın aylarına göre grupla"""
@@ -1266,26 +1399,13 @@ class FirmaDetayWindow(ctk.CTkToplevel):
         
         # Satışları aylara dağıt
         for satis in satislar:
-            tarih = satis.get('tarih', '')
-            if not tarih:
-                continue
-            
-            try:
-                # Tarih formatını kontrol et (DD-MM-YYYY veya YYYY-MM-DD)
-                if '-' in tarih:
-                    parts = tarih.split(' ')[0].split('-')
-                    if len(parts[0]) == 4:  # YYYY-MM-DD
-                        yil, ay = int(parts[0]), int(parts[1])
-                    else:  # DD-MM-YYYY
-                        yil, ay = int(parts[2]), int(parts[1])
-                    
-                    key = f"{yil}-{ay:02d}"
-                    if key in aylik:
-                        aylik[key]['satis'] += 1
-                        aylik[key]['ciro'] += satis.get('toplam_satis_tutari', 0)
-                        aylik[key]['kar'] += satis.get('net_kar', 0)
-            except:
+            if not satis.get('ay'):
                 continue
+            key = f"{satis['yil']}-{satis['ay']:02d}"
+            if key in aylik:
+                aylik[key]['satis'] += 1
+                aylik[key]['ciro'] += satis.get('toplam_satis_tutari', 0)
+                aylik[key]['kar'] += satis.get('net_kar', 0)
         
         # Sıralı liste olarak döndür (Ocak'tan Aralık'a)
         sonuc = []
@@ -1438,8 +1558,95 @@ class FirmaDetayWindow(ctk.CTkToplevel):
             ).pack(side="left", expand=True, fill="x", padx=10, pady=10)
 
 
+class FirmaRow(ctk.CTkFrame):
+    """Firma listesi satırı (sanal listede farklı firmalara yeniden bağlanabilir)"""
+    
+    # Bayrak yükleme satış kartlarıyla ortak
+    load_flag = SaleCard.load_flag
+    
+    def __init__(self, parent, on_click):
+        super().__init__(parent, fg_color=COLORS['bg_card'], corner_radius=10)
+        self.firma_adi = None
+        self.ulke_kodu = None
+        
+        # Tıklama özelliği ekle
+        self.bind("<Button-1>", lambda e: self.firma_adi and on_click(self.firma_adi))
+        self.configure(cursor="hand2")
+        
+        # Ana içerik
+        content = ctk.CTkFrame(self, fg_color="transparent")
+        content.pack(fill="x", padx=15, pady=12)
+        content.bind("<Button-1>", lambda e: self.firma_adi and on_click(self.firma_adi))
+        
+        # Sol - Firma adı ve ülke
+        left = ctk.CTkFrame(content, fg_color="transparent")
+        left.pack(side="left", fill="y")
+        
+        self.firma_label = ctk.CTkLabel(
+            left, text="",
+            font=ctk.CTkFont(size=15, weight="bold"),
+            text_color=COLORS['text_primary'],
+            anchor="w"
+        )
+        self.firma_label.pack(anchor="w")
+        
+        # Ülke satırı (bayrak + isim)
+        ulke_frame = ctk.CTkFrame(left, fg_color="transparent")
+        ulke_frame.pack(anchor="w", pady=(2, 0))
+        
+        self.flag_label = ctk.CTkLabel(ulke_frame, text="", width=24)
+        self.flag_label.pack(side="left", padx=(0, 6))
+        
+        self.ulke_label = ctk.CTkLabel(
+            ulke_frame, text="",
+            font=ctk.CTkFont(size=12),
+            text_color=COLORS['text_muted'],
+            anchor="w"
+        )
+        self.ulke_label.pack(side="left")
+        
+        # Sağ - İstatistikler
+        stats_container = ctk.CTkFrame(content, fg_color="transparent")
+        stats_container.pack(side="right")
+        
+        self.satis_label = create_value_column(stats_container, "Satış", COLORS['primary_light'])
+        self.ciro_label = create_value_column(stats_container, "Ciro")
+        self.kar_label = create_value_column(stats_container, "Kar")
+    
+    def set_data(self, firma, ulke_adi):
+        """Satırı verilen firmayı gösterecek şekilde günceller"""
+        self.firma_adi = firma['firma_adi']
+        self.firma_label.configure(text=f"🏢 {firma['firma_adi']}")
+        self.ulke_label.configure(text=ulke_adi)
+        
+        self.satis_label.configure(text=str(firma['toplam_satis']))
+        self.ciro_label.configure(text=f"{format_number(firma['toplam_ciro'])} ₺")
+        
+        kar = firma['toplam_kar']
+        kar_color = COLORS['success'] if kar >= 0 else COLORS['danger']
+        kar_text = f"+{format_number(kar)} ₺" if kar >= 0 else f"{format_number(kar)} ₺"
+        self.kar_label.configure(text=kar_text, text_color=kar_color)
+        
+        ulke_kodu = firma['ulke']
+        if ulke_kodu != self.ulke_kodu:
+            self.ulke_kodu = ulke_kodu
+            self.flag_label.configure(image=flags.bos_bayrak(), text="")
+            self.load_flag(ulke_kodu)
+
+
 class FirmaListesiWindow(ctk.CTkToplevel):
     """Firma listesi ve istatistikleri penceresi"""
+    
+    ROW_HEIGHT = 80  # Satır yüksekliği + aralık (piksel)
+    # Sıralama seçenekleri: etiket -> (alan, varsayılan olarak azalan mı)
+    SORT_OPTIONS = {
+        "Satış": ("satis", True),
+        "Ciro": ("ciro", True),
+        "Kar": ("kar", True),
+        "Ad": ("ad", False),
+        "Ülke": ("ulke", False),
+    }
+    
     def __init__(self, parent):
         super().__init__(parent)
         
@@ -1447,8 +1654,12 @@ class FirmaListesiWindow(ctk.CTkToplevel):
         self.geometry("750x600")
         self.configure(fg_color=COLORS['bg_dark'])
         
-        # Bayrak cache
-        self.flag_cache = {}
+        self.ulke_dict = {code: name for code, name in ULKELER}
+        self.firmalar = []
+        self.sort_values = {}   # alan -> firma sırasıyla hazır sıralama anahtarları
+        self.sorted_cache = {}  # (alan, azalan) -> sıralı firma listesi
+        self.name_order = None  # Ada göre sıralı firma indeksleri (eşitlik bozucu)
+        self.sort_field, self.sort_descending = self.SORT_OPTIONS["Satış"]
         
         self.transient(parent)
         
@@ -1456,25 +1667,6 @@ class FirmaListesiWindow(ctk.CTkToplevel):
         self.load_firmalar()
         self.center_window()
     
-    def get_flag_image(self, country_code):
-        """Ülke bayrağını indir ve CTkImage olarak döndür"""
-        if country_code in self.flag_cache:
-            return self.flag_cache[country_code]
-        
-        try:
-            url = f"https://flagcdn.com/w40/{country_code.lower()}.png"
-            response = requests.get(url, timeout=2)
-            if response.status_code == 200:
-                img_data = io.BytesIO(response.content)
-                pil_image = Image.open(img_data)
-                ctk_image = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=(24, 16))
-                self.flag_cache[country_code] = ctk_image
-                return ctk_image
-        except:
-            pass
-        
-        return None
-    
     def center_window(self):
         self.update_idletasks()
         width = self.winfo_width()
@@ -1539,26 +1731,57 @@ class FirmaListesiWindow(ctk.CTkToplevel):
         )
         self.stats_label.pack(pady=12)
         
-        # Firma listesi (scrollable)
-        self.firma_frame = ctk.CTkScrollableFrame(
-            main_frame, fg_color="transparent",
-            corner_radius=0
+        # Sıralama çubuğu
+        sort_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
+        sort_frame.pack(fill="x", pady=(0, 10))
+        
+        ctk.CTkLabel(
+            sort_frame, text="Sırala:",
+            font=ctk.CTkFont(size=13),
+            text_color=COLORS['text_secondary']
+        ).pack(side="left", padx=(0, 10))
+        
+        self.sort_selector = ctk.CTkSegmentedButton(
+            sort_frame, values=list(self.SORT_OPTIONS),
+            font=ctk.CTkFont(size=12),
+            selected_color=COLORS['primary'],
+            selected_hover_color=COLORS['primary_light'],
+            command=self.on_sort_change
         )
-        self.firma_frame.pack(fill="both", expand=True)
+        self.sort_selector.set("Satış")
+        self.sort_selector.pack(side="left")
+        
+        self.direction_btn = ctk.CTkButton(
+            sort_frame, text="↓",
+            font=ctk.CTkFont(size=14, weight="bold"),
+            fg_color=COLORS['bg_card'],
+            hover_color=COLORS['bg_elevated'],
+            width=35,
+            height=28,
+            corner_radius=8,
+            command=self.toggle_sort_direction
+        )
+        self.direction_btn.pack(side="left", padx=(10, 0))
+        
+        # Firma listesi (sanal: yalnızca görünen satırlar oluşturulur)
+        self.firma_list = VirtualList(
+            main_frame, row_height=self.ROW_HEIGHT, row_gap=8,
+            create_row=lambda parent: FirmaRow(parent, on_click=self.open_firma_detay),
+            bind_row=lambda row, firma, index: row.set_data(
+                firma, self.ulke_dict.get(firma['ulke'], firma['ulke'])
+            )
+        )
+        self.firma_list.pack(fill="both", expand=True)
         
         # Boş mesaj
         self.empty_label = ctk.CTkLabel(
-            self.firma_frame,
+            main_frame,
             text="📭 Henüz firma kaydı bulunmuyor",
             font=ctk.CTkFont(size=16),
             text_color=COLORS['text_muted']
         )
     
     def load_firmalar(self):
-        # Mevcut içeriği temizle
-        for widget in self.firma_frame.winfo_children():
-            widget.destroy()
-        
         # Cache varsa direkt göster
         global _firmalar_cache, _cache_loaded
         if _cache_loaded and _firmalar_cache:
@@ -1568,31 +1791,27 @@ class FirmaListesiWindow(ctk.CTkToplevel):
             return
         
         # Cache yoksa arka planda yükle
-        def fetch():
-            try:
-                firmalar = tum_firmalari_getir()
-                self.after(0, lambda: self._display_firmalar(firmalar))
-            except Exception as e:
-                self.after(0, lambda: self._display_firmalar([]))
-        
-        threading.Thread(target=fetch, daemon=True).start()
+        tasks.gonder(
+            tum_firmalari_getir, anahtar="firmalar", sahip=self,
+            basarili=self._display_firmalar, hata=lambda e: self._display_firmalar([])
+        )
     
     def _display_firmalar(self, firmalar):
         """Firmaları göster (ana thread'de)"""
-        # Mevcut içeriği temizle
-        for widget in self.firma_frame.winfo_children():
-            widget.destroy()
+        if not self.winfo_exists():
+            return
+        
+        self.firmalar = firmalar
+        self.sort_values = self._build_sort_values(firmalar)
+        self.sorted_cache = {}
+        self.name_order = None
         
         if not firmalar:
-            self.empty_label = ctk.CTkLabel(
-                self.firma_frame,
-                text="📭 Henüz firma kaydı bulunmuyor",
-                font=ctk.CTkFont(size=16),
-                text_color=COLORS['text_muted']
-            )
-            self.empty_label.pack(pady=50)
+            self.empty_label.place(relx=0.5, rely=0.4, anchor="center")
             self.stats_label.configure(text="Toplam: 0 firma")
+            self.firma_list.set_items([])
             return
+        self.empty_label.place_forget()
         
         # İstatistik özeti
         toplam_firma = len(firmalar)
@@ -1605,119 +1824,50 @@ class FirmaListesiWindow(ctk.CTkToplevel):
                  f"📈 Kar: {format_number(toplam_kar)} ₺"
         )
         
-        # Ülke adlarını al
-        ulke_dict = {code: name for code, name in ULKELER}
-        
-        # Firma kartlarını oluştur
-        for firma in firmalar:
-            self.create_firma_card(firma, ulke_dict)
+        self.firma_list.set_items(self._sorted_firmalar(self.sort_field, self.sort_descending))
     
-    def create_firma_card(self, firma, ulke_dict):
-        """Firma kartı oluştur"""
-        card = ctk.CTkFrame(self.firma_frame, fg_color=COLORS['bg_card'], corner_radius=10)
-        card.pack(fill="x", pady=(0, 8))
-        
-        # Tıklama özelliği ekle
-        firma_adi = firma['firma_adi']
-        card.bind("<Button-1>", lambda e, f=firma_adi: self.open_firma_detay(f))
-        card.configure(cursor="hand2")
-        
-        # Ana içerik
-        content = ctk.CTkFrame(card, fg_color="transparent")
-        content.pack(fill="x", padx=15, pady=12)
-        content.bind("<Button-1>", lambda e, f=firma_adi: self.open_firma_detay(f))
-        
-        # Sol - Firma adı ve ülke
-        left = ctk.CTkFrame(content, fg_color="transparent")
-        left.pack(side="left", fill="y")
-        
-        firma_label = ctk.CTkLabel(
-            left, text=f"🏢 {firma['firma_adi']}",
-            font=ctk.CTkFont(size=15, weight="bold"),
-            text_color=COLORS['text_primary'],
-            anchor="w"
-        )
-        firma_label.pack(anchor="w")
-        
-        # Ülke satırı (bayrak + isim)
-        ulke_frame = ctk.CTkFrame(left, fg_color="transparent")
-        ulke_frame.pack(anchor="w", pady=(2, 0))
-        
-        ulke_kodu = firma['ulke']
-        ulke_adi = ulke_dict.get(ulke_kodu, ulke_kodu)
-        
-        # Bayrak resmi
-        flag_img = self.get_flag_image(ulke_kodu)
-        if flag_img:
-            flag_label = ctk.CTkLabel(ulke_frame, image=flag_img, text="")
-            flag_label.pack(side="left", padx=(0, 6))
-        
-        ulke_label = ctk.CTkLabel(
-            ulke_frame, text=ulke_adi,
-            font=ctk.CTkFont(size=12),
-            text_color=COLORS['text_muted'],
-            anchor="w"
+    def _build_sort_values(self, firmalar):
+        """Her sıralama alanı için anahtarları bir kez hesaplar (veri değişene kadar geçerli)"""
+        return {
+            "satis": [f['toplam_satis'] for f in firmalar],
+            "ciro": [f['toplam_ciro'] for f in firmalar],
+            "kar": [f['toplam_kar'] for f in firmalar],
+            "ad": [turkce_siralama_anahtari(f['firma_adi']) for f in firmalar],
+            "ulke": [
+                turkce_siralama_anahtari(self.ulke_dict.get(f['ulke'], f['ulke']))
+                for f in firmalar
+            ],
+        }
+    
+    def _sorted_firmalar(self, field, descending):
+        """Sıralı firma listesi; her (alan, yön) için bir kez sıralanır"""
+        anahtar = (field, descending)
+        if anahtar not in self.sorted_cache:
+            if self.name_order is None:
+                self.name_order = sorted(range(len(self.firmalar)), key=self.sort_values["ad"].__getitem__)
+            # Eşit değerler ada göre sıralı kalır (sıralama kararlı)
+            if field == "ad":
+                sira = self.name_order[::-1] if descending else self.name_order
+            else:
+                sira = sorted(self.name_order, key=self.sort_values[field].__getitem__, reverse=descending)
+            self.sorted_cache[anahtar] = [self.firmalar[i] for i in sira]
+        return self.sorted_cache[anahtar]
+    
+    def on_sort_change(self, secim):
+        self.sort_field, self.sort_descending = self.SORT_OPTIONS[secim]
+        self._apply_sort()
+    
+    def toggle_sort_direction(self):
+        self.sort_descending = not self.sort_descending
+        self._apply_sort()
+    
+    def _apply_sort(self):
+        """Listeyi yeniden sırala; yalnızca görünen satırlar yeniden bağlanır"""
+        self.direction_btn.configure(text="↓" if self.sort_descending else "↑")
+        self.firma_list.set_items(
+            self._sorted_firmalar(self.sort_field, self.sort_descending),
+            keep_position=False
         )
-        ulke_label.pack(side="left")
-        
-        # Sağ - İstatistikler
-        right = ctk.CTkFrame(content, fg_color="transparent")
-        right.pack(side="right")
-        
-        stats_container = ctk.CTkFrame(right, fg_color="transparent")
-        stats_container.pack(side="left")
-        
-        # Satış sayısı
-        satis_frame = ctk.CTkFrame(stats_container, fg_color="transparent")
-        satis_frame.pack(side="left", padx=15)
-        
-        ctk.CTkLabel(
-            satis_frame, text="Satış",
-            font=ctk.CTkFont(size=11),
-            text_color=COLORS['text_muted']
-        ).pack()
-        
-        ctk.CTkLabel(
-            satis_frame, text=str(firma['toplam_satis']),
-            font=ctk.CTkFont(size=14, weight="bold"),
-            text_color=COLORS['primary_light']
-        ).pack()
-        
-        # Ciro
-        ciro_frame = ctk.CTkFrame(stats_container, fg_color="transparent")
-        ciro_frame.pack(side="left", padx=15)
-        
-        ctk.CTkLabel(
-            ciro_frame, text="Ciro",
-            font=ctk.CTkFont(size=11),
-            text_color=COLORS['text_muted']
-        ).pack()
-        
-        ctk.CTkLabel(
-            ciro_frame, text=f"{format_number(firma['toplam_ciro'])} ₺",
-            font=ctk.CTkFont(size=14, weight="bold"),
-            text_color=COLORS['text_secondary']
-        ).pack()
-        
-        # Kar
-        kar_frame = ctk.CTkFrame(stats_container, fg_color="transparent")
-        kar_frame.pack(side="left", padx=15)
-        
-        ctk.CTkLabel(
-            kar_frame, text="Kar",
-            font=ctk.CTkFont(size=11),
-            text_color=COLORS['text_muted']
-        ).pack()
-        
-        kar = firma['toplam_kar']
-        kar_color = COLORS['success'] if kar >= 0 else COLORS['danger']
-        kar_text = f"+{format_number(kar)} ₺" if kar >= 0 else f"{format_number(kar)} ₺"
-        
-        ctk.CTkLabel(
-            kar_frame, text=kar_text,
-            font=ctk.CTkFont(size=14, weight="bold"),
-            text_color=kar_color
-        ).pack()
     
     def open_firma_detay(self, firma_adi):
         """Firma detay penceresini aç"""
@@ -1726,10 +1876,20 @@ class FirmaListesiWindow(ctk.CTkToplevel):
 
 class SalesHistoryWindow(ctk.CTkToplevel):
     """Geçmiş satışlar penceresi"""
+    
+    ROW_HEIGHT = 92  # Kart yüksekliği + aralık (piksel)
+    PREFETCH_ROWS = GECMIS_SAYFA_BOYUTU // 2  # Sona bu kadar satır kala sonraki sayfa istenir
+    
     def __init__(self, parent, on_delete_callback):
         super().__init__(parent)
         self.on_delete_callback = on_delete_callback
         
+        # Sayfalama durumu
+        self.satislar = []
+        self.has_more = True
+        self.loading = False
+        self.generation = 0   # Yenilemede artar; eski isteklerin sonuçları atılır
+        
         self.title("📋 Geçmiş Satışlar")
         self.geometry("700x550")
         self.configure(fg_color=COLORS['bg_dark'])
@@ -1792,121 +1952,395 @@ class SalesHistoryWindow(ctk.CTkToplevel):
         )
         close_btn.pack(side="left")
         
-        # Satışlar listesi (scrollable)
-        self.sales_frame = ctk.CTkScrollableFrame(
-            main_frame, fg_color="transparent",
-            corner_radius=0
+        # Satışlar listesi (sanal: yalnızca görünen kartlar oluşturulur)
+        self.sales_list = VirtualList(
+            main_frame, row_height=self.ROW_HEIGHT,
+            create_row=lambda parent: SaleCard(parent, on_delete=self.refresh_all),
+            bind_row=lambda card, satis, index: card.set_data(satis),
+            on_near_end=self.load_next_page,
+            near_end_rows=self.PREFETCH_ROWS
         )
-        self.sales_frame.pack(fill="both", expand=True)
+        self.sales_list.pack(fill="both", expand=True)
         
         # Boş mesaj
         self.empty_label = ctk.CTkLabel(
-            self.sales_frame,
+            main_frame,
             text="📭 Henüz satış kaydı bulunmuyor",
             font=ctk.CTkFont(size=16),
             text_color=COLORS['text_muted']
         )
     
     def load_sales(self):
-        # Mevcut kartları temizle
-        for widget in self.sales_frame.winfo_children():
-            widget.destroy()
-        
-        # Cache varsa direkt göster
-        global _satislar_cache, _cache_loaded
-        if _cache_loaded and _satislar_cache:
-            self._display_sales(_satislar_cache)
-            # Arka planda güncelle
-            start_cache_refresh()
+        """En yeni sayfadan başlayarak yeniden yükle (yüklü satır sayısı korunur)"""
+        self.generation += 1
+        self.loading = False
+        adet = max(GECMIS_SAYFA_BOYUTU, len(self.satislar))
+        self._fetch_page(None, adet, reset=True)
+    
+    def load_next_page(self):
+        """Listenin sonuna yaklaşıldığında bir sonraki (daha eski) sayfayı ekle"""
+        if self.loading or not self.has_more or not self.satislar:
             return
-        
-        # Cache yoksa arka planda yükle
-        def fetch():
-            try:
-                satislar = tum_satislari_getir()
-                self.after(0, lambda: self._display_sales(satislar))
-            except:
-                self.after(0, lambda: self._display_sales([]))
-        
-        threading.Thread(target=fetch, daemon=True).start()
+        self._fetch_page(self.satislar[-1], GECMIS_SAYFA_BOYUTU)
+    
+    @staticmethod
+    def _page_key(once, adet, reset):
+        return ("satis_sayfasi", once['id'] if once else None, adet, reset)
+    
+    def _fetch_page(self, once, adet, reset=False):
+        self.loading = True
+        generation = self.generation
+        
+        def basarisiz(e):
+            print(f"[HATA] Satis sayfasi alinamadi: {e}")
+            self._page_failed(generation, reset)
+        
+        # İlk sayfa ağdan tazelenir, eski sayfalar önbellekten gelebilir.
+        # Önden yükleme sürüyorsa aynı anahtarla ona katılınır ve öne alınır.
+        tasks.gonder(
+            satis_sayfasi, once, adet, senkronize=reset,
+            anahtar=self._page_key(once, adet, reset), sahip=self,
+            basarili=lambda sonuc: self._page_loaded(generation, *sonuc, reset),
+            hata=basarisiz
+        )
+    
+    def _page_loaded(self, generation, kayitlar, devam, reset):
+        if generation != self.generation or not self.winfo_exists():
+            return
+        self.loading = False
+        self.has_more = devam
+        if reset:
+            self.satislar = kayitlar
+        else:
+            self.satislar.extend(kayitlar)
+        self._display_sales(self.satislar)
+        
+        # Bir sonraki sayfayı önden çek: kaydırma sona geldiğinde önbellekte hazır olur
+        if devam and kayitlar:
+            once = kayitlar[-1]
+            tasks.gonder(
+                satis_sayfasi, once, GECMIS_SAYFA_BOYUTU, senkronize=False,
+                anahtar=self._page_key(once, GECMIS_SAYFA_BOYUTU, False), sahip=self,
+                oncelik=tasks.ONCELIK_ONDEN_YUKLEME,
+                hata=lambda e: None     # Asıl istek sırasında yeniden denenir
+            )
+    
+    def _page_failed(self, generation, reset):
+        if generation != self.generation or not self.winfo_exists():
+            return
+        self.loading = False
+        if reset and not self.satislar:
+            self._display_sales([])
     
     def _display_sales(self, satislar):
         """Satışları göster (ana thread'de)"""
-        # Mevcut kartları temizle
-        for widget in self.sales_frame.winfo_children():
-            widget.destroy()
-        
-        if not satislar:
-            self.empty_label = ctk.CTkLabel(
-                self.sales_frame,
-                text="📭 Henüz satış kaydı bulunmuyor",
-                font=ctk.CTkFont(size=16),
-                text_color=COLORS['text_muted']
-            )
-            self.empty_label.pack(pady=50)
+        if not self.winfo_exists():
             return
         
-        # Satış kartlarını oluştur
-        for satis in satislar:
-            card = SaleCard(self.sales_frame, satis, self.refresh_all)
-            card.pack(fill="x", pady=(0, 10))
+        if satislar:
+            self.empty_label.place_forget()
+        else:
+            self.empty_label.place(relx=0.5, rely=0.3, anchor="center")
+        
+        # Kart yalnızca görünen satırlar için bağlanır; liste uzunluğu açılışı etkilemez
+        self.sales_list.set_items(satislar)
     
     def refresh_all(self):
-        # Cache'i yenile ve sonra göster
-        global _satislar_cache, _cache_loaded
+        # Pencereyi ağdan tazele, ana ekran önbelleğini de yenile
+        global _cache_loaded
         _cache_loaded = False
         start_cache_refresh()
-        self.after(500, self.load_sales)
+        self.load_sales()
         if self.on_delete_callback:
             self.on_delete_callback()
 
 
+class BackupProgressWindow(ctk.CTkToplevel):
+    """Yedekleme / geri yükleme ilerleme penceresi (iptal edilebilir)"""
+    def __init__(self, parent, title):
+        super().__init__(parent)
+        self.iptal = threading.Event()
+        
+        self.title(title)
+        self.geometry("380x190")
+        self.resizable(False, False)
+        self.configure(fg_color=COLORS['bg_dark'])
+        self.transient(parent)
+        self.grab_set()
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+        
+        self.title_label = ctk.CTkLabel(
+            self, text=title,
+            font=ctk.CTkFont(size=16, weight="bold"),
+            text_color=COLORS['text_primary']
+        )
+        self.title_label.pack(pady=(20, 10))
+        
+        self.progress = ctk.CTkProgressBar(self, width=300, height=16, mode="indeterminate")
+        self.progress.pack(pady=5)
+        self.progress.start()
+        
+        self.status_label = ctk.CTkLabel(
+            self, text="Başlatılıyor...",
+            font=ctk.CTkFont(size=13),
+            text_color=COLORS['text_secondary']
+        )
+        self.status_label.pack(pady=5)
+        
+        self.cancel_btn = ctk.CTkButton(
+            self, text="İptal",
+            fg_color=COLORS['bg_elevated'],
+            hover_color=COLORS['danger'],
+            width=100,
+            command=self.cancel
+        )
+        self.cancel_btn.pack(pady=(5, 15))
+        
+        self.update_idletasks()
+        x = (self.winfo_screenwidth() // 2) - 190
+        y = (self.winfo_screenheight() // 2) - 95
+        self.geometry(f'380x190+{x}+{y}')
+    
+    def set_status(self, text):
+        """Durum metnini günceller (arka plan thread'inden çağrılabilir)"""
+        self.after(0, lambda: self.winfo_exists() and self.status_label.configure(text=text))
+    
+    def cancel(self):
+        self.iptal.set()
+        self.status_label.configure(text="İptal ediliyor...")
+        self.cancel_btn.configure(state="disabled")
+
+
+class DiagnosticsWindow(ctk.CTkToplevel):
+    """Tanılama penceresi - istek süreleri, boyutlar, hatalar ve hesaplama süreleri"""
+    
+    YENILEME_ARALIGI = 2000  # ms
+    
+    def __init__(self, parent):
+        super().__init__(parent)
+        
+        self.title("📈 Tanılama")
+        self.geometry("900x560")
+        self.configure(fg_color=COLORS['bg_dark'])
+        
+        self.transient(parent)
+        
+        self.create_widgets()
+        self.refresh()
+        self.center_window()
+    
+    def center_window(self):
+        self.update_idletasks()
+        width = self.winfo_width()
+        height = self.winfo_height()
+        x = (self.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.winfo_screenheight() // 2) - (height // 2)
+        self.geometry(f'{width}x{height}+{x}+{y}')
+    
+    def create_widgets(self):
+        main_frame = ctk.CTkFrame(self, fg_color=COLORS['bg_dark'])
+        main_frame.pack(fill="both", expand=True, padx=25, pady=25)
+        
+        header_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
+        header_frame.pack(fill="x", pady=(0, 15))
+        
+        title_label = ctk.CTkLabel(
+            header_frame, text="📈 Tanılama",
+            font=ctk.CTkFont(size=24, weight="bold"),
+            text_color=COLORS['text_primary']
+        )
+        title_label.pack(side="left")
+        
+        btn_frame = ctk.CTkFrame(header_frame, fg_color="transparent")
+        btn_frame.pack(side="right")
+        
+        self.log_btn = ctk.CTkButton(
+            btn_frame, text="",
+            font=ctk.CTkFont(size=13),
+            fg_color=COLORS['bg_card'],
+            hover_color=COLORS['bg_elevated'],
+            width=120,
+            height=35,
+            corner_radius=8,
+            command=self.toggle_log
+        )
+        self.log_btn.pack(side="left", padx=(0, 10))
+        
+        reset_btn = ctk.CTkButton(
+            btn_frame, text="🗑️ Sıfırla",
+            font=ctk.CTkFont(size=13),
+            fg_color=COLORS['bg_card'],
+            hover_color=COLORS['bg_elevated'],
+            width=90,
+            height=35,
+            corner_radius=8,
+            command=self.reset
+        )
+        reset_btn.pack(side="left", padx=(0, 10))
+        
+        close_btn = ctk.CTkButton(
+            btn_frame, text="← Geri",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            fg_color=COLORS['primary'],
+            hover_color=COLORS['primary_light'],
+            width=90,
+            height=35,
+            corner_radius=8,
+            command=self.destroy
+        )
+        close_btn.pack(side="left")
+        
+        self.textbox = ctk.CTkTextbox(
+            main_frame, font=ctk.CTkFont(family="Consolas", size=12),
+            fg_color=COLORS['bg_card'], text_color=COLORS['text_primary'],
+            wrap="none"
+        )
+        self.textbox.pack(fill="both", expand=True)
+    
+    def format_metrics(self, metrikler):
+        """Ölçüm anlık görüntüsünü tablo metnine çevirir"""
+        satirlar = [f"Son {metrikler['sure_sn']:.0f} sn\n", "FIREBASE İSTEKLERİ"]
+        satirlar.append(f"{'İşlem':<22}{'Yol':<18}{'Adet':>6}{'p50':>8}{'p95':>8}{'p99':>8}"
+                        f"{'Gönd. KB':>10}{'Alın. KB':>10}{'Tekrar':>8}  Durum / Hata")
+        for m in metrikler['http']:
+            durumlar = ", ".join(f"{k}:{v}" for k, v in sorted(m['durumlar'].items()))
+            hatalar = ", ".join(f"{k}:{v}" for k, v in sorted(m['hatalar'].items()))
+            satirlar.append(
+                f"{m['islem'][:21]:<22}{m['yol'][:17]:<18}{m['sayi']:>6}"
+                f"{m['p50_ms']:>8.0f}{m['p95_ms']:>8.0f}{m['p99_ms']:>8.0f}"
+                f"{m['istek_bayt'] / 1024:>10.1f}{m['yanit_bayt'] / 1024:>10.1f}{m['tekrarlar']:>8}"
+                f"  {durumlar}{'  ' + hatalar if hatalar else ''}"
+            )
+        
+        satirlar += ["", "HESAPLAMALAR (ms)"]
+        satirlar.append(f"{'Fonksiyon':<30}{'Adet':>6}{'Ort.':>10}{'p95':>8}{'En büyük':>10}")
+        for m in metrikler['islemler']:
+            satirlar.append(
+                f"{m['islem'][:29]:<30}{m['sayi']:>6}{m['ortalama_ms']:>10.2f}"
+                f"{m['p95_ms']:>8.0f}{m['en_buyuk_ms']:>10.1f}"
+            )
+        return "\n".join(satirlar)
+    
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+        self.log_btn.configure(text="📝 Log: Açık" if metrik_logu_acik() else "📝 Log: Kapalı")
+        
+        # Kaydırma konumu korunur
+        konum = self.textbox.yview()[0]
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        self.textbox.insert("1.0", self.format_metrics(metrikleri_getir()))
+        self.textbox.configure(state="disabled")
+        self.textbox.yview_moveto(konum)
+        
+        self.after(self.YENILEME_ARALIGI, self.refresh)
+    
+    def reset(self):
+        metrikleri_sifirla()
+    
+    def toggle_log(self):
+        if metrik_logu_acik():
+            metrik_logunu_kapat()
+        else:
+            try:
+                dosya = metrik_logunu_ac()
+                messagebox.showinfo("Tanılama", f"Ölçümler şu dosyaya yazılıyor:\n{dosya}", parent=self)
+            except OSError as e:
+                messagebox.showerror("Hata", f"Log dosyası açılamadı:\n{e}", parent=self)
+        self.log_btn.configure(text="📝 Log: Açık" if metrik_logu_acik() else "📝 Log: Kapalı")
+
+
 class AntkolitApp(ctk.CTk):
     """Ana uygulama penceresi"""
     def __init__(self):
         super().__init__()
         
+        # Arka plan görevlerinin sonuçları bu pencerenin döngüsünde dağıtılır
+        tasks.baslat(self)
+        
         # Pencere ayarları
         self.title(f"📦 Ant Koli - Kar/Zarar Hesaplama v{CURRENT_VERSION}")
         self.geometry("900x650")
         self.configure(fg_color=COLORS['bg_dark'])
         self.minsize(800, 600)
         
-        # Firebase veritabanını başlat
-        if not init_db():
-            messagebox.showwarning(
-                "Bağlantı Uyarısı",
-                "Firebase'e bağlanılamadı!\n\n"
-                "Lütfen database.py dosyasındaki\n"
-                "FIREBASE_DATABASE_URL değerini\n"
-                "kendi Firebase URL'nizle değiştirin.\n\n"
-                "Detaylar için README.txt dosyasına bakın."
-            )
-        
         self.create_widgets()
         self.update_stats()
         self.center_window()
         
+        # Firebase bağlantısı arka planda test edilir; pencere ağı beklemez
+        tasks.gonder(init_db, anahtar="init_db", basarili=self._on_db_ready)
+        
         # Cache'i arka planda yükle (pencereler hızlı açılsın)
         start_cache_refresh()
         
-        # Otomatik yenileme (her 30 saniyede bir)
-        self.auto_refresh()
+        # Çevrimiçi / çevrimdışı durumu ve bekleyen işlem sayısı
+        abone_ol("baglanti", lambda kanal: self.after(0, self.on_connection_changed))
+        abone_ol("bekleyen", lambda kanal: self.after(0, self.update_connection_status))
+        self.update_connection_status()
+        
+        # Gerçek zamanlı dinleyici: değişiklik gelince istatistikler yenilenir
+        self._refresh_job = None
+        abone_ol("satislar", lambda kanal: self.after(0, self.on_data_changed))
+        dinleyiciyi_baslat()
+        
+        # Önceki oturumdan kalan gönderilmemiş işlemleri gönder
+        aktariciyi_baslat()
+        
+        # Otomatik yenileme (dinleyici kapalıyken yedek yoklama)
+        self.after(90000, self.auto_refresh)
         
         # Güncelleme kontrolü (başlangıçta)
         self.after(2000, self.check_updates)  # 2 saniye sonra kontrol et
     
+    def _on_db_ready(self, basarili):
+        """Veritabanı başlatıldı (ana thread'de)"""
+        if not basarili and "YOUR-PROJECT-ID" in FIREBASE_DATABASE_URL:
+            messagebox.showwarning(
+                "Bağlantı Uyarısı",
+                "Firebase'e bağlanılamadı!\n\n"
+                "Lütfen database.py dosyasındaki\n"
+                "FIREBASE_DATABASE_URL değerini\n"
+                "kendi Firebase URL'nizle değiştirin.\n\n"
+                "Detaylar için README.txt dosyasına bakın."
+            )
+        
+        # Eksik bayrakları bir kez diske indir; sonraki açılışlarda ağ gerekmez
+        flags.onbellegi_doldur(kod for kod, _ in ULKELER)
+    
+    def on_connection_changed(self):
+        """Bağlantı durumu değişti: göstergeyi güncelle, geri geldiyse verileri yenile"""
+        self.update_connection_status()
+        if cevrimici():
+            self.on_data_changed()
+    
+    def update_connection_status(self):
+        """Başlıktaki çevrimiçi / çevrimdışı göstergesini günceller"""
+        try:
+            bekleyen = bekleyen_islem_sayisi()
+        except Exception:
+            bekleyen = 0
+        ek = f" · {bekleyen} bekleyen" if bekleyen else ""
+        if cevrimici():
+            self.connection_label.configure(text=f"● Çevrimiçi{ek}", text_color=COLORS['success'])
+        else:
+            self.connection_label.configure(text=f"● Çevrimdışı{ek}", text_color=COLORS['danger'])
+    
     def check_updates(self):
         """Güncelleme kontrolü yapar (arka planda)"""
-        def check():
-            try:
-                update_info = auto_check_updates(FIREBASE_DATABASE_URL, silent=False)
-                if update_info and update_info.get('has_update'):
-                    self.after(0, lambda: show_update_dialog(update_info, parent=self))
-            except Exception as e:
-                print(f"Güncelleme kontrolü hatası: {e}")
+        def sonuc(update_info):
+            if update_info and update_info.get('has_update'):
+                show_update_dialog(update_info, parent=self)
+        
+        def hata(e):
+            print(f"Güncelleme kontrolü hatası: {e}")
         
-        threading.Thread(target=check, daemon=True).start()
+        tasks.gonder(
+            auto_check_updates, FIREBASE_DATABASE_URL,
+            anahtar="guncelleme", oncelik=tasks.ONCELIK_ARKA_PLAN,
+            basarili=sonuc, hata=hata
+        )
     
     def center_window(self):
         self.update_idletasks()
@@ -2020,6 +2454,29 @@ class AntkolitApp(ctk.CTk):
         )
         map_btn.pack(side="right", padx=(0, 8))
         
+        # Bağlantı durumu (çevrimdışıyken tıklanınca hemen yeniden dener)
+        self.connection_label = ctk.CTkLabel(
+            top_buttons, text="● Çevrimiçi",
+            font=ctk.CTkFont(size=12),
+            text_color=COLORS['success'],
+            cursor="hand2"
+        )
+        self.connection_label.pack(side="left", padx=(0, 12))
+        self.connection_label.bind("<Button-1>", lambda e: baglantiyi_yokla())
+        
+        # Tanılama butonu
+        diagnostics_btn = ctk.CTkButton(
+            top_buttons, text="📈",
+            font=ctk.CTkFont(size=20),
+            fg_color=COLORS['bg_card'],
+            hover_color=COLORS['bg_elevated'],
+            width=45,
+            height=40,
+            corner_radius=10,
+            command=self.open_diagnostics
+        )
+        diagnostics_btn.pack(side="right", padx=(0, 8))
+        
         # İstatistik kartları
         stats_frame = ctk.CTkFrame(self, fg_color="transparent")
         stats_frame.pack(fill="x", padx=30, pady=15)
@@ -2108,16 +2565,12 @@ class AntkolitApp(ctk.CTk):
     
     def update_stats(self):
         """İstatistikleri arka planda güncelle (UI donmaz)"""
-        def fetch_and_update():
-            try:
-                stats = istatistikleri_getir()
-                # UI güncellemesi ana thread'de yapılmalı
-                self.after(0, lambda: self._apply_stats(stats))
-            except Exception as e:
-                print(f"İstatistik güncelleme hatası: {e}")
-        
-        # Arka planda çalıştır
-        threading.Thread(target=fetch_and_update, daemon=True).start()
+        # Süren bir hesaplama varsa yenisi başlatılmaz, sonucu paylaşılır
+        tasks.gonder(
+            istatistikleri_getir, anahtar="istatistikler",
+            basarili=self._apply_stats,
+            hata=lambda e: print(f"İstatistik güncelleme hatası: {e}")
+        )
     
     def _apply_stats(self, stats):
         """İstatistikleri UI'a uygula (ana thread'de)"""
@@ -2150,6 +2603,10 @@ class AntkolitApp(ctk.CTk):
         """Firma listesi penceresini aç"""
         FirmaListesiWindow(self)
     
+    def open_diagnostics(self):
+        """Tanılama penceresini aç"""
+        DiagnosticsWindow(self)
+    
     def open_world_map(self):
         """Dünya satış haritasını aç"""
         # Exe veya py modunda çalışıp çalışmadığını kontrol et
@@ -2191,16 +2648,28 @@ class AntkolitApp(ctk.CTk):
                     "npm run build"
                 )
     
-    def auto_refresh(self):
-        """Verileri otomatik yeniler (90 saniyede bir)"""
+    def on_data_changed(self):
+        """Dinleyiciden değişiklik geldiğinde çağrılır (ardışık olaylar birleştirilir)"""
+        if self._refresh_job:
+            self.after_cancel(self._refresh_job)
+        self._refresh_job = self.after(300, self._apply_data_change)
+    
+    def _apply_data_change(self):
+        self._refresh_job = None
         self.update_stats()
+        start_cache_refresh()
+    
+    def auto_refresh(self):
+        """Dinleyici bağlı değilse verileri yoklayarak yeniler (90 saniyede bir)"""
+        if not dinleyici_canli("satislar"):
+            self.update_stats()
         self.after(90000, self.auto_refresh)  # 90 saniye
     
     def open_backup_menu(self):
         """Yedekleme menüsünü aç"""
         menu = ctk.CTkToplevel(self)
         menu.title("💾 Yedekleme")
-        menu.geometry("350x200")
+        menu.geometry("350x255")
         menu.configure(fg_color=COLORS['bg_dark'])
         menu.transient(self)
         menu.grab_set()
@@ -2208,8 +2677,8 @@ class AntkolitApp(ctk.CTk):
         # Ortala
         menu.update_idletasks()
         x = (menu.winfo_screenwidth() // 2) - (175)
-        y = (menu.winfo_screenheight() // 2) - (100)
-        menu.geometry(f'350x200+{x}+{y}')
+        y = (menu.winfo_screenheight() // 2) - (128)
+        menu.geometry(f'350x255+{x}+{y}')
         
         title = ctk.CTkLabel(
             menu, text="💾 Yedekleme & Geri Yükleme",
@@ -2220,7 +2689,7 @@ class AntkolitApp(ctk.CTk):
         
         # Yedekle butonu
         export_btn = ctk.CTkButton(
-            menu, text="📥 Verileri Yedekle (JSON)",
+            menu, text="📥 Verileri Yedekle",
             font=ctk.CTkFont(size=14, weight="bold"),
             fg_color=COLORS['success'],
             hover_color="#34d399",
@@ -2230,6 +2699,18 @@ class AntkolitApp(ctk.CTk):
         )
         export_btn.pack(fill="x", padx=30, pady=(0, 10))
         
+        # Artımlı yedek: yalnızca son yedekten beri değişenler
+        incremental_btn = ctk.CTkButton(
+            menu, text="🧩 Artımlı Yedekle (Değişenler)",
+            font=ctk.CTkFont(size=14, weight="bold"),
+            fg_color=COLORS['primary'],
+            hover_color=COLORS['primary_light'],
+            height=45,
+            corner_radius=10,
+            command=lambda: self.export_backup(menu, artimli=True)
+        )
+        incremental_btn.pack(fill="x", padx=30, pady=(0, 10))
+        
         # Geri yükle butonu
         import_btn = ctk.CTkButton(
             menu, text="📤 Yedekten Geri Yükle",
@@ -2242,68 +2723,139 @@ class AntkolitApp(ctk.CTk):
         )
         import_btn.pack(fill="x", padx=30)
     
-    def export_backup(self, parent_window=None):
-        """Verileri JSON dosyasına yedekle"""
-        data = tum_verileri_yedekle()
-        
-        if not data:
-            messagebox.showwarning("Uyarı", "Yedeklenecek veri bulunamadı!")
-            return
-        
-        # Dosya kaydetme dialogu
-        from datetime import datetime
-        default_name = f"antkoli_yedek_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    def export_backup(self, parent_window=None, artimli=False):
+        """Verileri akış halinde NDJSON (isteğe bağlı gzip) dosyasına yedekle (artımlı: yalnızca farklar)"""
+        onek = "antkoli_fark" if artimli else "antkoli_yedek"
+        default_name = f"{onek}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl.gz"
         
         filepath = filedialog.asksaveasfilename(
-            defaultextension=".json",
-            filetypes=[("JSON Dosyası", "*.json")],
+            defaultextension=".jsonl.gz",
+            filetypes=[("Sıkıştırılmış Yedek", "*.jsonl.gz"), ("JSON Satırları", "*.jsonl")],
             initialfile=default_name,
             title="Yedeği Kaydet"
         )
+        if not filepath:
+            return
+        # Fark zinciri yalnızca .jsonl / .jsonl.gz dosyalarında aranır
+        duzeltilmis = backup.yedek_yolu_duzelt(filepath)
+        if duzeltilmis != filepath and os.path.exists(duzeltilmis) and not messagebox.askyesno(
+                "Onay", f"{os.path.basename(duzeltilmis)} zaten var. Üzerine yazılsın mı?"):
+            return
+        filepath = duzeltilmis
         
-        if filepath:
-            try:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-                messagebox.showinfo("Başarılı", f"Veriler yedeklendi!\n\n{filepath}")
-                if parent_window:
-                    parent_window.destroy()
-            except Exception as e:
-                messagebox.showerror("Hata", f"Yedekleme hatası: {e}")
+        if parent_window:
+            parent_window.destroy()
+        
+        pencere = BackupProgressWindow(self, "💾 Yedekleniyor")
+        
+        def ilerleme(kayit_sayisi, dugum):
+            if dugum:
+                pencere.set_status(f"{dugum}: {kayit_sayisi:,} kayıt yazıldı".replace(",", "."))
+        
+        def bitti(sonuc, hata):
+            if not pencere.winfo_exists():
+                return
+            pencere.destroy()
+            if hata:
+                messagebox.showerror("Hata", f"Yedekleme hatası: {hata}")
+            elif sonuc['iptal_edildi']:
+                messagebox.showinfo("İptal", "Yedekleme iptal edildi.")
+            elif not sonuc['kayit_sayisi'] and sonuc['tur'] == 'tam':
+                messagebox.showwarning("Uyarı", "Yedeklenecek veri bulunamadı!")
+            else:
+                tur = "Fark yedeği" if sonuc['tur'] == 'fark' else "Tam yedek"
+                messagebox.showinfo("Başarılı", f"{tur} alındı! ({sonuc['kayit_sayisi']} kayıt)\n\n{filepath}")
+        
+        tasks.gonder(
+            backup.yedegi_disa_aktar, filepath, ilerleme=ilerleme, iptal=pencere.iptal, artimli=artimli,
+            basarili=lambda sonuc: bitti(sonuc, None), hata=lambda e: bitti(None, e)
+        )
     
     def import_backup(self, parent_window=None):
-        """JSON dosyasından verileri geri yükle"""
+        """Yedek dosyasını doğrulayıp parça parça geri yükle (yarıda kalırsa kaldığı yerden devam eder)"""
         filepath = filedialog.askopenfilename(
-            filetypes=[("JSON Dosyası", "*.json")],
+            filetypes=[("Yedek Dosyası", "*.jsonl.gz *.jsonl *.json"), ("Tüm Dosyalar", "*.*")],
             title="Yedek Dosyasını Seç"
         )
+        if not filepath:
+            return
+        
+        if parent_window:
+            parent_window.destroy()
+        
+        asama_adlari = {
+            'dogrulama': "Doğrulanıyor", 'yukleme': "Yükleniyor",
+            'temizlik': "Fazla kayıtlar siliniyor", 'ozet': "Özet hesaplanıyor"
+        }
+        
+        def calistir(pencere, deneme, bitti):
+            def ilerleme(asama, tamamlanan, toplam):
+                metin = asama_adlari.get(asama, asama)
+                if toplam:
+                    metin += f": {tamamlanan} / {toplam}"
+                elif tamamlanan:
+                    metin += f": {tamamlanan} kayıt"
+                pencere.set_status(metin)
+            
+            tasks.gonder(
+                backup.yedegi_geri_yukle, filepath, ilerleme=ilerleme, iptal=pencere.iptal, deneme=deneme,
+                basarili=lambda sonuc: bitti(sonuc, None), hata=lambda e: bitti(None, e)
+            )
         
-        if filepath:
-            # Onay al
+        def yukleme_bitti(pencere, sonuc, hata):
+            if pencere.winfo_exists():
+                pencere.destroy()
+            if hata:
+                messagebox.showerror(
+                    "Hata", f"Geri yükleme hatası: {hata}\n\n"
+                    "Aynı dosyayla tekrar denendiğinde kaldığı yerden devam edilir."
+                )
+            elif sonuc['iptal_edildi']:
+                messagebox.showinfo("İptal", "Geri yükleme durduruldu. Aynı dosyayla kaldığı yerden devam edilebilir.")
+            else:
+                messagebox.showinfo("Başarılı", "Veriler başarıyla geri yüklendi!")
+                self.update_stats()
+                start_cache_refresh()
+        
+        def deneme_bitti(pencere, sonuc, hata):
+            if pencere.winfo_exists():
+                pencere.destroy()
+            if hata:
+                messagebox.showerror("Hata", f"Dosya okuma hatası: {hata}")
+                return
+            if sonuc['iptal_edildi']:
+                return
+            if sonuc['hatalar']:
+                satirlar = "\n".join(
+                    f"Satır {no}: {aciklama}" if no else aciklama
+                    for no, aciklama in sonuc['hatalar'][:10]
+                )
+                messagebox.showerror("Geçersiz Yedek", f"Yedek dosyasında hatalar var, geri yükleme yapılmadı:\n\n{satirlar}")
+                return
+            
+            devam = ""
+            if sonuc['devam_edilen']:
+                devam = f"\n\nÖnceki yarım kalan geri yükleme {sonuc['devam_edilen']}. kayıttan devam edecek."
             if not messagebox.askyesno(
                 "Onay", 
-                "DİKKAT: Mevcut tüm veriler silinecek ve yedekteki verilerle değiştirilecek!\n\n"
+                "DİKKAT: Mevcut tüm veriler yedekteki verilerle değiştirilecek!\n\n"
+                f"Yüklenecek kayıt: {sonuc['kayit_sayisi']}\n"
+                f"Yedekte olmadığı için silinecek kayıt: {sonuc['silinen']}{devam}\n\n"
                 "Devam etmek istiyor musunuz?"
             ):
                 return
             
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                if verileri_geri_yukle(data):
-                    messagebox.showinfo("Başarılı", "Veriler başarıyla geri yüklendi!")
-                    self.update_stats()
-                    start_cache_refresh()
-                    if parent_window:
-                        parent_window.destroy()
-                else:
-                    messagebox.showerror("Hata", "Geri yükleme başarısız!")
-            except Exception as e:
-                messagebox.showerror("Hata", f"Dosya okuma hatası: {e}")
+            pencere = BackupProgressWindow(self, "📤 Geri Yükleniyor")
+            calistir(pencere, False, lambda s, h: yukleme_bitti(pencere, s, h))
+        
+        # Önce deneme (yazmadan doğrulama ve sayım), sonra onay ve gerçek yükleme
+        pencere = BackupProgressWindow(self, "🔍 Yedek Doğrulanıyor")
+        calistir(pencere, True, lambda s, h: deneme_bitti(pencere, s, h))
 
 
 if __name__ == "__main__":
+    # Firebase bağlantısını pencere kurulurken arka planda aç
+    baglantiyi_isit()
     app = AntkolitApp()
     app.mainloop()
 
@@ -0,0 +1,206 @@
+"""
+Ölçüm Kayıtları
+Firebase isteklerinin ve yerel hesaplamaların süre / boyut / durum
+istatistiklerini bellekte toplar. Süreler sabit kovalı histogramlarda
+tutulur; bellek kullanımı istek sayısından bağımsızdır.
+
+İsteğe bağlı olarak her kayıt, dönen (rotating) bir JSON-lines dosyasına
+da yazılır:
+    {"zaman": ..., "tur": "http", "islem": "GET", "yol": "satislar/*",
+     "ms": 84.2, "durum": 200, "istek_bayt": 0, "yanit_bayt": 5120, "deneme": 1}
+"""
+
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from logging.handlers import RotatingFileHandler
+
+# Kova üst sınırları (ms); sonuncusunun üstü taşma kovasına düşer
+GECIKME_KOVALARI_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+LOG_DOSYA_BOYUTU = 1024 * 1024
+LOG_YEDEK_SAYISI = 3
+
+_PUSH_ID_UZUNLUGU = 20
+
+
+class Histogram:
+    """Sabit kovalı süre histogramı"""
+
+    __slots__ = ("sayi", "toplam", "en_kucuk", "en_buyuk", "kovalar")
+
+    def __init__(self):
+        self.sayi = 0
+        self.toplam = 0.0
+        self.en_kucuk = None
+        self.en_buyuk = 0.0
+        self.kovalar = [0] * (len(GECIKME_KOVALARI_MS) + 1)
+
+    def ekle(self, ms):
+        self.sayi += 1
+        self.toplam += ms
+        self.en_kucuk = ms if self.en_kucuk is None else min(self.en_kucuk, ms)
+        self.en_buyuk = max(self.en_buyuk, ms)
+        self.kovalar[bisect_left(GECIKME_KOVALARI_MS, ms)] += 1
+
+    def yuzdelik(self, oran):
+        """Kovalardan tahmini yüzdelik (kovanın üst sınırı; taşmada en büyük değer)"""
+        if not self.sayi:
+            return None
+        hedef = oran * self.sayi
+        birikimli = 0
+        for i, adet in enumerate(self.kovalar):
+            birikimli += adet
+            if birikimli >= hedef:
+                if i < len(GECIKME_KOVALARI_MS):
+                    return round(min(GECIKME_KOVALARI_MS[i], self.en_buyuk), 2)
+                break
+        return round(self.en_buyuk, 2)
+
+    def sozluk(self):
+        return {
+            "sayi": self.sayi,
+            "ortalama_ms": round(self.toplam / self.sayi, 2) if self.sayi else None,
+            "en_kucuk_ms": round(self.en_kucuk, 2) if self.en_kucuk is not None else None,
+            "en_buyuk_ms": round(self.en_buyuk, 2),
+            "p50_ms": self.yuzdelik(0.50),
+            "p95_ms": self.yuzdelik(0.95),
+            "p99_ms": self.yuzdelik(0.99),
+            "kovalar": dict(zip([str(s) for s in GECIKME_KOVALARI_MS] + ["+"], self.kovalar)),
+        }
+
+
+class _HttpKaydi:
+    """Tek (işlem, yol) çifti için istek istatistikleri"""
+
+    __slots__ = ("sure", "istek_bayt", "yanit_bayt", "durumlar", "tekrarlar", "hatalar")
+
+    def __init__(self):
+        self.sure = Histogram()
+        self.istek_bayt = 0
+        self.yanit_bayt = 0
+        self.durumlar = {}
+        self.tekrarlar = 0
+        self.hatalar = {}
+
+    def sozluk(self):
+        return dict(
+            self.sure.sozluk(),
+            istek_bayt=self.istek_bayt,
+            yanit_bayt=self.yanit_bayt,
+            durumlar=dict(self.durumlar),
+            tekrarlar=self.tekrarlar,
+            hatalar=dict(self.hatalar),
+        )
+
+
+def yol_sablonu(yol):
+    """
+    İstek yolunu gruplanabilir şablona çevirir: push id'ler ve özet fark
+    anahtarları '*' olur, en fazla iki seviye tutulur.
+    ("satislar/-Nabc..." -> "satislar/*", "" -> "/")
+    """
+    parcalar = [p for p in (yol or "").strip("/").split("/") if p][:2]
+    if not parcalar:
+        return "/"
+    if len(parcalar) == 2:
+        ikinci = parcalar[1]
+        if len(ikinci) >= _PUSH_ID_UZUNLUGU or ikinci.startswith(("ekle_", "sil_")):
+            parcalar[1] = "*"
+    return "/".join(parcalar)
+
+
+class Metrikler:
+    """İş parçacığı güvenli ölçüm deposu"""
+
+    def __init__(self):
+        self._kilit = threading.Lock()
+        self._http = {}         # (işlem, yol şablonu) -> _HttpKaydi
+        self._islemler = {}     # fonksiyon adı -> Histogram
+        self._baslangic = time.time()
+        self._log = None
+
+    # ---------- kayıt ----------
+
+    def http_kaydet(self, islem, yol, ms, durum=None, istek_bayt=0, yanit_bayt=0, deneme=1, hata=None):
+        """Tamamlanan (veya hatayla biten) bir HTTP çağrısını kaydeder"""
+        anahtar = (islem, yol_sablonu(yol))
+        with self._kilit:
+            kayit = self._http.get(anahtar)
+            if kayit is None:
+                kayit = self._http[anahtar] = _HttpKaydi()
+            kayit.sure.ekle(ms)
+            kayit.istek_bayt += istek_bayt
+            kayit.yanit_bayt += yanit_bayt
+            kayit.tekrarlar += max(0, deneme - 1)
+            if durum is not None:
+                kayit.durumlar[str(durum)] = kayit.durumlar.get(str(durum), 0) + 1
+            if hata is not None:
+                kayit.hatalar[hata] = kayit.hatalar.get(hata, 0) + 1
+        self._logla({
+            "tur": "http", "islem": islem, "yol": anahtar[1], "ms": round(ms, 2), "durum": durum,
+            "istek_bayt": istek_bayt, "yanit_bayt": yanit_bayt, "deneme": deneme, "hata": hata
+        })
+
+    def islem_kaydet(self, ad, ms):
+        """Yerel bir hesaplamanın süresini kaydeder"""
+        with self._kilit:
+            histogram = self._islemler.get(ad)
+            if histogram is None:
+                histogram = self._islemler[ad] = Histogram()
+            histogram.ekle(ms)
+        self._logla({"tur": "islem", "islem": ad, "ms": round(ms, 2)})
+
+    # ---------- okuma ----------
+
+    def anlik_goruntu(self):
+        """Tüm ölçümlerin JSON'a yazılabilir kopyasını döndürür"""
+        with self._kilit:
+            return {
+                "baslangic": self._baslangic,
+                "sure_sn": round(time.time() - self._baslangic, 1),
+                "http": [
+                    dict(kayit.sozluk(), islem=islem, yol=yol)
+                    for (islem, yol), kayit in sorted(self._http.items())
+                ],
+                "islemler": [
+                    dict(histogram.sozluk(), islem=ad)
+                    for ad, histogram in sorted(self._islemler.items())
+                ],
+            }
+
+    def sifirla(self):
+        with self._kilit:
+            self._http.clear()
+            self._islemler.clear()
+            self._baslangic = time.time()
+
+    # ---------- dosya kaydı ----------
+
+    def log_ac(self, dosya_yolu, max_bayt=LOG_DOSYA_BOYUTU, yedek_sayisi=LOG_YEDEK_SAYISI):
+        """Her kaydı dönen JSON-lines dosyasına da yazmaya başlar"""
+        self.log_kapat()
+        isleyici = RotatingFileHandler(dosya_yolu, maxBytes=max_bayt, backupCount=yedek_sayisi, encoding="utf-8")
+        isleyici.setFormatter(logging.Formatter("%(message)s"))
+        log = logging.getLogger(f"antkoli.metrik.{id(self)}")
+        log.propagate = False
+        log.setLevel(logging.INFO)
+        log.addHandler(isleyici)
+        self._log = log
+
+    def log_kapat(self):
+        log, self._log = self._log, None
+        if log is not None:
+            for isleyici in list(log.handlers):
+                log.removeHandler(isleyici)
+                isleyici.close()
+
+    def log_acik(self):
+        return self._log is not None
+
+    def _logla(self, kayit):
+        log = self._log
+        if log is not None:
+            kayit["zaman"] = round(time.time(), 3)
+            log.info(json.dumps(kayit, ensure_ascii=False))
@@ -0,0 +1,237 @@
+"""
+Firma Arama İndeksi
+Firma adları için bellek içi arama: 1-2 karakterlik aramalar için kelime başı
+önek ağacı (trie; yetmezse kelime içi eşleşmeler satış sırasıyla taranır),
+3 karakter ve üzeri aramalar için trigram indeksi.
+Sonuçlar satış sayısına göre sıralanır. Karşılaştırmalarda noktalı ve
+noktasız i tek harfe katlanır (İ, I, ı -> i); "IKEA" ile "ikea" aynı firmadır.
+
+İndeks firma listesi her değiştiğinde yalnızca değişen firmalar için
+güncellenir; aramalar ağa gitmez.
+"""
+
+import heapq
+import threading
+
+TRIGRAM_UZUNLUGU = 3
+TRIE_DERINLIGI = TRIGRAM_UZUNLUGU - 1   # Daha uzun aramaları trigram indeksi karşılar
+_ONEK_ONBELLEK_BOYUTU = 10      # Trie düğümlerinde saklanan en iyi sonuç sayısı
+_SIRALI_TARAMA_ESIGI = 2000     # Aday kümesi bundan büyükse satış sırasıyla taranır
+
+
+_I_KATLAMA = str.maketrans({"İ": "i", "I": "i", "ı": "i"})
+
+
+def i_katla(metin):
+    """Noktalı ve noktasız i'yi (İ, I, ı) tek harfe, i'ye çevirir"""
+    return (metin or "").translate(_I_KATLAMA)
+
+
+def turkce_kucuk(metin):
+    """Arama için küçük harfe çevirir (i'ler katlanır) ve boşlukları sadeleştirir"""
+    return " ".join(i_katla(metin).lower().split())
+
+
+# Türk alfabesi (q, w, x yabancı adlar için araya eklendi); sıralama anahtarında
+# harfler bu sıradaki kod noktalarına taşınır, diğer karakterler yerinde kalır
+_SIRALAMA_ALFABESI = "abcçdefgğhıijklmnoöpqrsştuüvwxyz"
+_SIRALAMA_TABLOSU = str.maketrans({harf: chr(0x2000 + i) for i, harf in enumerate(_SIRALAMA_ALFABESI)})
+
+
+def turkce_siralama_anahtari(metin):
+    """Türkçe alfabe sırasına göre karşılaştırma anahtarı (c < ç < d, ı < i, s < ş ...)"""
+    # ı ile i'yi ayıran tek yer burası: Türkçe kurala göre İ -> i, I -> ı
+    metin = (metin or "").replace("İ", "i").replace("I", "ı").lower()
+    return " ".join(metin.split()).translate(_SIRALAMA_TABLOSU)
+
+
+def _kelime_baslari(metin):
+    """Metnin kelime başlarındaki önekler (trie'ye eklenecek parçalar)"""
+    parcalar = {metin[:TRIE_DERINLIGI]} if metin else set()
+    for i in range(1, len(metin)):
+        if metin[i - 1] in " -.&/(" and metin[i] != " ":
+            parcalar.add(metin[i:i + TRIE_DERINLIGI])
+    return parcalar
+
+
+def _trigramlar(metin):
+    return {metin[i:i + TRIGRAM_UZUNLUGU] for i in range(len(metin) - TRIGRAM_UZUNLUGU + 1)}
+
+
+class _TrieDugumu:
+    __slots__ = ("cocuklar", "anahtarlar", "en_iyiler")
+
+    def __init__(self):
+        self.cocuklar = {}
+        self.anahtarlar = set()     # Bu önekle başlayan kelimesi olan firmalar
+        self.en_iyiler = None       # Önbellek: satış sayısına göre ilk anahtarlar
+
+
+class FirmaIndeksi:
+    """
+    Firma adı arama indeksi.
+
+    guncelle({firma_key: firma}) ile beslenir; firma sözlüğünde en az
+    'firma_adi' ve 'toplam_satis' bulunur. ara() aynı sözlükleri döndürür.
+    """
+
+    def __init__(self):
+        self._firmalar = {}         # anahtar -> firma sözlüğü
+        self._metinler = {}         # anahtar -> Türkçe küçük harfli ad
+        self._kok = _TrieDugumu()
+        self._trigram_indeksi = {}  # trigram -> set(anahtar)
+        self._sirali = None         # Satış sayısına göre sıralı anahtarlar (gerektiğinde kurulur)
+        self._kilit = threading.Lock()
+
+    def __len__(self):
+        return len(self._firmalar)
+
+    # ---------- güncelleme ----------
+
+    def _trie_yolu(self, parca, olustur=False):
+        """Parçanın trie'deki düğüm yolunu döndürür (yoksa None)"""
+        dugum = self._kok
+        yol = []
+        for harf in parca:
+            sonraki = dugum.cocuklar.get(harf)
+            if sonraki is None:
+                if not olustur:
+                    return None
+                sonraki = dugum.cocuklar[harf] = _TrieDugumu()
+            dugum = sonraki
+            yol.append(dugum)
+        return yol
+
+    def _ekle(self, anahtar, metin):
+        for parca in _kelime_baslari(metin):
+            for dugum in self._trie_yolu(parca, olustur=True):
+                dugum.anahtarlar.add(anahtar)
+                dugum.en_iyiler = None
+        for trigram in _trigramlar(metin):
+            self._trigram_indeksi.setdefault(trigram, set()).add(anahtar)
+
+    def _cikar(self, anahtar, metin):
+        for parca in _kelime_baslari(metin):
+            yol = self._trie_yolu(parca) or []
+            for dugum in yol:
+                dugum.anahtarlar.discard(anahtar)
+                dugum.en_iyiler = None
+            # Boşalan dalları buda
+            onceki = [self._kok] + yol
+            for i in range(len(yol) - 1, -1, -1):
+                if yol[i].anahtarlar or yol[i].cocuklar:
+                    break
+                del onceki[i].cocuklar[parca[i]]
+        for trigram in _trigramlar(metin):
+            kume = self._trigram_indeksi.get(trigram)
+            if kume is not None:
+                kume.discard(anahtar)
+                if not kume:
+                    del self._trigram_indeksi[trigram]
+
+    def _onbellegi_bosalt(self, metin):
+        """Satış sayısı değişen firmanın geçtiği trie düğümlerinin sıralamasını geçersiz kılar"""
+        for parca in _kelime_baslari(metin):
+            for dugum in self._trie_yolu(parca) or []:
+                dugum.en_iyiler = None
+
+    def guncelle(self, firmalar):
+        """
+        İndeksi verilen firma kümesine eşitler; yalnızca eklenen, silinen,
+        adı veya satış sayısı değişen firmalar işlenir.
+        """
+        with self._kilit:
+            degisti = False
+            for anahtar in [a for a in self._firmalar if a not in firmalar]:
+                self._cikar(anahtar, self._metinler.pop(anahtar))
+                del self._firmalar[anahtar]
+                degisti = True
+
+            for anahtar, firma in firmalar.items():
+                eski = self._firmalar.get(anahtar)
+                if eski is None or eski.get("firma_adi") != firma.get("firma_adi"):
+                    if eski is not None:
+                        self._cikar(anahtar, self._metinler[anahtar])
+                    metin = self._metinler[anahtar] = turkce_kucuk(firma.get("firma_adi"))
+                    self._ekle(anahtar, metin)
+                    degisti = True
+                elif eski.get("toplam_satis") != firma.get("toplam_satis"):
+                    self._onbellegi_bosalt(self._metinler[anahtar])
+                    degisti = True
+                self._firmalar[anahtar] = firma
+
+            if degisti:
+                self._sirali = None
+
+    # ---------- arama ----------
+
+    def _sira_anahtari(self, anahtar):
+        firma = self._firmalar[anahtar]
+        return firma.get("toplam_satis", 0), firma.get("firma_adi", "")
+
+    def _en_iyiler(self, anahtarlar, limit):
+        if len(anahtarlar) <= limit:
+            return sorted(anahtarlar, key=self._sira_anahtari, reverse=True)
+        return heapq.nlargest(limit, anahtarlar, key=self._sira_anahtari)
+
+    def _sirali_anahtarlar(self):
+        """Satış sayısına göre sıralı anahtarlar (firma listesi değişene kadar önbellekli)"""
+        if self._sirali is None:
+            self._sirali = sorted(self._firmalar, key=self._sira_anahtari, reverse=True)
+        return self._sirali
+
+    def _kelime_basi_eslesenler(self, arama, limit):
+        """Kelime başı önek eşleşmeleri; sonuçlar trie düğümünde önbellekli"""
+        yol = self._trie_yolu(arama)
+        if not yol:
+            return []
+        dugum = yol[-1]
+        if limit <= _ONEK_ONBELLEK_BOYUTU:
+            if dugum.en_iyiler is None:
+                dugum.en_iyiler = self._en_iyiler(dugum.anahtarlar, _ONEK_ONBELLEK_BOYUTU)
+            return dugum.en_iyiler[:limit]
+        return self._en_iyiler(dugum.anahtarlar, limit)
+
+    def ara(self, terim, limit=10):
+        """
+        Adında terim geçen firmaları döndürür. Kısa aramalarda kelime başı
+        eşleşmeler öne alınır; her grup satış sayısına göre (en çok önce) sıralıdır.
+        """
+        arama = turkce_kucuk(terim)
+        if not arama:
+            return []
+
+        with self._kilit:
+            if len(arama) < TRIGRAM_UZUNLUGU:
+                secilen = self._kelime_basi_eslesenler(arama, limit)
+                if len(secilen) < limit:
+                    # Kelime içi eşleşmeler ("li" -> "Koli"): satış sırasıyla tara, dolunca dur
+                    bulunan = set(secilen)
+                    for anahtar in self._sirali_anahtarlar():
+                        if anahtar not in bulunan and arama in self._metinler[anahtar]:
+                            secilen.append(anahtar)
+                            if len(secilen) == limit:
+                                break
+            else:
+                # Trigram kümelerinin kesişimi aday verir, alt dize kontrolü kesinleştirir
+                kumeler = []
+                for trigram in _trigramlar(arama):
+                    kume = self._trigram_indeksi.get(trigram)
+                    if not kume:
+                        return []
+                    kumeler.append(kume)
+                kumeler.sort(key=len)
+                if len(kumeler[0]) > _SIRALI_TARAMA_ESIGI:
+                    # Yaygın terim: satış sırasıyla tara, ilk `limit` eşleşmede dur
+                    secilen = []
+                    for anahtar in self._sirali_anahtarlar():
+                        if anahtar in kumeler[0] and arama in self._metinler[anahtar]:
+                            secilen.append(anahtar)
+                            if len(secilen) == limit:
+                                break
+                else:
+                    adaylar = kumeler[0].intersection(*kumeler[1:])
+                    eslesen = [a for a in adaylar if arama in self._metinler[a]]
+                    secilen = self._en_iyiler(eslesen, limit)
+
+            return [self._firmalar[a] for a in secilen]
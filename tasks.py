@@ -0,0 +1,230 @@
+"""
+Arka Plan Görevleri
+Arayüzün ağ / veritabanı işleri için sınırlı iş parçacığı havuzu.
+
+- Anahtarlı tekil uçuş: aynı anahtarla bekleyen bir görev varsa yenisi
+  başlatılmaz; istek o göreve eklenir ve sonuç tüm isteyenlere gider. Görev
+  çalışırken gelen istekler eski veriyi almasın diye görev bittikten sonra
+  bir kez daha çalıştırılır ve yeni sonuç onlara gider.
+- Öncelik: ekranda beklenen veri (ONCELIK_GORUNUR) önden yüklemeden önce
+  çalışır; bir işçi her zaman görünür işler için boş tutulur.
+- İptal: sahibi olan pencere kapanınca sonucu beklenmeyen görev kuyruktan
+  düşer, çalışmakta olanın sonucu atılır.
+- Sonuçlar ana thread'e tek bir dağıtıcı (after döngüsü) ile iletilir.
+"""
+
+import heapq
+import itertools
+import queue
+import threading
+import tkinter
+import weakref
+
+ONCELIK_GORUNUR = 0         # Açık pencerenin beklediği veri
+ONCELIK_ARKA_PLAN = 1       # Kullanıcının beklemediği yenilemeler
+ONCELIK_ONDEN_YUKLEME = 2   # Belki gerekecek veri (sonraki sayfa, bayraklar)
+
+ISCI_SAYISI = 4             # Aynı anda en fazla bu kadar iş (ağ yükü sınırı)
+DAGITIM_ARALIGI = 30        # ms: ana thread'in sonuç kuyruğunu boşaltma sıklığı
+
+_kosul = threading.Condition()
+_kuyruk = []                # (öncelik, sıra, görev) yığını
+_sayac = itertools.count()
+_aktif = {}                 # anahtar -> bekleyen / çalışan görev
+_isciler = []
+_calisan = 0                # Çalışan görev sayısı
+_calisan_dusuk = 0          # Bunlardan görünür olmayanların sayısı
+_sonuclar = queue.SimpleQueue()
+_sahipler = weakref.WeakValueDictionary()   # id(widget) -> widget (<Destroy> bağlananlar)
+_kok = None
+
+
+class Gorev:
+    """Kuyruktaki tek bir iş ve sonucunu bekleyenler"""
+
+    __slots__ = ("anahtar", "fonk", "args", "kwargs", "oncelik", "dinleyiciler", "durum",
+                 "sonrakiler", "sonraki_oncelik")
+
+    def __init__(self, anahtar, fonk, args, kwargs, oncelik):
+        self.anahtar = anahtar
+        self.fonk = fonk
+        self.args = args
+        self.kwargs = kwargs
+        self.oncelik = oncelik
+        self.dinleyiciler = []      # [(sahip, basarili, hata)]
+        self.durum = "bekliyor"     # bekliyor / calisiyor / bitti / iptal
+        self.sonrakiler = []        # Çalışırken gelenler: bir sonraki çalıştırmayı bekler
+        self.sonraki_oncelik = oncelik
+
+
+# ==================== GÖNDERME ====================
+
+def gonder(fonk, *args, anahtar=None, oncelik=ONCELIK_GORUNUR, sahip=None,
+           basarili=None, hata=None, **kwargs):
+    """
+    fonk(*args, **kwargs) işini kuyruğa alır.
+    basarili(sonuc) / hata(istisna) ana thread'de çağrılır; sahip (widget)
+    verilirse pencere kapandıktan sonra çağrılmaz ve kimse beklemiyorsa iş iptal edilir.
+    anahtar verilirse aynı anahtarlı bekleyen iş paylaşılır; çalışmakta olan
+    iş bittikten sonra bu istek için bir kez daha çalıştırılır.
+    """
+    if sahip is not None:
+        _sahibi_izle(sahip)
+
+    with _kosul:
+        gorev = _aktif.get(anahtar) if anahtar is not None else None
+        if gorev is None:
+            gorev = Gorev(anahtar, fonk, args, kwargs, oncelik)
+            if anahtar is not None:
+                _aktif[anahtar] = gorev
+            heapq.heappush(_kuyruk, (oncelik, next(_sayac), gorev))
+        elif gorev.durum == "calisiyor":
+            # Çalışan iş bu istekten önceki veriyi okumuş olabilir: bitince yeniden çalışır
+            if not gorev.sonrakiler or oncelik < gorev.sonraki_oncelik:
+                gorev.sonraki_oncelik = oncelik
+            gorev.sonrakiler.append((sahip, basarili, hata))
+            return gorev
+        elif oncelik < gorev.oncelik:
+            # Önden yüklenen iş artık ekranda bekleniyor: öne alınır (eski kayıt atlanır)
+            gorev.oncelik = oncelik
+            heapq.heappush(_kuyruk, (oncelik, next(_sayac), gorev))
+        gorev.dinleyiciler.append((sahip, basarili, hata))
+        _iscileri_baslat()
+        _kosul.notify()
+    return gorev
+
+
+def iptal_et(sahip):
+    """Sahibin bütün isteklerini geri alır; başka bekleyeni olmayan işler kuyruktan düşer"""
+    with _kosul:
+        for gorev in [g for _, _, g in _kuyruk] + list(_aktif.values()):
+            if gorev.durum in ("bitti", "iptal"):
+                continue
+            gorev.dinleyiciler = [d for d in gorev.dinleyiciler if d[0] is not sahip]
+            gorev.sonrakiler = [d for d in gorev.sonrakiler if d[0] is not sahip]
+            if not gorev.dinleyiciler and gorev.durum == "bekliyor":
+                gorev.durum = "iptal"
+                if _aktif.get(gorev.anahtar) is gorev:
+                    del _aktif[gorev.anahtar]
+
+
+def _sahibi_izle(sahip):
+    """Pencere kapanınca (<Destroy>) isteklerini iptal eder"""
+    if _sahipler.get(id(sahip)) is sahip:
+        return
+    _sahipler[id(sahip)] = sahip
+    yol = str(sahip)
+    sahip_ref = weakref.ref(sahip)
+
+    def kapandi(event):
+        # <Destroy> alt widget'lar için de gelir; event.widget nesne veya yol olabilir
+        if str(event.widget) != yol:
+            return
+        sahip = sahip_ref()
+        if sahip is not None:
+            _sahipler.pop(id(sahip), None)
+            iptal_et(sahip)
+
+    # CTk widget'larının bind'ı iç canvas'a bağlar; olay widget'ın kendisine bağlanır
+    tkinter.Misc.bind(sahip, "<Destroy>", kapandi, add="+")
+
+
+# ==================== İŞÇİLER ====================
+
+def _iscileri_baslat():
+    while len(_isciler) < ISCI_SAYISI:
+        isci = threading.Thread(target=_isci_dongusu, name=f"antkoli-gorev-{len(_isciler)}", daemon=True)
+        _isciler.append(isci)
+        isci.start()
+
+
+def _siradaki():
+    """Çalıştırılabilir ilk görevi kuyruktan alır (kilit tutulurken çağrılır)"""
+    global _calisan, _calisan_dusuk
+    while _kuyruk:
+        oncelik, _, gorev = _kuyruk[0]
+        if gorev.durum != "bekliyor" or oncelik != gorev.oncelik:
+            heapq.heappop(_kuyruk)      # İptal edilmiş veya öne alınmış eski kayıt
+            continue
+        if oncelik > ONCELIK_GORUNUR:
+            if _calisan_dusuk >= ISCI_SAYISI - 1:
+                return None             # Son işçi görünür işler için boş kalır
+            _calisan_dusuk += 1
+        heapq.heappop(_kuyruk)
+        gorev.durum = "calisiyor"
+        _calisan += 1
+        return gorev
+    return None
+
+
+def _isci_dongusu():
+    global _calisan, _calisan_dusuk
+    while True:
+        with _kosul:
+            gorev = _siradaki()
+            while gorev is None:
+                _kosul.wait()
+                gorev = _siradaki()
+
+        try:
+            sonuc, istisna = gorev.fonk(*gorev.args, **gorev.kwargs), None
+        except Exception as e:
+            sonuc, istisna = None, e
+
+        with _kosul:
+            _calisan -= 1
+            if gorev.oncelik > ONCELIK_GORUNUR:
+                _calisan_dusuk -= 1
+            dinleyiciler = list(gorev.dinleyiciler)
+            if gorev.sonrakiler:
+                # Çalışırken gelen istekler için bir kez daha kuyruğa girer
+                gorev.dinleyiciler, gorev.sonrakiler = gorev.sonrakiler, []
+                gorev.oncelik = gorev.sonraki_oncelik
+                gorev.durum = "bekliyor"
+                heapq.heappush(_kuyruk, (gorev.oncelik, next(_sayac), gorev))
+            else:
+                gorev.durum = "bitti"
+                if _aktif.get(gorev.anahtar) is gorev:
+                    del _aktif[gorev.anahtar]
+            _kosul.notify_all()
+
+        if istisna is not None and not any(h for _, _, h in dinleyiciler):
+            print(f"[HATA] Arka plan gorevi hatasi ({gorev.anahtar or gorev.fonk.__name__}): {istisna}")
+        for sahip, basarili, hata in dinleyiciler:
+            geri_cagri = basarili if istisna is None else hata
+            if geri_cagri is not None:
+                _sonuclar.put((sahip, geri_cagri, sonuc if istisna is None else istisna))
+
+
+# ==================== ANA THREAD DAĞITICISI ====================
+
+def baslat(kok):
+    """Sonuç dağıtıcısını kök pencerenin after döngüsünde başlatır"""
+    global _kok
+    _kok = kok
+    kok.after(DAGITIM_ARALIGI, _dagit)
+
+
+def _dagit():
+    """Biten işlerin geri çağrılarını ana thread'de çalıştırır"""
+    while True:
+        try:
+            sahip, geri_cagri, deger = _sonuclar.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            if sahip is not None and not sahip.winfo_exists():
+                continue
+            geri_cagri(deger)
+        except Exception as e:
+            print(f"[HATA] Gorev geri cagrisi hatasi: {e}")
+    try:
+        _kok.after(DAGITIM_ARALIGI, _dagit)
+    except Exception:
+        pass    # Uygulama kapanıyor
+
+
+def bekleyen_gorev_sayisi():
+    """Kuyrukta bekleyen ve çalışan iş sayısı (tanılama için)"""
+    with _kosul:
+        return len({id(g) for _, _, g in _kuyruk if g.durum == "bekliyor"}) + _calisan
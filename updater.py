@@ -20,7 +20,10 @@ CURRENT_VERSION = "1.2.6"
 APP_NAME = "Ant Koli Kar Hesaplama"
 
 # Firebase üzerinden versiyon kontrolü
-FIREBASE_VERSION_URL = "https://ant-koli-kar-hesaplama-default-rtdb.europe-west1.firebasedatabase.app"
+FIREBASE_VERSION_URL = os.environ.get(
+    "ANTKOLI_FIREBASE_URL",
+    "https://ant-koli-kar-hesaplama-default-rtdb.europe-west1.firebasedatabase.app"
+)
 # ============================================================
 
 